@@ -21,4 +21,9 @@ if __name__ == '__main__':
     port = int(os.getenv('PORT', 5000))
     debug = os.getenv('FLASK_ENV', 'development') == 'development'
     
+    # With the reloader, only the child process that serves requests runs background threads
+    if not debug or os.getenv('WERKZEUG_RUN_MAIN') == 'true':
+        from backend.server import start_background_tasks
+        start_background_tasks(app)
+    
     app.run(debug=debug, host='0.0.0.0', port=port)
@@ -1,10 +1,20 @@
 """
 Backend package initialization and app factory.
 """
+import click
 from flask import Flask
 from flask_cors import CORS
 from backend.models import db
 from backend.config import config
+from backend.database import engine_options, bind_options, configure_engine, add_missing_columns, add_missing_indexes
+from backend.services.resource_search import install_search_index
+from backend.services.circuit_breaker import breaker_states
+from backend.services.content_cache import content_cache
+from backend.services.bulk_scorer import score_archive_command
+from backend.services.rescorer import rescore_analyses_command
+from backend.services.retention import prune_analyses_command
+from backend.services.watch_scheduler import run_scheduler_command
+from backend import metrics
 from src.logger import logging
 import os
 
@@ -15,9 +25,15 @@ def create_app(config_name=None):
     # Load configuration
     config_name = config_name or os.getenv('FLASK_ENV', 'development')
     app.config.from_object(config[config_name])
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config)
+    app.config['SQLALCHEMY_BINDS'] = bind_options(app.config)
     
     # Initialize extensions
     db.init_app(app)
+    with app.app_context():
+        configure_engine(app, db)
+    
+    metrics.init_app(app)
     
     # Configure CORS
     CORS(app, origins=app.config['CORS_ORIGINS'], supports_credentials=True)
@@ -26,19 +42,59 @@ def create_app(config_name=None):
     from backend.routes.auth import auth_bp
     from backend.routes.analysis import analysis_bp
     from backend.routes.resources import resources_bp
+    from backend.routes.watchlist import watchlist_bp
     
     app.register_blueprint(auth_bp)
     app.register_blueprint(analysis_bp)
     app.register_blueprint(resources_bp)
+    app.register_blueprint(watchlist_bp)
     
     # Health check endpoint
     @app.route('/api/health', methods=['GET'])
     def health():
-        return {'status': 'healthy'}, 200
+        # Always 200 (the process is up); 'degraded' while an upstream circuit is open
+        upstreams = breaker_states()
+        degraded = any(state['state'] != 'closed' for state in upstreams.values())
+        return {
+            'status': 'degraded' if degraded else 'healthy',
+            'upstreams': upstreams,
+            'content_cache': content_cache.stats()
+        }, 200
+    
+    @app.cli.command('init-db')
+    @click.option('--seed', is_flag=True, help='Also seed the default resources')
+    def init_db_command(seed):
+        """Create missing tables/columns/indexes and the search index"""
+        init_database(app, seed=seed)
+        click.echo('Database initialized')
     
-    # Create database tables
+    app.cli.add_command(score_archive_command)
+    app.cli.add_command(rescore_analyses_command)
+    app.cli.add_command(prune_analyses_command)
+    app.cli.add_command(run_scheduler_command)
+    
+    # Schema creation is an explicit step in production (see init-db)
+    if app.config['DB_AUTO_CREATE']:
+        init_database(app)
+    
+    return app
+
+
+def init_database(app, seed=False):
+    """
+    Create missing tables, columns and indexes, the resource search index and
+    (optionally) seed data.
+    
+    Args:
+        app: Flask application
+        seed: Also insert the default resources
+    """
     with app.app_context():
         db.create_all()
+        add_missing_columns(db.engine, db.metadata)
+        add_missing_indexes(db.engine, db.metadata)
+        install_search_index(db.engine)
         logging.info("Database tables created/verified")
-    
-    return app
+        if seed:
+            from backend.utils.seed_resources import seed_resources
+            seed_resources()
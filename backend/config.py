@@ -7,6 +7,9 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+# Flask's instance folder, where relative sqlite:/// database paths also resolve
+INSTANCE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'instance')
+
 class Config:
     """Base configuration"""
     SECRET_KEY = os.getenv('SECRET_KEY', 'dev-secret-key-change-in-production')
@@ -16,14 +19,35 @@ class Config:
     )
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     
+    # Optional read replica for read-only endpoints; unset means all reads hit the primary
+    DATABASE_REPLICA_URL = os.getenv('DATABASE_REPLICA_URL', '')
+    # After a write, keep that client's reads on the primary for this long
+    REPLICA_READ_YOUR_WRITES_SECONDS = float(os.getenv('REPLICA_READ_YOUR_WRITES_SECONDS', '10'))
+    
+    # Database engine profile (see backend/database.py)
+    DB_TUNING_ENABLED = os.getenv('DB_TUNING_ENABLED', 'True').lower() == 'true'
+    # One pooled connection per request thread in a worker, plus headroom for bursts
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', os.getenv('WEB_THREADS', '4')))
+    DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', '4'))
+    DB_POOL_TIMEOUT = int(os.getenv('DB_POOL_TIMEOUT', '10'))
+    SQLITE_PRAGMAS = {
+        'journal_mode': os.getenv('SQLITE_JOURNAL_MODE', 'WAL'),
+        'synchronous': os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL'),
+        'busy_timeout': int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', '5000')),
+        'mmap_size': int(os.getenv('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024))),
+        'cache_size': int(os.getenv('SQLITE_CACHE_SIZE', '-65536')),  # negative = KiB
+    }
+    # Create missing tables on app start-up; otherwise run `flask --app app init-db`
+    DB_AUTO_CREATE = os.getenv('DB_AUTO_CREATE', 'False').lower() == 'true'
+    
     # Twitter/X OAuth Configuration
     TWITTER_CLIENT_ID = os.getenv('TWITTER_CLIENT_ID', '')
     TWITTER_CLIENT_SECRET = os.getenv('TWITTER_CLIENT_SECRET', '')
     TWITTER_REDIRECT_URI = os.getenv('TWITTER_REDIRECT_URI', 'http://localhost:5173/auth/callback')
     TWITTER_API_BEARER_TOKEN = os.getenv('TWITTER_API_BEARER_TOKEN', '')
     
-    # Twitter API v2 Configuration
-    TWITTER_API_BASE_URL = 'https://api.twitter.com/2'
+    # Twitter API v2 Configuration (point the API base URL at scripts/upstream_stub.py for offline runs)
+    TWITTER_API_BASE_URL = os.getenv('TWITTER_API_BASE_URL', 'https://api.twitter.com/2').rstrip('/')
     TWITTER_OAUTH_BASE_URL = 'https://twitter.com/i/oauth2'
     
     # Reddit OAuth Configuration
@@ -31,6 +55,41 @@ class Config:
     REDDIT_CLIENT_SECRET = os.getenv('REDDIT_CLIENT_SECRET', '')
     REDDIT_REDIRECT_URI = os.getenv('REDDIT_REDIRECT_URI', 'http://localhost:5173/auth/reddit/callback')
     REDDIT_USER_AGENT = os.getenv('REDDIT_USER_AGENT', 'DetectTheStress/1.0 by YourUsername')
+    # Public JSON endpoints and token endpoint / OAuth API (both can point at the upstream stub)
+    REDDIT_API_BASE_URL = os.getenv('REDDIT_API_BASE_URL', 'https://www.reddit.com').rstrip('/')
+    REDDIT_OAUTH_API_BASE_URL = os.getenv('REDDIT_OAUTH_API_BASE_URL', 'https://oauth.reddit.com').rstrip('/')
+    # Manual Reddit analyses use an application-only token (oauth.reddit.com, higher quota)
+    # when client credentials are set; renewed this long before it expires
+    REDDIT_APP_ONLY_AUTH = os.getenv('REDDIT_APP_ONLY_AUTH', 'True').lower() == 'true'
+    REDDIT_APP_TOKEN_REFRESH_MARGIN_SECONDS = float(os.getenv('REDDIT_APP_TOKEN_REFRESH_MARGIN_SECONDS', '300'))
+    
+    # Background renewal of users' Twitter/Reddit OAuth tokens (backend/services/token_refresher.py):
+    # tokens expiring within the margin are refreshed every interval; a refresh holds a
+    # per-token lease so workers never refresh the same token twice, and a failed one
+    # is retried after the backoff
+    TOKEN_REFRESH_ENABLED = os.getenv('TOKEN_REFRESH_ENABLED', 'True').lower() == 'true'
+    TOKEN_REFRESH_MARGIN_SECONDS = float(os.getenv('TOKEN_REFRESH_MARGIN_SECONDS', '600'))
+    TOKEN_REFRESH_INTERVAL_SECONDS = float(os.getenv('TOKEN_REFRESH_INTERVAL_SECONDS', '60'))
+    TOKEN_REFRESH_LEASE_SECONDS = float(os.getenv('TOKEN_REFRESH_LEASE_SECONDS', '30'))
+    TOKEN_REFRESH_BACKOFF_SECONDS = float(os.getenv('TOKEN_REFRESH_BACKOFF_SECONDS', '300'))
+    TOKEN_REFRESH_BATCH_SIZE = int(os.getenv('TOKEN_REFRESH_BATCH_SIZE', '100'))
+    
+    # Watchlist: scheduled re-analysis of tracked accounts (in-process, or `flask run-scheduler`)
+    # Off by default: run one scheduler with `flask run-scheduler`. When enabled, every web worker
+    # starts its own, and the per-process run rate below multiplies by the worker count
+    WATCHLIST_SCHEDULER_ENABLED = os.getenv('WATCHLIST_SCHEDULER_ENABLED', 'False').lower() == 'true'
+    WATCHLIST_WORKERS = int(os.getenv('WATCHLIST_WORKERS', '2'))  # Concurrent re-analyses per process
+    WATCHLIST_MAX_RUNS_PER_MINUTE = float(os.getenv('WATCHLIST_MAX_RUNS_PER_MINUTE', '60'))  # Per process
+    WATCHLIST_POLL_SECONDS = float(os.getenv('WATCHLIST_POLL_SECONDS', '30'))
+    WATCHLIST_HORIZON_SECONDS = float(os.getenv('WATCHLIST_HORIZON_SECONDS', '300'))  # How far ahead due watches are queued
+    WATCHLIST_BATCH_SIZE = int(os.getenv('WATCHLIST_BATCH_SIZE', '500'))  # Watches queued per poll
+    WATCHLIST_LEASE_SECONDS = float(os.getenv('WATCHLIST_LEASE_SECONDS', '120'))
+    WATCHLIST_RETRY_SECONDS = float(os.getenv('WATCHLIST_RETRY_SECONDS', '300'))  # First retry after a failed run
+    WATCHLIST_DEFAULT_INTERVAL_MINUTES = int(os.getenv('WATCHLIST_DEFAULT_INTERVAL_MINUTES', '60'))
+    WATCHLIST_MIN_INTERVAL_MINUTES = int(os.getenv('WATCHLIST_MIN_INTERVAL_MINUTES', '15'))
+    WATCHLIST_MAX_PER_USER = int(os.getenv('WATCHLIST_MAX_PER_USER', '50'))
+    # Scheduled analyses older than this are deleted by `flask prune-analyses` (0 = keep forever)
+    WATCHLIST_ANALYSIS_RETENTION_DAYS = float(os.getenv('WATCHLIST_ANALYSIS_RETENTION_DAYS', '30'))
     
     # Session Configuration
     SESSION_COOKIE_SECURE = os.getenv('SESSION_COOKIE_SECURE', 'False').lower() == 'true'
@@ -46,29 +105,74 @@ class Config:
     TWEET_LOOKBACK_DAYS = int(os.getenv('TWEET_LOOKBACK_DAYS', '30'))
     MAX_REDDIT_POSTS_TO_ANALYZE = int(os.getenv('MAX_REDDIT_POSTS_TO_ANALYZE', '100'))
     MAX_REDDIT_COMMENTS_TO_ANALYZE = int(os.getenv('MAX_REDDIT_COMMENTS_TO_ANALYZE', '50'))
+    STRESS_TIMELINE_RESOLUTION_HOURS = float(os.getenv('STRESS_TIMELINE_RESOLUTION_HOURS', '24'))
+    STRESS_TIMELINE_WINDOW_DAYS = float(os.getenv('STRESS_TIMELINE_WINDOW_DAYS', '7'))
+    # Keep the analyzed posts with each analysis so `flask rescore-analyses` can recompute it (opt-in:
+    # stores other people's post text); `flask prune-analyses` deletes them after the retention window
+    ANALYSIS_STORE_POSTS = os.getenv('ANALYSIS_STORE_POSTS', 'false').lower() == 'true'
+    ANALYSIS_POSTS_RETENTION_DAYS = float(os.getenv('ANALYSIS_POSTS_RETENTION_DAYS', '30'))  # 0 = keep forever
+    # Total time an analysis may spend on upstream calls; paging stops when it runs out
+    ANALYSIS_BUDGET_SECONDS = float(os.getenv('ANALYSIS_BUDGET_SECONDS', '20'))
+    
+    # Per-call upstream timeouts (also the default for calls outside an analysis)
+    UPSTREAM_TIMEOUT_SECONDS = float(os.getenv('UPSTREAM_TIMEOUT_SECONDS', '10'))
+    UPSTREAM_CONNECT_TIMEOUT_SECONDS = float(os.getenv('UPSTREAM_CONNECT_TIMEOUT_SECONDS', '3.05'))
+    
+    # Per platform/endpoint circuit breaker: opens on consecutive failures or on the
+    # error rate over a sliding window, then lets probes through after the reset delay
+    CIRCUIT_BREAKER_ENABLED = os.getenv('CIRCUIT_BREAKER_ENABLED', 'True').lower() == 'true'
+    CIRCUIT_FAILURE_THRESHOLD = int(os.getenv('CIRCUIT_FAILURE_THRESHOLD', '5'))
+    CIRCUIT_ERROR_RATE = float(os.getenv('CIRCUIT_ERROR_RATE', '0.5'))
+    CIRCUIT_MIN_CALLS = int(os.getenv('CIRCUIT_MIN_CALLS', '10'))
+    CIRCUIT_WINDOW_SECONDS = float(os.getenv('CIRCUIT_WINDOW_SECONDS', '60'))
+    CIRCUIT_RESET_SECONDS = float(os.getenv('CIRCUIT_RESET_SECONDS', '30'))
+    CIRCUIT_HALF_OPEN_PROBES = int(os.getenv('CIRCUIT_HALF_OPEN_PROBES', '1'))
+    
+    # Upstream pages shared by all workers on the host (SQLite file; see services/content_cache.py)
+    CONTENT_CACHE_ENABLED = os.getenv('CONTENT_CACHE_ENABLED', 'True').lower() == 'true'
+    # Relative paths resolve in the instance folder, so every entry point (gunicorn, CLI, scripts) shares one file
+    CONTENT_CACHE_PATH = os.path.join(INSTANCE_DIR, os.getenv('CONTENT_CACHE_PATH', 'upstream_cache.db'))
+    CONTENT_CACHE_TTL_SECONDS = float(os.getenv('CONTENT_CACHE_TTL_SECONDS', '120'))
+    CONTENT_CACHE_MAX_MB = int(os.getenv('CONTENT_CACHE_MAX_MB', '64'))
+    
+    # Resource catalog cache
+    RESOURCE_CACHE_TTL_SECONDS = int(os.getenv('RESOURCE_CACHE_TTL_SECONDS', '300'))
+    RESOURCE_CACHE_MAX_AGE = int(os.getenv('RESOURCE_CACHE_MAX_AGE', '60'))
+    RESOURCE_CACHE_MAX_ENTRIES = int(os.getenv('RESOURCE_CACHE_MAX_ENTRIES', '256'))
+    
+    # Resources recommended with each analysis
+    RECOMMENDATIONS_TOP_N = int(os.getenv('RECOMMENDATIONS_TOP_N', '5'))
     
     # Rate Limiting
     RATE_LIMIT_PER_MINUTE = int(os.getenv('RATE_LIMIT_PER_MINUTE', '60'))
     
+    # /api/metrics is off unless enabled; with METRICS_TOKEN set, scrapes must send it as a bearer token
+    METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'False').lower() == 'true'
+    METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+    
     # Logging
     LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+    # Log per-stage analysis timings as one JSON line per request
+    LOG_ANALYSIS_TIMINGS = os.getenv('LOG_ANALYSIS_TIMINGS', 'False').lower() == 'true'
 
 class DevelopmentConfig(Config):
     """Development configuration"""
     DEBUG = True
     TESTING = False
+    DB_AUTO_CREATE = os.getenv('DB_AUTO_CREATE', 'True').lower() == 'true'
 
 class ProductionConfig(Config):
     """Production configuration"""
     DEBUG = False
     TESTING = False
-    SESSION_COOKIE_SECURE = True
+    SESSION_COOKIE_SECURE = os.getenv('SESSION_COOKIE_SECURE', 'True').lower() == 'true'
 
 class TestingConfig(Config):
     """Testing configuration"""
     DEBUG = True
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///test_detect_stress.db'
+    DB_AUTO_CREATE = True
 
 config = {
     'development': DevelopmentConfig,
@@ -0,0 +1,252 @@
+"""
+Database engine profile: connection pool sizing, SQLite pragmas and read-replica routing.
+"""
+import time
+from functools import wraps
+from itertools import chain
+from flask import g, has_request_context, session as flask_session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event, inspect, text
+from sqlalchemy.engine import make_url
+from src.logger import logging
+
+REPLICA_BIND_KEY = 'replica'
+
+# Flask session key holding the epoch until which reads must hit the primary
+PRIMARY_READ_UNTIL_KEY = 'db_primary_until'
+
+
+def is_sqlite(uri: str) -> bool:
+    """Return True if the database URI points at SQLite"""
+    return make_url(uri).get_backend_name() == 'sqlite'
+
+
+def is_sqlite_memory(uri: str) -> bool:
+    """Return True for in-memory SQLite databases (no file, no pool sizing)"""
+    url = make_url(uri)
+    return is_sqlite(uri) and url.database in (None, '', ':memory:')
+
+
+def engine_options(config) -> dict:
+    """
+    Build SQLALCHEMY_ENGINE_OPTIONS for the configured database.
+
+    Args:
+        config: Flask config mapping
+
+    Returns:
+        Dictionary of keyword arguments for create_engine
+    """
+    uri = config['SQLALCHEMY_DATABASE_URI']
+    options = dict(config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+
+    if not config.get('DB_TUNING_ENABLED', True):
+        return options
+
+    # In-memory SQLite uses a singleton/static pool that takes no sizing
+    if not is_sqlite_memory(uri):
+        options.setdefault('pool_size', config['DB_POOL_SIZE'])
+        options.setdefault('max_overflow', config['DB_MAX_OVERFLOW'])
+        options.setdefault('pool_timeout', config['DB_POOL_TIMEOUT'])
+
+    if is_sqlite(uri):
+        connect_args = dict(options.get('connect_args') or {})
+        # pysqlite's own busy handler, in seconds; mirrors the busy_timeout pragma
+        connect_args.setdefault('timeout', config['SQLITE_PRAGMAS'].get('busy_timeout', 5000) / 1000)
+        options['connect_args'] = connect_args
+    else:
+        options.setdefault('pool_pre_ping', True)
+        options.setdefault('pool_recycle', 1800)
+
+    return options
+
+
+def bind_options(config) -> dict:
+    """
+    Build SQLALCHEMY_BINDS, adding the read replica when DATABASE_REPLICA_URL is set.
+
+    Args:
+        config: Flask config mapping
+
+    Returns:
+        Dictionary of bind key to engine options (including ``url``)
+    """
+    binds = dict(config.get('SQLALCHEMY_BINDS') or {})
+    replica_url = config.get('DATABASE_REPLICA_URL')
+    if replica_url:
+        replica_config = dict(config, SQLALCHEMY_DATABASE_URI=replica_url, SQLALCHEMY_ENGINE_OPTIONS={})
+        binds[REPLICA_BIND_KEY] = dict(engine_options(replica_config), url=replica_url)
+    return binds
+
+
+def apply_sqlite_pragmas(engine, pragmas: dict):
+    """
+    Run the given PRAGMA statements on every new DBAPI connection.
+
+    Args:
+        engine: SQLAlchemy engine bound to a SQLite database
+        pragmas: Mapping of pragma name to value, applied in order
+    """
+    if not pragmas:
+        return
+
+    @event.listens_for(engine, 'connect')
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+
+def configure_engine(app, db):
+    """
+    Attach the tuning profile to the app's engines. Must run inside an app context.
+
+    Args:
+        app: Flask application
+        db: Flask-SQLAlchemy extension instance
+    """
+    for bind_key, engine in db.engines.items():
+        if engine.dialect.name != 'sqlite':
+            continue
+
+        pragmas = dict(app.config['SQLITE_PRAGMAS']) if app.config.get('DB_TUNING_ENABLED', True) else {}
+        if bind_key == REPLICA_BIND_KEY:
+            # Guard against writes accidentally routed to a local replica file
+            pragmas['query_only'] = 'ON'
+        apply_sqlite_pragmas(engine, pragmas)
+        logging.info(f"SQLite pragmas applied to bind {bind_key or 'primary'}: {pragmas}")
+
+
+def add_missing_columns(engine, metadata):
+    """
+    Add nullable columns that exist on the models but not yet in the database.
+    create_all() only creates missing tables, so this keeps existing databases
+    in step with additive model changes (no renames, drops or type changes).
+
+    Args:
+        engine: Engine to inspect and alter
+        metadata: MetaData holding the mapped tables
+
+    Returns:
+        List of "table.column" names that were added
+    """
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    added = []
+    with engine.begin() as connection:
+        for table in metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            present = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in present or not column.nullable:
+                    continue
+                column_type = column.type.compile(dialect=engine.dialect)
+                connection.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+                for index in table.indexes:
+                    if [c.name for c in index.columns] == [column.name]:
+                        index.create(connection, checkfirst=True)
+                added.append(f'{table.name}.{column.name}')
+    if added:
+        logging.info(f"Added columns: {', '.join(added)}")
+    return added
+
+
+def add_missing_indexes(engine, metadata):
+    """
+    Create indexes declared on the models but missing from the database.
+    create_all() only creates a table's indexes together with the table, so
+    indexes added to an existing model (e.g. composite ones in __table_args__)
+    would otherwise never reach existing databases. Run after add_missing_columns.
+
+    Args:
+        engine: Engine to inspect and alter
+        metadata: MetaData holding the mapped tables
+
+    Returns:
+        List of index names that were created
+    """
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    created = []
+    with engine.begin() as connection:
+        for table in metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            present = {index['name'] for index in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name in present:
+                    continue
+                index.create(connection, checkfirst=True)
+                created.append(index.name)
+    if created:
+        logging.info(f"Created indexes: {', '.join(created)}")
+    return created
+
+
+def on_model_commit(session_class, model, callback):
+    """
+    Call callback() after every committed transaction that flushed rows of model.
+
+    Args:
+        session_class: Session class to listen on
+        model: Mapped class to watch
+        callback: Zero-argument callable
+    """
+    flag = f'model_dirty_{model.__name__}_{id(callback)}'
+
+    @event.listens_for(session_class, 'after_flush')
+    def _mark_dirty(session, flush_context):
+        if any(isinstance(obj, model) for obj in chain(session.new, session.dirty, session.deleted)):
+            session.info[flag] = True
+
+    @event.listens_for(session_class, 'after_commit')
+    def _notify(session):
+        if session.info.pop(flag, False):
+            callback()
+
+    @event.listens_for(session_class, 'after_rollback')
+    def _discard(session):
+        session.info.pop(flag, None)
+
+
+def replica_read(view):
+    """Mark a read-only view so its queries may be served by the read replica"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        g.db_replica_read = True
+        return view(*args, **kwargs)
+    return wrapper
+
+
+def stick_to_primary(seconds: float):
+    """
+    Route this client's reads to the primary for a while after a write,
+    so replica lag never hides the row it just created (read-your-writes).
+    """
+    flask_session[PRIMARY_READ_UNTIL_KEY] = time.time() + seconds
+
+
+def use_replica() -> bool:
+    """Return True if the current request may read from the replica"""
+    if not has_request_context() or not g.get('db_replica_read', False):
+        return False
+    return flask_session.get(PRIMARY_READ_UNTIL_KEY, 0) <= time.time()
+
+
+class RoutingSession(Session):
+    """
+    Session that sends reads from replica_read views to the replica bind.
+    Flushes and everything else go to the primary; without a configured
+    replica, all queries fall back to the primary.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and use_replica():
+            replica = self._db.engines.get(REPLICA_BIND_KEY)
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
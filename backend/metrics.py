@@ -0,0 +1,166 @@
+"""
+Prometheus metrics for the hot paths, exposed at /api/metrics when
+METRICS_ENABLED is set (behind a bearer token if METRICS_TOKEN is).
+
+With several worker processes, set PROMETHEUS_MULTIPROC_DIR to an empty shared
+directory before start-up; each process then writes its samples to mmap'd files
+there and /api/metrics aggregates them across workers.
+"""
+import hmac
+import os
+import time
+from flask import Response, g, jsonify, request
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess
+)
+from sqlalchemy import event
+from backend.config import Config
+from backend.database import RoutingSession
+from src.logger import logging
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+HTTP_REQUEST_DURATION = Histogram(
+    'http_request_duration_seconds', 'Flask request latency',
+    ['endpoint', 'method', 'status'], buckets=LATENCY_BUCKETS
+)
+HTTP_REQUESTS_IN_FLIGHT = Gauge(
+    'http_requests_in_flight', 'Requests currently being handled',
+    multiprocess_mode='livesum'
+)
+UPSTREAM_REQUEST_DURATION = Histogram(
+    'upstream_request_duration_seconds', 'Latency of Twitter/Reddit API calls',
+    ['platform', 'endpoint', 'status'], buckets=LATENCY_BUCKETS
+)
+ANALYSIS_PAGES = Histogram(
+    'analysis_pages_fetched', 'Upstream pages fetched per analysis',
+    ['platform'], buckets=(1, 2, 3, 5, 8, 13, 21)
+)
+POSTS_SCORED = Counter('posts_scored_total', 'Posts scored by the stress analyzer')
+SCORING_THROUGHPUT = Histogram(
+    'analysis_scoring_posts_per_second', 'Scoring throughput per analysis',
+    buckets=(100, 500, 1000, 5000, 10000, 50000, 100000, 500000)
+)
+DB_COMMIT_DURATION = Histogram(
+    'db_commit_duration_seconds', 'Session flush + commit latency', buckets=LATENCY_BUCKETS
+)
+CACHE_REQUESTS = Counter('cache_requests_total', 'Cache lookups by outcome', ['cache', 'result'])
+CONTENT_CACHE_WORKER = Gauge(
+    'upstream_content_cache', 'Shared upstream content cache lookups and bytes saved, per worker process',
+    ['stat'], multiprocess_mode='all'
+)
+CIRCUIT_STATE = Gauge(
+    'upstream_circuit_state', 'Upstream circuit breaker state (0 closed, 1 half-open, 2 open)',
+    ['platform', 'endpoint'], multiprocess_mode='livemax'
+)
+TOKEN_REFRESHES = Counter(
+    'oauth_token_refreshes_total', 'User OAuth token refreshes',
+    ['platform', 'trigger', 'result']
+)
+WATCHLIST_RUNS = Counter('watchlist_runs_total', 'Scheduled watchlist re-analyses by outcome', ['platform', 'result'])
+WATCHLIST_LAG = Histogram(
+    'watchlist_run_lag_seconds', 'Delay between a watch falling due and its run starting',
+    buckets=(1, 5, 15, 30, 60, 120, 300, 900, 1800, 3600)
+)
+
+_COMMIT_STARTED_KEY = 'metrics_commit_started'
+
+
+def observe_upstream(platform: str, endpoint: str, status, seconds: float):
+    """Record one upstream API call"""
+    UPSTREAM_REQUEST_DURATION.labels(platform, endpoint, str(status)).observe(seconds)
+
+
+def observe_scoring(posts: int, seconds: float):
+    """Record posts scored by one analyze_tweets call"""
+    POSTS_SCORED.inc(posts)
+    if seconds > 0:
+        SCORING_THROUGHPUT.observe(posts / seconds)
+
+
+def observe_cache(cache: str, hit: bool):
+    CACHE_REQUESTS.labels(cache, 'hit' if hit else 'miss').inc()
+
+
+def watch_commits(session_class):
+    """Time every session commit (flush included)"""
+    @event.listens_for(session_class, 'before_commit')
+    def _start(session):
+        session.info[_COMMIT_STARTED_KEY] = time.perf_counter()
+
+    @event.listens_for(session_class, 'after_commit')
+    def _finish(session):
+        started = session.info.pop(_COMMIT_STARTED_KEY, None)
+        if started is not None:
+            DB_COMMIT_DURATION.observe(time.perf_counter() - started)
+
+    @event.listens_for(session_class, 'after_rollback')
+    def _discard(session):
+        session.info.pop(_COMMIT_STARTED_KEY, None)
+
+
+def mark_worker_dead(pid: int):
+    """Drop a dead worker's live gauges from multiprocess aggregation"""
+    if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        multiprocess.mark_process_dead(pid)
+
+
+def metrics_response() -> Response:
+    """Render all metrics in the Prometheus text exposition format"""
+    if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        body = generate_latest(registry)
+    else:
+        body = generate_latest()
+    return Response(body, mimetype=CONTENT_TYPE_LATEST)
+
+
+def authorized_scrape() -> bool:
+    """Whether the request carries METRICS_TOKEN as its bearer token (always true without one)"""
+    if not Config.METRICS_TOKEN:
+        return True
+    scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+    return scheme.lower() == 'bearer' and hmac.compare_digest(token.encode(), Config.METRICS_TOKEN.encode())
+
+
+def protected_metrics_response():
+    """/api/metrics view: the exposition, or 401 without the configured token"""
+    if not authorized_scrape():
+        response = jsonify({'status': 'error', 'message': 'Unauthorized'})
+        response.headers['WWW-Authenticate'] = 'Bearer'
+        return response, 401
+    return metrics_response()
+
+
+watch_commits(RoutingSession)
+
+
+def init_app(app):
+    """Register request instrumentation and, if enabled, the /api/metrics endpoint"""
+    @app.before_request
+    def _start_timer():
+        g.metrics_started = time.perf_counter()
+        HTTP_REQUESTS_IN_FLIGHT.inc()
+
+    @app.teardown_request
+    def _in_flight_done(exc):
+        if 'metrics_started' in g:
+            HTTP_REQUESTS_IN_FLIGHT.dec()
+
+    @app.after_request
+    def _record_request(response):
+        started = g.get('metrics_started')
+        if started is not None:
+            HTTP_REQUEST_DURATION.labels(
+                request.url_rule.rule if request.url_rule else 'unmatched',
+                request.method,
+                str(response.status_code)
+            ).observe(time.perf_counter() - started)
+        return response
+
+    if not Config.METRICS_ENABLED:
+        return
+    if not Config.METRICS_TOKEN:
+        logging.warning("/api/metrics is enabled without METRICS_TOKEN; restrict access to it at the proxy")
+    app.add_url_rule('/api/metrics', 'metrics', protected_metrics_response, methods=['GET'])
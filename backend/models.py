@@ -3,10 +3,12 @@ Database models for the Detect The Stress application.
 """
 from datetime import datetime
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy import Column, Integer, String, DateTime, Float, Text, Boolean, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, DateTime, Float, Text, Boolean, ForeignKey, JSON, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
+from backend.utils.post_record import PostRecord
+from backend.database import RoutingSession
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 class User(db.Model):
     """User model for storing user information"""
@@ -21,12 +23,16 @@ class User(db.Model):
     twitter_id = Column(String(50), unique=True, nullable=True, index=True)
     twitter_access_token = Column(Text, nullable=True)  # Encrypted in production
     twitter_refresh_token = Column(Text, nullable=True)  # Encrypted in production
+    twitter_token_expires_at = Column(DateTime, nullable=True, index=True)  # NULL = unknown, never refreshed ahead
+    twitter_token_lease_until = Column(DateTime, nullable=True)  # Refresh in progress (or backing off) until then
     is_twitter_connected = Column(Boolean, default=False)
     
     # Reddit fields
     reddit_id = Column(String(50), unique=True, nullable=True, index=True)
     reddit_access_token = Column(Text, nullable=True)  # Encrypted in production
     reddit_refresh_token = Column(Text, nullable=True)  # Encrypted in production
+    reddit_token_expires_at = Column(DateTime, nullable=True, index=True)
+    reddit_token_lease_until = Column(DateTime, nullable=True)
     is_reddit_connected = Column(Boolean, default=False)
     reddit_karma = Column(Integer, default=0)
     
@@ -41,6 +47,7 @@ class User(db.Model):
     
     # Relationships
     analyses = relationship('Analysis', back_populates='user', cascade='all, delete-orphan')
+    watches = relationship('Watch', back_populates='user', cascade='all, delete-orphan')
     
     def to_dict(self, include_sensitive=False):
         """Convert user to dictionary"""
@@ -92,9 +99,41 @@ class Analysis(db.Model):
     # Metadata
     analysis_date = Column(DateTime, default=datetime.utcnow, index=True)
     processing_time_seconds = Column(Float, nullable=True)
+    scorer_version = Column(String(32), nullable=True, index=True)  # StressAnalyzer.scorer_version(); NULL = before versioning
     
     # Relationships
     user = relationship('User', back_populates='analyses')
+    posts = relationship('AnalysisPost', cascade='all, delete-orphan')
+    
+    @classmethod
+    def from_result(cls, user_id, platform, analysis_type, username, result, scorer_version=None):
+        """
+        Build an analysis row from a StressAnalyzer.analyze_tweets result.
+        
+        Args:
+            user_id: Owning user
+            platform: 'twitter' or 'reddit'
+            analysis_type: 'oauth', 'manual', 'scheduled' or 'archive'
+            username: Account that was analyzed
+            result: analyze_tweets/analyze_user_tweets result
+            scorer_version: StressAnalyzer.scorer_version() the result was computed with
+        """
+        return cls(
+            user_id=user_id,
+            platform=platform,
+            analysis_type=analysis_type,
+            username_analyzed=username,
+            stress_level=result['stress_level'],
+            stress_category=result['stress_category'],
+            confidence_score=result['confidence_score'],
+            total_posts_analyzed=result['total_tweets_analyzed'],
+            posts_with_stress_indicators=result['tweets_with_stress_indicators'],
+            average_sentiment=result['average_sentiment'],
+            detailed_metrics=result['detailed_metrics'],
+            content_samples=result['tweet_samples'],
+            processing_time_seconds=result.get('processing_time_seconds'),
+            scorer_version=scorer_version
+        )
     
     def to_dict(self):
         """Convert analysis to dictionary"""
@@ -122,8 +161,104 @@ class Analysis(db.Model):
             'tweet_samples': samples,  # Backward compatibility
             'analysis_date': self.analysis_date.isoformat() if self.analysis_date else None,
             'processing_time_seconds': self.processing_time_seconds,
+            'scorer_version': self.scorer_version,
         }
 
+class AnalysisPost(db.Model):
+    """Content an analysis was computed from, kept so it can be re-scored"""
+    __tablename__ = 'analysis_posts'
+    
+    id = Column(Integer, primary_key=True)
+    analysis_id = Column(Integer, ForeignKey('analyses.id'), nullable=False, index=True)
+    post_id = Column(String(64), nullable=True)
+    text = Column(Text, nullable=False)
+    created_at = Column(String(40), nullable=True)
+    created_utc = Column(Float, nullable=True)
+    content_type = Column(String(20), nullable=True)  # 'tweet', 'post' or 'comment'
+    
+    @staticmethod
+    def rows_for(analysis_id, posts, default_type='post'):
+        """Insert parameters for the posts (with text) an analysis scored"""
+        return [
+            {
+                'analysis_id': analysis_id,
+                'post_id': str(post['id']) if post.get('id') is not None else None,
+                'text': post['text'],
+                'created_at': str(post['created_at']) if post.get('created_at') else None,
+                'created_utc': post.get('created_utc'),
+                'content_type': post.get('content_type', default_type),
+            }
+            for post in posts if post.get('text')
+        ]
+    
+    def to_post(self):
+        """The stored post as a PostRecord for StressAnalyzer.analyze_tweets"""
+        return PostRecord(self.post_id, self.text, self.created_utc, self.content_type, created_at=self.created_at)
+
+class Watch(db.Model):
+    """An account a user tracks; re-analyzed every interval by the watchlist scheduler"""
+    __tablename__ = 'watches'
+    
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey('users.id'), nullable=False, index=True)
+    platform = Column(String(20), nullable=False)  # 'twitter' or 'reddit'
+    username = Column(String(50), nullable=False)
+    interval_minutes = Column(Integer, nullable=False, default=60)
+    is_active = Column(Boolean, default=True)
+    
+    # Scheduling
+    next_run_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    lease_until = Column(DateTime, nullable=True)  # Claimed by a scheduler until then
+    last_run_at = Column(DateTime, nullable=True)
+    last_success_at = Column(DateTime, nullable=True)
+    last_analysis_id = Column(Integer, ForeignKey('analyses.id'), nullable=True)
+    failures = Column(Integer, nullable=False, default=0)  # Consecutive failed runs
+    last_error = Column(String(500), nullable=True)
+    
+    # Incremental fetching: only content newer than what the last run saw is requested
+    platform_user_id = Column(String(50), nullable=True)  # Twitter user ID, looked up once
+    last_seen_id = Column(String(50), nullable=True)  # Newest tweet ID fetched
+    last_seen_utc = Column(Float, nullable=True)  # Newest Reddit created_utc fetched
+    
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    user = relationship('User', back_populates='watches')
+    
+    __table_args__ = (
+        UniqueConstraint('user_id', 'platform', 'username', name='uq_watches_user_account'),
+        # The scheduler's due-soon scan
+        Index('ix_watches_due', 'is_active', 'next_run_at'),
+    )
+    
+    def to_dict(self):
+        """Convert watch to dictionary"""
+        return {
+            'id': self.id,
+            'platform': self.platform,
+            'username': self.username,
+            'interval_minutes': self.interval_minutes,
+            'is_active': self.is_active,
+            'next_run_at': self.next_run_at.isoformat() if self.next_run_at else None,
+            'last_run_at': self.last_run_at.isoformat() if self.last_run_at else None,
+            'last_success_at': self.last_success_at.isoformat() if self.last_success_at else None,
+            'last_analysis_id': self.last_analysis_id,
+            'failures': self.failures,
+            'last_error': self.last_error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+        }
+
+class BackfillCheckpoint(db.Model):
+    """Progress of a resumable backfill job, committed in the same transaction as each batch"""
+    __tablename__ = 'backfill_checkpoints'
+    
+    job = Column(String(100), primary_key=True)
+    last_id = Column(Integer, nullable=False, default=0)  # Highest primary key processed
+    rows_done = Column(Integer, nullable=False, default=0)
+    rows_skipped = Column(Integer, nullable=False, default=0)
+    started_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    finished_at = Column(DateTime, nullable=True)
+
 class Resource(db.Model):
     """Resource model for storing mental health resources"""
     __tablename__ = 'resources'
@@ -144,6 +279,12 @@ class Resource(db.Model):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    __table_args__ = (
+        # Covers the catalog filters (active/type/category/featured) and newest-first ordering
+        Index('ix_resources_catalog', 'is_active', 'resource_type', 'category', 'is_featured', 'created_at'),
+        Index('ix_resources_active_category', 'is_active', 'category'),
+    )
+    
     def to_dict(self):
         """Convert resource to dictionary"""
         return {
@@ -2,17 +2,90 @@
 Analysis routes for stress detection (Twitter and Reddit).
 """
 from flask import Blueprint, request, jsonify, session
-from backend.models import db, User, Analysis
+from backend.models import db, User, Analysis, AnalysisPost
+from backend.database import replica_read, stick_to_primary
 from backend.services.twitter_api import TwitterAPIService
 from backend.services.reddit_api import RedditAPIService
+from backend.services.reddit_oauth import RedditOAuthService
+from backend.services.token_refresher import token_refresher
 from backend.services.stress_analyzer import StressAnalyzer
+from backend.services.recommendations import RecommendationIndex
+from backend.services.circuit_breaker import CircuitOpenError
+from backend.services.upstream import UpstreamNotFoundError
+from backend.database import RoutingSession
+from backend.metrics import ANALYSIS_PAGES
+from backend.utils.deadline import Deadline
+from backend.utils.timing import SpanRecorder
 from backend.config import Config
 from src.logger import logging
 from src.exception import CustomException
+from datetime import timedelta
+from sqlalchemy import insert
+import json
 import sys
+import requests
 
 analysis_bp = Blueprint('analysis', __name__, url_prefix='/api/analysis')
 
+# Resources matched to stress category / indicators, served without a DB query;
+# rebuilt by its background thread (see backend.server.start_background_tasks)
+recommendation_index = RecommendationIndex(
+    top_n=Config.RECOMMENDATIONS_TOP_N,
+    ttl_seconds=Config.RESOURCE_CACHE_TTL_SECONDS
+)
+recommendation_index.watch(RoutingSession)
+
+def circuit_open_response(user_id, platform, username, error):
+    """
+    Fail fast while an upstream endpoint's circuit is open: serve the last
+    stored analysis of the same account if there is one, otherwise a 503.
+    """
+    last_analysis = Analysis.query.filter_by(user_id=user_id, platform=platform, username_analyzed=username)\
+        .order_by(Analysis.analysis_date.desc())\
+        .first()
+    retry_after = int(error.retry_after) + 1
+    
+    if last_analysis:
+        return jsonify({
+            'status': 'success',
+            'platform': platform,
+            'stale': True,
+            'message': f'{platform.title()} is temporarily unavailable; showing your last analysis of this account.',
+            'analysis': last_analysis.to_dict()
+        }), 200
+    
+    response = jsonify({
+        'status': 'error',
+        'message': f'{platform.title()} is temporarily unavailable. Please try again in {retry_after} seconds.'
+    })
+    response.headers['Retry-After'] = str(retry_after)
+    return response, 503
+
+def lookup_error_response(error, deadline, account):
+    """
+    Response for a failed account lookup: 404 only when the upstream says the
+    account doesn't exist, 504 when the lookup timed out or the analysis budget
+    ran out, 502 for any other upstream failure.
+    """
+    if isinstance(error, UpstreamNotFoundError):
+        return jsonify({
+            'status': 'error',
+            'message': f'Could not find {account}. Please check the username and try again.'
+        }), 404
+    
+    if isinstance(error, requests.Timeout) or deadline.expired:
+        logging.warning(f"Lookup of {account} timed out: {str(error)}")
+        return jsonify({
+            'status': 'error',
+            'message': f'Timed out looking up {account}. Please try again.'
+        }), 504
+    
+    logging.error(f"Lookup of {account} failed: {str(error)}")
+    return jsonify({
+        'status': 'error',
+        'message': f'Could not look up {account} right now. Please try again later.'
+    }), 502
+
 @analysis_bp.route('/analyze', methods=['POST'])
 def analyze_user():
     """Analyze user content (Twitter or Reddit) for stress levels"""
@@ -60,9 +133,19 @@ def analyze_user():
             analysis_type = 'oauth' if user.is_reddit_connected else 'manual'
         
         # Initialize analyzer
-        analyzer = StressAnalyzer()
+        analyzer = StressAnalyzer(
+            timeline_resolution=timedelta(hours=Config.STRESS_TIMELINE_RESOLUTION_HOURS),
+            timeline_window=timedelta(days=Config.STRESS_TIMELINE_WINDOW_DAYS)
+        )
         content_items = []
         analysis_result = None
+        recorder = SpanRecorder()
+        # Upstream calls share one budget; when it runs out we analyze what we have
+        deadline = Deadline(
+            Config.ANALYSIS_BUDGET_SECONDS,
+            max_call_seconds=Config.UPSTREAM_TIMEOUT_SECONDS,
+            max_connect_seconds=Config.UPSTREAM_CONNECT_TIMEOUT_SECONDS
+        )
         
         # Fetch and analyze based on platform
         if platform == 'twitter':
@@ -71,32 +154,47 @@ def analyze_user():
             
             # If user has OAuth, use their access token
             if user.is_twitter_connected and user.twitter_access_token:
-                twitter_service.set_access_token(user.twitter_access_token)
+                # Normally already renewed in the background; otherwise refreshed (once) here
+                with recorder.span('token'):
+                    twitter_service.set_access_token(token_refresher.ensure_fresh(user, 'twitter'))
             # Otherwise, use bearer token if available
             elif Config.TWITTER_API_BEARER_TOKEN:
                 twitter_service = TwitterAPIService(Config.TWITTER_API_BEARER_TOKEN)
             
             # Get user info
+            twitter_service.recorder = recorder
+            twitter_service.deadline = deadline
             try:
-                user_info = twitter_service.get_user_by_username(username)
+                with recorder.span('lookup'):
+                    user_info = twitter_service.get_user_by_username(username)
                 twitter_user_id = user_info.get('id')
-            except CustomException as e:
-                return jsonify({
-                    'status': 'error',
-                    'message': f'Could not find Twitter user @{username}. Please check the username and try again.'
-                }), 404
+            except (CustomException, requests.Timeout) as e:
+                return lookup_error_response(e, deadline, f'Twitter user @{username}')
             
             # Get tweets
             try:
-                tweets = twitter_service.get_user_tweets(
-                    twitter_user_id,
-                    max_results=Config.MAX_TWEETS_TO_ANALYZE,
-                )
+                with recorder.span('fetch'):
+                    tweets = twitter_service.get_user_tweets(
+                        twitter_user_id,
+                        max_results=Config.MAX_TWEETS_TO_ANALYZE,
+                    )
             except CustomException as e:
                 return jsonify({
                     'status': 'error',
                     'message': f'Failed to fetch tweets: {str(e)}'
                 }), 500
+            finally:
+                ANALYSIS_PAGES.labels('twitter').observe(twitter_service.pages_fetched)
+            fetch_service = twitter_service
+            
+            if not tweets and twitter_service.circuit_error:
+                raise twitter_service.circuit_error
+            
+            if not tweets and twitter_service.truncated:
+                return jsonify({
+                    'status': 'error',
+                    'message': f'Timed out fetching tweets for @{username}. Please try again.'
+                }), 504
             
             if not tweets:
                 return jsonify({
@@ -105,8 +203,9 @@ def analyze_user():
                 }), 404
             
             # Analyze tweets
-            analysis_result = analyzer.analyze_user_tweets(tweets, username)
+            analysis_result = analyzer.analyze_user_tweets(tweets, username, recorder=recorder)
             content_items = tweets
+            scored_posts = tweets
             
         else:  # platform == 'reddit'
             # Reddit analysis
@@ -114,30 +213,55 @@ def analyze_user():
             
             # If user has OAuth, use their access token
             if user.is_reddit_connected and user.reddit_access_token:
-                reddit_service.set_access_token(user.reddit_access_token)
+                with recorder.span('token'):
+                    reddit_service.set_access_token(token_refresher.ensure_fresh(user, 'reddit'))
+            # Otherwise use the shared application-only token if we can get one
+            elif Config.REDDIT_APP_ONLY_AUTH:
+                reddit_oauth = RedditOAuthService(
+                    Config.REDDIT_CLIENT_ID,
+                    Config.REDDIT_CLIENT_SECRET,
+                    Config.REDDIT_REDIRECT_URI
+                )
+                app_token = reddit_oauth.get_app_access_token()
+                if app_token:
+                    reddit_service.set_access_token(app_token, app_only=True,
+                                                    renew=reddit_oauth.renew_app_access_token)
+            reddit_service.recorder = recorder
+            reddit_service.deadline = deadline
             
             # Get user info
             try:
-                user_info = reddit_service.get_user_by_username(username)
-            except CustomException as e:
-                return jsonify({
-                    'status': 'error',
-                    'message': f'Could not find Reddit user u/{username}. Please check the username and try again.'
-                }), 404
+                with recorder.span('lookup'):
+                    user_info = reddit_service.get_user_by_username(username)
+            except (CustomException, requests.Timeout) as e:
+                return lookup_error_response(e, deadline, f'Reddit user u/{username}')
             
             # Get posts and comments
             try:
-                content_items = reddit_service.get_user_content(
-                    username,
-                    include_comments=True,
-                    max_posts=Config.MAX_REDDIT_POSTS_TO_ANALYZE,
-                    max_comments=Config.MAX_REDDIT_COMMENTS_TO_ANALYZE
-                )
+                with recorder.span('fetch'):
+                    content_items = reddit_service.get_user_content(
+                        username,
+                        include_comments=True,
+                        max_posts=Config.MAX_REDDIT_POSTS_TO_ANALYZE,
+                        max_comments=Config.MAX_REDDIT_COMMENTS_TO_ANALYZE
+                    )
             except CustomException as e:
                 return jsonify({
                     'status': 'error',
                     'message': f'Failed to fetch Reddit content: {str(e)}'
                 }), 500
+            finally:
+                ANALYSIS_PAGES.labels('reddit').observe(reddit_service.pages_fetched)
+            fetch_service = reddit_service
+            
+            if not content_items and reddit_service.circuit_error:
+                raise reddit_service.circuit_error
+            
+            if not content_items and reddit_service.truncated:
+                return jsonify({
+                    'status': 'error',
+                    'message': f'Timed out fetching Reddit content for u/{username}. Please try again.'
+                }), 504
             
             if not content_items:
                 return jsonify({
@@ -145,52 +269,68 @@ def analyze_user():
                     'message': f'No posts or comments found for u/{username}'
                 }), 404
             
-            # Analyze Reddit content (posts and comments)
-            # Convert Reddit format to analysis format
-            reddit_content = []
-            for item in content_items:
-                text = item.get('text') or item.get('selftext') or item.get('title', '')
-                if text:
-                    reddit_content.append({
-                        'id': item.get('id'),
-                        'text': text,
-                        'created_at': item.get('created_at'),
-                        'content_type': item.get('content_type', 'post')
-                    })
-            
-            analysis_result = analyzer.analyze_tweets(reddit_content)  # Reuse same analyzer
+            # Analyze Reddit content (posts and comments); the records are scored as fetched
+            analysis_result = analyzer.analyze_tweets(content_items, recorder=recorder)  # Reuse same analyzer
+            scored_posts = content_items
             analysis_result['username_analyzed'] = username
         
+        # Stored timings cover everything up to persisting; the response adds persist/serialize
+        analysis_result['detailed_metrics']['timings'] = recorder.to_dict()
+        # Paging cut short by the budget: the analysis covers only part of the requested content
+        partial = fetch_service.truncated
+        coverage = fetch_service.coverage
+        analysis_result['detailed_metrics']['partial'] = partial
+        analysis_result['detailed_metrics']['coverage'] = coverage
+        
         # Save analysis to database
-        analysis = Analysis(
-            user_id=user.id,
-            platform=platform,
-            analysis_type=analysis_type,
-            username_analyzed=username,
-            stress_level=analysis_result['stress_level'],
-            stress_category=analysis_result['stress_category'],
-            confidence_score=analysis_result['confidence_score'],
-            total_posts_analyzed=analysis_result['total_tweets_analyzed'],
-            posts_with_stress_indicators=analysis_result['tweets_with_stress_indicators'],
-            average_sentiment=analysis_result['average_sentiment'],
-            detailed_metrics=analysis_result['detailed_metrics'],
-            content_samples=analysis_result['tweet_samples'],
-            processing_time_seconds=analysis_result['processing_time_seconds']
-        )
+        analysis = Analysis.from_result(user.id, platform, analysis_type, username, analysis_result,
+                                        scorer_version=StressAnalyzer.scorer_version())
         
-        db.session.add(analysis)
-        user.last_analysis_at = analysis.analysis_date
-        db.session.commit()
+        with recorder.span('persist'):
+            db.session.add(analysis)
+            if Config.ANALYSIS_STORE_POSTS:
+                db.session.flush()
+                post_rows = AnalysisPost.rows_for(analysis.id, scored_posts,
+                                                  default_type='tweet' if platform == 'twitter' else 'post')
+                if post_rows:
+                    db.session.execute(insert(AnalysisPost), post_rows)
+            user.last_analysis_at = analysis.analysis_date
+            db.session.commit()
+        stick_to_primary(Config.REPLICA_READ_YOUR_WRITES_SECONDS)
         
         platform_prefix = '@' if platform == 'twitter' else 'u/'
-        logging.info(f"Analysis completed for {platform_prefix}{username} ({platform}): {analysis_result['stress_category']}")
+        logging.info(f"Analysis completed for {platform_prefix}{username} ({platform}): {analysis_result['stress_category']}"
+                     + (f" (partial, coverage {coverage})" if partial else ''))
+        
+        with recorder.span('serialize'):
+            analysis_data = analysis.to_dict()
+            analysis_data['recommendations'] = recommendation_index.recommend(
+                analysis_result['stress_category'],
+                analysis_result['detailed_metrics'].get('top_indicators', {}).keys()
+            )
+        
+        timings = recorder.to_dict()
+        analysis_data['detailed_metrics'] = dict(analysis_data['detailed_metrics'] or {}, timings=timings)
+        if Config.LOG_ANALYSIS_TIMINGS:
+            logging.info(json.dumps({
+                'event': 'analysis_timings',
+                'analysis_id': analysis.id,
+                'platform': platform,
+                'posts': analysis_result['total_tweets_analyzed'],
+                **timings
+            }))
         
         return jsonify({
             'status': 'success',
             'platform': platform,
-            'analysis': analysis.to_dict()
+            'partial': partial,
+            'coverage': coverage,
+            'analysis': analysis_data
         }), 200
         
+    except CircuitOpenError as e:
+        logging.warning(f"Analysis short-circuited: {str(e)}")
+        return circuit_open_response(user.id, platform, username, e)
     except CustomException as e:
         logging.error(f"Custom exception in analyze: {str(e)}")
         return jsonify({
@@ -205,6 +345,7 @@ def analyze_user():
         }), 500
 
 @analysis_bp.route('/history', methods=['GET'])
+@replica_read
 def get_analysis_history():
     """Get user's analysis history"""
     try:
@@ -3,8 +3,10 @@ Authentication routes for Twitter OAuth, Reddit OAuth, and manual entry.
 """
 from flask import Blueprint, request, jsonify, session, redirect, url_for
 from backend.models import db, User
+from backend.database import replica_read, stick_to_primary
 from backend.services.twitter_oauth import TwitterOAuthService
 from backend.services.reddit_oauth import RedditOAuthService
+from backend.services.token_refresher import store_tokens
 from backend.config import Config
 from src.logger import logging
 from src.exception import CustomException
@@ -69,8 +71,6 @@ def twitter_callback():
             user.username = user_info['username']
             user.display_name = user_info['display_name']
             user.profile_image_url = user_info.get('profile_image_url')
-            user.access_token = tokens['access_token']  # In production, encrypt this
-            user.refresh_token = tokens.get('refresh_token')
             user.is_oauth_connected = True
         else:
             # Create new user
@@ -79,17 +79,19 @@ def twitter_callback():
                 username=user_info['username'],
                 display_name=user_info['display_name'],
                 profile_image_url=user_info.get('profile_image_url'),
-                access_token=tokens['access_token'],
-                refresh_token=tokens.get('refresh_token'),
                 is_oauth_connected=True
             )
             db.session.add(user)
         
+        # Tokens (and their expiry, for background refresh); in production, encrypt these
+        store_tokens(user, 'twitter', tokens)
+        user.is_twitter_connected = True
         db.session.commit()
         
         # Store user ID in session
         session['user_id'] = user.id
         session['is_authenticated'] = True
+        stick_to_primary(Config.REPLICA_READ_YOUR_WRITES_SECONDS)
         
         logging.info(f"User authenticated: {user.username}")
         
@@ -143,6 +145,7 @@ def manual_auth():
         # Store user ID in session
         session['user_id'] = user.id
         session['is_authenticated'] = True
+        stick_to_primary(Config.REPLICA_READ_YOUR_WRITES_SECONDS)
         
         logging.info(f"Manual entry authenticated: {username}")
         
@@ -160,6 +163,7 @@ def manual_auth():
         }), 500
 
 @auth_bp.route('/status', methods=['GET'])
+@replica_read
 def auth_status():
     """Check authentication status"""
     try:
@@ -267,8 +271,6 @@ def reddit_callback():
             user.username = user_info['username']
             user.display_name = user_info['display_name']
             user.profile_image_url = user_info.get('profile_image_url')
-            user.reddit_access_token = tokens['access_token']
-            user.reddit_refresh_token = tokens.get('refresh_token')
             user.is_reddit_connected = True
             user.reddit_karma = user_info.get('karma', 0)
         else:
@@ -277,8 +279,6 @@ def reddit_callback():
             if existing_user:
                 # Update existing user with Reddit info
                 existing_user.reddit_id = user_info['reddit_id']
-                existing_user.reddit_access_token = tokens['access_token']
-                existing_user.reddit_refresh_token = tokens.get('refresh_token')
                 existing_user.is_reddit_connected = True
                 existing_user.reddit_karma = user_info.get('karma', 0)
                 user = existing_user
@@ -289,18 +289,18 @@ def reddit_callback():
                     username=user_info['username'],
                     display_name=user_info['display_name'],
                     profile_image_url=user_info.get('profile_image_url'),
-                    reddit_access_token=tokens['access_token'],
-                    reddit_refresh_token=tokens.get('refresh_token'),
                     is_reddit_connected=True,
                     reddit_karma=user_info.get('karma', 0)
                 )
                 db.session.add(user)
         
+        store_tokens(user, 'reddit', tokens)
         db.session.commit()
         
         # Store user ID in session
         session['user_id'] = user.id
         session['is_authenticated'] = True
+        stick_to_primary(Config.REPLICA_READ_YOUR_WRITES_SECONDS)
         
         logging.info(f"Reddit user authenticated: {user.username}")
         
@@ -354,6 +354,7 @@ def reddit_manual():
         # Store user ID in session
         session['user_id'] = user.id
         session['is_authenticated'] = True
+        stick_to_primary(Config.REPLICA_READ_YOUR_WRITES_SECONDS)
         
         logging.info(f"Manual Reddit entry authenticated: {username}")
         
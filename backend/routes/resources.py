@@ -1,15 +1,39 @@
 """
 Resources routes for mental health content.
 """
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, current_app, request, jsonify
 from backend.models import db, Resource
+from backend.database import replica_read, RoutingSession
+from backend.services.catalog_cache import CatalogCache
+from backend.services.resource_search import search_resources, to_match_query
+from backend.config import Config
+from sqlalchemy import select, union_all, literal, null, func
+from sqlalchemy.orm import aliased
 from src.logger import logging
 from src.exception import CustomException
 import sys
 
 resources_bp = Blueprint('resources', __name__, url_prefix='/api/resources')
 
+# Catalog responses change only when Resource rows are written
+catalog_cache = CatalogCache(
+    'resource_catalog',
+    max_entries=Config.RESOURCE_CACHE_MAX_ENTRIES,
+    ttl_seconds=Config.RESOURCE_CACHE_TTL_SECONDS
+)
+catalog_cache.watch(RoutingSession, Resource)
+
+def cached_json_response(key, build_payload):
+    """Serve a cached catalog payload with a strong ETag, answering 304 when it matches"""
+    entry = catalog_cache.get(key, lambda: current_app.json.dumps(build_payload()).encode('utf-8'))
+    response = Response(entry.body, status=200, mimetype='application/json')
+    response.set_etag(entry.etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = Config.RESOURCE_CACHE_MAX_AGE
+    return response.make_conditional(request)
+
 @resources_bp.route('/', methods=['GET'])
+@replica_read
 def get_resources():
     """Get all active resources, optionally filtered by type"""
     try:
@@ -17,32 +41,142 @@ def get_resources():
         category = request.args.get('category')  # 'audio', 'writing', 'practice', etc.
         featured_only = request.args.get('featured', 'false').lower() == 'true'
         
-        query = Resource.query.filter_by(is_active=True)
+        def build_payload():
+            query = Resource.query.filter_by(is_active=True)
+            
+            if resource_type:
+                query = query.filter_by(resource_type=resource_type)
+            
+            if category:
+                query = query.filter_by(category=category)
+            
+            if featured_only:
+                query = query.filter_by(is_featured=True)
+            
+            resources = query.order_by(Resource.created_at.desc()).all()
+            return {
+                'status': 'success',
+                'resources': [resource.to_dict() for resource in resources]
+            }
+        
+        return cached_json_response(('resources', resource_type, category, featured_only), build_payload)
         
-        if resource_type:
-            query = query.filter_by(resource_type=resource_type)
+    except Exception as e:
+        logging.error(f"Error getting resources: {str(e)}")
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
+
+def facet_query(resource_type=None, category=None, featured_only=False):
+    """
+    Build one statement returning the filtered resources plus type and category counts.
+    
+    Resource rows and count rows are UNION ALL-ed into one result with NULL padding,
+    so the page needs a single round trip. Counts are disjunctive: type counts apply
+    every filter except type, category counts every filter except category.
+    """
+    table = Resource.__table__
+    base = [table.c.is_active.is_(True)]
+    if featured_only:
+        base.append(table.c.is_featured.is_(True))
+    type_filter = [table.c.resource_type == resource_type] if resource_type else []
+    category_filter = [table.c.category == category] if category else []
+    
+    padding = [null().label(c.name) for c in table.c]
+    
+    resources = select(
+        *table.c, null().label('facet'), null().label('facet_value'), null().label('facet_count')
+    ).where(*base, *type_filter, *category_filter)
+    
+    type_counts = select(
+        *padding, literal('type').label('facet'), table.c.resource_type, func.count()
+    ).where(*base, *category_filter).group_by(table.c.resource_type)
+    
+    category_counts = select(
+        *padding, literal('category').label('facet'), table.c.category, func.count()
+    ).where(*base, *type_filter).group_by(table.c.category)
+    
+    combined = union_all(resources, type_counts, category_counts).subquery()
+    resource_alias = aliased(Resource, combined)
+    return select(
+        resource_alias, combined.c.facet, combined.c.facet_value, combined.c.facet_count
+    ).order_by(combined.c.created_at.desc())
+
+@resources_bp.route('/facets', methods=['GET'])
+@replica_read
+def get_resource_facets():
+    """Get filtered resources with per-type and per-category counts in one query"""
+    try:
+        resource_type = request.args.get('type')
+        category = request.args.get('category')
+        featured_only = request.args.get('featured', 'false').lower() == 'true'
+        
+        def build_payload():
+            rows = db.session.execute(facet_query(resource_type, category, featured_only)).all()
+            
+            resources = []
+            facets = {'type': {}, 'category': {}}
+            for resource, facet, value, count in rows:
+                if resource is not None:
+                    resources.append(resource.to_dict())
+                elif value:
+                    facets[facet][value] = count
+            
+            return {
+                'status': 'success',
+                'resources': resources,
+                'types': facets['type'],
+                'categories': facets['category']
+            }
+        
+        return cached_json_response(('facets', resource_type, category, featured_only), build_payload)
+        
+    except Exception as e:
+        logging.error(f"Error getting resource facets: {str(e)}")
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
+
+@resources_bp.route('/search', methods=['GET'])
+@replica_read
+def search():
+    """Full-text search over active resources, optionally restricted to tags"""
+    try:
+        query = request.args.get('q', '').strip()
+        tags = request.args.getlist('tag')
+        limit = min(max(request.args.get('limit', 20, type=int), 1), 100)
         
-        if category:
-            query = query.filter_by(category=category)
+        if not query and not tags:
+            return jsonify({
+                'status': 'error',
+                'message': 'Query parameter q or tag is required'
+            }), 400
         
-        if featured_only:
-            query = query.filter_by(is_featured=True)
+        if query and not to_match_query(query):
+            return jsonify({
+                'status': 'error',
+                'message': 'Query parameter q has no searchable words'
+            }), 400
         
-        resources = query.order_by(Resource.created_at.desc()).all()
+        resources = search_resources(db.session, query, tags=tags, limit=limit)
         
         return jsonify({
             'status': 'success',
+            'query': query,
             'resources': [resource.to_dict() for resource in resources]
         }), 200
         
     except Exception as e:
-        logging.error(f"Error getting resources: {str(e)}")
+        logging.error(f"Error searching resources: {str(e)}")
         return jsonify({
             'status': 'error',
             'message': str(e)
         }), 500
 
 @resources_bp.route('/<int:resource_id>', methods=['GET'])
+@replica_read
 def get_resource(resource_id):
     """Get specific resource by ID"""
     try:
@@ -67,16 +201,18 @@ def get_resource(resource_id):
         }), 500
 
 @resources_bp.route('/types', methods=['GET'])
+@replica_read
 def get_resource_types():
     """Get list of available resource types"""
     try:
-        types = db.session.query(Resource.resource_type).distinct().all()
-        types_list = [t[0] for t in types if t[0]]
+        def build_payload():
+            types = db.session.query(Resource.resource_type).distinct().all()
+            return {
+                'status': 'success',
+                'types': [t[0] for t in types if t[0]]
+            }
         
-        return jsonify({
-            'status': 'success',
-            'types': types_list
-        }), 200
+        return cached_json_response(('types',), build_payload)
         
     except Exception as e:
         logging.error(f"Error getting resource types: {str(e)}")
@@ -86,16 +222,18 @@ def get_resource_types():
         }), 500
 
 @resources_bp.route('/categories', methods=['GET'])
+@replica_read
 def get_categories():
     """Get list of available categories"""
     try:
-        categories = db.session.query(Resource.category).distinct().all()
-        categories_list = [c[0] for c in categories if c[0]]
+        def build_payload():
+            categories = db.session.query(Resource.category).distinct().all()
+            return {
+                'status': 'success',
+                'categories': [c[0] for c in categories if c[0]]
+            }
         
-        return jsonify({
-            'status': 'success',
-            'categories': categories_list
-        }), 200
+        return cached_json_response(('categories',), build_payload)
         
     except Exception as e:
         logging.error(f"Error getting categories: {str(e)}")
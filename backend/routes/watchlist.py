@@ -0,0 +1,226 @@
+"""
+Watchlist routes: accounts re-analyzed on a schedule.
+"""
+from flask import Blueprint, request, jsonify, session
+from backend.models import db, User, Watch
+from backend.database import replica_read, stick_to_primary
+from backend.services.watch_scheduler import next_slot
+from backend.config import Config
+from src.logger import logging
+
+watchlist_bp = Blueprint('watchlist', __name__, url_prefix='/api/watchlist')
+
+def parse_interval(value):
+    """
+    Validate an interval in minutes from a request body.
+    
+    Returns:
+        (interval, error message)
+    """
+    try:
+        interval = int(value)
+    except (TypeError, ValueError):
+        return None, 'interval_minutes must be a whole number of minutes'
+    if interval < Config.WATCHLIST_MIN_INTERVAL_MINUTES:
+        return None, f'interval_minutes must be at least {Config.WATCHLIST_MIN_INTERVAL_MINUTES}'
+    return interval, None
+
+def owned_watch(watch_id):
+    """The current user's watch, or an error response tuple"""
+    user_id = session.get('user_id')
+    if not user_id:
+        return None, (jsonify({
+            'status': 'error',
+            'message': 'Authentication required'
+        }), 401)
+    
+    watch = db.session.get(Watch, watch_id)
+    if not watch:
+        return None, (jsonify({
+            'status': 'error',
+            'message': 'Watch not found'
+        }), 404)
+    
+    # Verify ownership
+    if watch.user_id != user_id:
+        return None, (jsonify({
+            'status': 'error',
+            'message': 'Unauthorized'
+        }), 403)
+    return watch, None
+
+@watchlist_bp.route('', methods=['GET'])
+@replica_read
+def list_watches():
+    """List the user's watched accounts"""
+    try:
+        user_id = session.get('user_id')
+        if not user_id:
+            return jsonify({
+                'status': 'error',
+                'message': 'Authentication required'
+            }), 401
+        
+        watches = Watch.query.filter_by(user_id=user_id)\
+            .order_by(Watch.created_at)\
+            .all()
+        
+        return jsonify({
+            'status': 'success',
+            'watches': [watch.to_dict() for watch in watches]
+        }), 200
+    
+    except Exception as e:
+        logging.error(f"Error listing watches: {str(e)}")
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
+
+@watchlist_bp.route('', methods=['POST'])
+def add_watch():
+    """Watch an account: re-analyze it every interval_minutes"""
+    try:
+        user_id = session.get('user_id')
+        if not user_id:
+            return jsonify({
+                'status': 'error',
+                'message': 'Authentication required'
+            }), 401
+        
+        user = User.query.get(user_id)
+        if not user:
+            return jsonify({
+                'status': 'error',
+                'message': 'User not found'
+            }), 404
+        
+        data = request.get_json() or {}
+        username = (data.get('username') or '').strip()
+        platform = (data.get('platform') or 'twitter').lower()
+        
+        if platform not in ['twitter', 'reddit']:
+            return jsonify({
+                'status': 'error',
+                'message': 'Platform must be "twitter" or "reddit"'
+            }), 400
+        
+        # Clean username based on platform (as for a one-off analysis)
+        if platform == 'twitter':
+            username = username.lstrip('@')
+        else:
+            username = username.replace('u/', '').replace('/u/', '').strip()
+        if not username:
+            return jsonify({
+                'status': 'error',
+                'message': 'Username is required'
+            }), 400
+        
+        interval, error = parse_interval(data.get('interval_minutes', Config.WATCHLIST_DEFAULT_INTERVAL_MINUTES))
+        if error:
+            return jsonify({
+                'status': 'error',
+                'message': error
+            }), 400
+        
+        if Watch.query.filter_by(user_id=user.id, platform=platform, username=username).first():
+            return jsonify({
+                'status': 'error',
+                'message': f'{username} is already on your {platform.title()} watchlist'
+            }), 409
+        
+        if Watch.query.filter_by(user_id=user.id).count() >= Config.WATCHLIST_MAX_PER_USER:
+            return jsonify({
+                'status': 'error',
+                'message': f'A watchlist holds at most {Config.WATCHLIST_MAX_PER_USER} accounts'
+            }), 400
+        
+        watch = Watch(user_id=user.id, platform=platform, username=username, interval_minutes=interval)
+        watch.next_run_at = next_slot(watch)
+        db.session.add(watch)
+        db.session.commit()
+        stick_to_primary(Config.REPLICA_READ_YOUR_WRITES_SECONDS)
+        
+        return jsonify({
+            'status': 'success',
+            'watch': watch.to_dict()
+        }), 201
+    
+    except Exception as e:
+        db.session.rollback()
+        logging.error(f"Error adding watch: {str(e)}")
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
+
+@watchlist_bp.route('/<int:watch_id>', methods=['PATCH'])
+def update_watch(watch_id):
+    """Change a watch's interval or pause/resume it"""
+    try:
+        watch, error_response = owned_watch(watch_id)
+        if error_response:
+            return error_response
+        
+        data = request.get_json() or {}
+        reschedule = False
+        
+        if 'interval_minutes' in data:
+            interval, error = parse_interval(data['interval_minutes'])
+            if error:
+                return jsonify({
+                    'status': 'error',
+                    'message': error
+                }), 400
+            reschedule = interval != watch.interval_minutes
+            watch.interval_minutes = interval
+        
+        if 'is_active' in data:
+            is_active = bool(data['is_active'])
+            reschedule = reschedule or (is_active and not watch.is_active)
+            watch.is_active = is_active
+            if is_active:
+                watch.failures = 0
+        
+        if reschedule:
+            watch.next_run_at = next_slot(watch)
+        db.session.commit()
+        stick_to_primary(Config.REPLICA_READ_YOUR_WRITES_SECONDS)
+        
+        return jsonify({
+            'status': 'success',
+            'watch': watch.to_dict()
+        }), 200
+    
+    except Exception as e:
+        db.session.rollback()
+        logging.error(f"Error updating watch: {str(e)}")
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
+
+@watchlist_bp.route('/<int:watch_id>', methods=['DELETE'])
+def delete_watch(watch_id):
+    """Stop watching an account (its past analyses are kept)"""
+    try:
+        watch, error_response = owned_watch(watch_id)
+        if error_response:
+            return error_response
+        
+        db.session.delete(watch)
+        db.session.commit()
+        stick_to_primary(Config.REPLICA_READ_YOUR_WRITES_SECONDS)
+        
+        return jsonify({
+            'status': 'success',
+            'message': 'Watch removed'
+        }), 200
+    
+    except Exception as e:
+        db.session.rollback()
+        logging.error(f"Error deleting watch: {str(e)}")
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
@@ -0,0 +1,103 @@
+"""
+Hooks for running the app under a pre-fork WSGI server (see gunicorn.conf.py).
+
+The master imports the app and calls `preload` once; workers are then forked
+and share the warmed, read-only state copy-on-write. Each worker calls
+`after_fork` so it never reuses sockets (DB pools, HTTP keep-alive) opened by
+the master.
+"""
+import gc
+from datetime import timedelta
+from backend.config import Config
+from backend.models import db
+from backend.services.stress_analyzer import StressAnalyzer, shared_predict_pipeline
+from backend.services.token_refresher import token_refresher
+from backend.services.upstream import reset_session
+from backend.services.watch_scheduler import watch_scheduler
+from src.logger import logging
+
+# Scored once in the master so lazy imports, regex caches and numpy are warm before fork
+WARM_UP_POSTS = [
+    {'text': "so anxious and overwhelmed, can't cope with this deadline", 'created_utc': 1.7e9},
+    {'text': 'feeling calm and grateful today', 'created_utc': 1.7e9 + 3600},
+]
+
+
+def preload(app):
+    """
+    Load and warm read-only state in the master before workers fork.
+
+    Args:
+        app: Flask application
+    """
+    shared_predict_pipeline()
+
+    analyzer = StressAnalyzer(
+        timeline_resolution=timedelta(hours=Config.STRESS_TIMELINE_RESOLUTION_HOURS),
+        timeline_window=timedelta(days=Config.STRESS_TIMELINE_WINDOW_DAYS)
+    )
+    results = [analyzer.analyze_tweet(post['text']) for post in WARM_UP_POSTS]
+    analyzer.compute_stress_timeline(
+        [post['created_utc'] for post in WARM_UP_POSTS],
+        [result['stress_score'] for result in results],
+        [result['has_stress_indicators'] for result in results]
+    )
+
+    from backend.routes.analysis import recommendation_index
+
+    with app.app_context():
+        try:
+            recommendation_index.refresh(db.session, force=True)
+        except Exception as e:
+            # Schema not created yet (init-db); each worker's refresher builds the index
+            logging.warning(f"Recommendation index not preloaded: {str(e)}")
+        finally:
+            db.session.remove()
+            # Workers must open their own connections
+            for engine in db.engines.values():
+                engine.dispose()
+
+    # Move everything allocated so far out of the collector's reach, so GC
+    # passes in workers don't write to (and un-share) these pages
+    gc.collect()
+    gc.freeze()
+    logging.info("App preloaded for forking workers")
+
+
+def after_fork(app):
+    """
+    Reset per-process connections in a freshly forked worker.
+
+    Args:
+        app: Flask application inherited from the master
+    """
+    with app.app_context():
+        for engine in db.engines.values():
+            # close=False: leave the parent's connections alone, just forget them
+            engine.dispose(close=False)
+    reset_session()
+
+
+def start_background_tasks(app):
+    """
+    Start per-process background threads (after fork: threads don't survive it).
+
+    Args:
+        app: Flask application
+    """
+    from backend.routes.analysis import recommendation_index
+
+    recommendation_index.start(app)
+    if Config.TOKEN_REFRESH_ENABLED:
+        token_refresher.start(app)
+    if Config.WATCHLIST_SCHEDULER_ENABLED:
+        watch_scheduler.start(app)
+
+
+def stop_background_tasks():
+    """Stop background threads so in-flight work finishes before the process exits"""
+    from backend.routes.analysis import recommendation_index
+
+    watch_scheduler.stop()
+    token_refresher.stop()
+    recommendation_index.stop()
@@ -0,0 +1,567 @@
+"""
+Offline bulk scoring of archive exports and NDJSON/CSV dumps (the `score-archive` command).
+
+Accepted inputs: NDJSON (one object per line, e.g. Pushshift dumps), a JSON array
+of objects, a Twitter archive's `data/tweets.js` (or `tweets-partN.js`, a JSON
+array behind `window.YTD.tweets.partN =`) and CSV/TSV, each optionally compressed.
+"""
+import bz2
+import csv
+import gzip
+import io
+import itertools
+import json
+import lzma
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import click
+from flask.cli import with_appcontext
+from backend.config import Config
+from backend.utils.post_record import PostRecord
+from src.logger import logging
+from src.exception import CustomException
+
+# Compression is picked by file suffix; .zst needs the optional `zstandard` package
+COMPRESSED_SUFFIXES = ('.gz', '.bz2', '.xz', '.zst')
+
+# Candidate fields, first non-empty wins (dotted paths reach into nested objects)
+AUTHOR_FIELDS = ('author', 'username', 'screen_name', 'user.screen_name', 'author_id', 'user.id_str')
+TEXT_FIELDS = ('text', 'full_text', 'body', 'selftext', 'title')
+ID_FIELDS = ('id_str', 'id', 'name')
+
+# Pushshift placeholders for deleted content/accounts
+REMOVED_MARKERS = frozenset(('[removed]', '[deleted]'))
+
+TWITTER_TIME_FORMAT = '%a %b %d %H:%M:%S %z %Y'
+
+# Characters read at a time when decoding a JSON array; one element may not exceed MAX_ELEMENT_CHARS
+READ_CHUNK_CHARS = 1 << 20
+MAX_ELEMENT_CHARS = 16 << 20
+
+# Owner of `--to-db` results. Brackets are not valid in Twitter, Reddit or manual-entry
+# usernames, so the account can never be signed into or matched to a real person.
+ARCHIVE_OWNER_USERNAME = '[archive]'
+
+SPILL_COLUMNS = ('author', 'id', 'created_utc', 'created_at', 'content_type',
+                 'stress_score', 'stressed', 'sentiment', 'indicators', 'text')
+
+
+def open_text(path: str):
+    """
+    Open a possibly compressed file as a text stream, decompressing on the fly.
+
+    Args:
+        path: File path, or '-' for (uncompressed) stdin
+
+    Returns:
+        Tuple of (raw binary file for progress via tell(), text stream)
+    """
+    if path == '-':
+        return None, io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8', errors='replace', newline='')
+
+    raw = open(path, 'rb')
+    lower = path.lower()
+    if lower.endswith('.gz'):
+        stream = gzip.GzipFile(fileobj=raw)
+    elif lower.endswith('.bz2'):
+        stream = bz2.BZ2File(raw)
+    elif lower.endswith('.xz'):
+        stream = lzma.LZMAFile(raw)
+    elif lower.endswith('.zst'):
+        try:
+            import zstandard
+        except ImportError:
+            raw.close()
+            raise click.ClickException('Reading .zst files needs the zstandard package (pip install zstandard)')
+        # Pushshift dumps are compressed with a long window
+        stream = zstandard.ZstdDecompressor(max_window_size=2 ** 31).stream_reader(raw)
+    else:
+        stream = raw
+    return raw, io.TextIOWrapper(stream, encoding='utf-8', errors='replace', newline='')
+
+
+def detect_format(path: str) -> str:
+    """'csv', 'twitter-archive' (.js) or 'json' from the file name, ignoring a compression suffix"""
+    lower = path.lower()
+    for suffix in COMPRESSED_SUFFIXES:
+        if lower.endswith(suffix):
+            lower = lower[:-len(suffix)]
+    if lower.endswith(('.csv', '.tsv')):
+        return 'csv'
+    return 'twitter-archive' if lower.endswith('.js') else 'json'
+
+
+def read_records(stream, fmt: str, path: str = '') -> Iterator[Optional[Dict]]:
+    """
+    Yield one dict per record; None for lines or elements that are not JSON objects.
+
+    JSON input is told apart by its first characters: '{' starts NDJSON, '[' a JSON
+    array and 'window.YTD' a Twitter archive data file. Anything else is rejected.
+    """
+    if fmt == 'csv':
+        csv.field_size_limit(2 ** 31 - 1)
+        delimiter = '\t' if '.tsv' in path.lower() else ','
+        yield from csv.DictReader(stream, delimiter=delimiter)
+        return
+
+    head = stream.read(READ_CHUNK_CHARS).lstrip('\ufeff')
+    while len(head.lstrip()) < len('window.YTD'):
+        more = stream.read(READ_CHUNK_CHARS)
+        if not more:
+            break
+        head += more
+    start = head.lstrip()
+    if start.startswith(('[', 'window.YTD')):
+        yield from read_json_array(stream, head, path)
+    elif not start or start.startswith('{'):
+        # Complete the line cut by the first read
+        yield from read_ndjson(itertools.chain(io.StringIO(head + stream.readline()), stream))
+    else:
+        raise click.ClickException(
+            f"{path}: not NDJSON, a JSON array or a Twitter archive tweets.js (starts with {start[:20]!r})"
+        )
+
+
+def read_ndjson(lines) -> Iterator[Optional[Dict]]:
+    for line in lines:
+        line = line.strip().rstrip(',')
+        if not line or line in ('[', ']'):
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            yield None
+            continue
+        yield record if isinstance(record, dict) else None
+
+
+def read_json_array(stream, buffer: str, path: str = '') -> Iterator[Optional[Dict]]:
+    """
+    Yield the elements of one top-level JSON array, reading the stream in chunks.
+
+    Elements may span any number of lines, and text before the opening bracket
+    (tweets.js's `window.YTD.tweets.part0 =`) is skipped.
+
+    Args:
+        stream: Text stream positioned after `buffer`
+        buffer: Text already read from the start of the stream
+        path: File name for error messages
+    """
+    decoder = json.JSONDecoder()
+    while '[' not in buffer:
+        chunk = stream.read(READ_CHUNK_CHARS)
+        if not chunk:
+            raise click.ClickException(f"{path}: no JSON array found")
+        buffer += chunk
+    buffer = buffer[buffer.index('[') + 1:]
+    pos = 0
+    eof = False
+    while True:
+        while pos < len(buffer) and buffer[pos] in ' \t\r\n,':
+            pos += 1
+        if pos < len(buffer) and buffer[pos] == ']':
+            return
+        try:
+            record, end = decoder.raw_decode(buffer, pos)
+        except ValueError:
+            # Most likely an element cut by the chunk boundary: read on, unless there is no more
+            chunk = '' if eof else stream.read(READ_CHUNK_CHARS)
+            eof = not chunk
+            if eof and pos >= len(buffer):
+                raise click.ClickException(f"{path}: JSON array is not closed (truncated file?)")
+            if eof or len(buffer) - pos > MAX_ELEMENT_CHARS:
+                raise click.ClickException(f"{path}: invalid JSON array element near {buffer[pos:pos + 60]!r}")
+            buffer, pos = buffer[pos:] + chunk, 0
+            continue
+        yield record if isinstance(record, dict) else None
+        pos = end
+
+
+def field(record: Dict, path: str):
+    """Value at a dotted path, or None"""
+    value = record
+    for key in path.split('.'):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return value
+
+
+def first_field(record: Dict, paths) -> Optional[str]:
+    for path in paths:
+        value = field(record, path)
+        if value not in (None, '') and str(value) not in REMOVED_MARKERS:
+            return str(value)
+    return None
+
+
+def parse_timestamp(record: Dict) -> Tuple[Optional[float], Optional[str]]:
+    """(created_utc, created_at) with Twitter's 'Wed Oct 10 20:19:24 +0000 2018' turned into an epoch"""
+    created_utc = record.get('created_utc')
+    if created_utc not in (None, ''):
+        try:
+            return float(created_utc), None
+        except (TypeError, ValueError):
+            pass
+
+    created_at = record.get('created_at')
+    if not created_at:
+        return None, None
+    try:
+        return datetime.strptime(str(created_at), TWITTER_TIME_FORMAT).timestamp(), None
+    except ValueError:
+        # ISO strings are parsed by the analyzer itself
+        return None, str(created_at)
+
+
+def normalize_record(record: Dict, author_fields, text_fields, fixed_author: Optional[str] = None) -> Optional[Tuple]:
+    """
+    Map a raw archive record to (author, post) in the analyzer's post format.
+
+    Args:
+        record: Decoded NDJSON object or CSV row
+        author_fields: Candidate author field paths
+        text_fields: Candidate text field paths
+        fixed_author: Author for every record (single-account archives)
+
+    Returns:
+        Tuple of (author, PostRecord), or None if the record has no usable author or text
+    """
+    # Twitter archive exports wrap each tweet as {"tweet": {...}}
+    if isinstance(record.get('tweet'), dict):
+        record = record['tweet']
+
+    author = fixed_author or first_field(record, author_fields)
+    text = first_field(record, text_fields)
+    if not author or not text:
+        return None
+
+    created_utc, created_at = parse_timestamp(record)
+    post = PostRecord(first_field(record, ID_FIELDS), text, created_utc,
+                      'comment' if record.get('body') else 'post', created_at=created_at)
+    return author, post
+
+
+_worker_analyzer = None
+
+
+def offline_analyzer(resolution_hours: float, window_days: float):
+    """StressAnalyzer with the configured timeline, not reporting to the live scoring metrics"""
+    from backend.services.stress_analyzer import StressAnalyzer
+
+    return StressAnalyzer(
+        timeline_resolution=timedelta(hours=resolution_hours),
+        timeline_window=timedelta(days=window_days),
+        record_metrics=False
+    )
+
+
+def _init_worker(resolution_hours: float, window_days: float):
+    global _worker_analyzer
+    _worker_analyzer = offline_analyzer(resolution_hours, window_days)
+
+
+def _score_texts(texts: List[str]) -> List[Tuple]:
+    """Compact per-post scores (score, stressed, sentiment, indicators) for a chunk of texts"""
+    results = []
+    for text in texts:
+        analysis = _worker_analyzer.analyze_tweet(text)
+        results.append((analysis['stress_score'], analysis['has_stress_indicators'],
+                        analysis['sentiment'], sorted(analysis['indicators_found'])))
+    return results
+
+
+class BulkScorer:
+    """
+    Streams records from archive files, scores them and aggregates per author.
+
+    Pass 1 reads and scores records in chunks (optionally across a process pool,
+    with a bounded number of chunks in flight) and spills compact per-post scores
+    to an on-disk SQLite file. Pass 2 walks that file grouped by author and builds
+    each author's analysis with StressAnalyzer.aggregate_analyses. Memory stays
+    bounded by the chunk size, the pool depth and the per-author cap.
+    """
+
+    def __init__(self, platform: str, workers: int = 1, chunk_size: int = 2000,
+                 max_posts_per_author: int = 10000, min_posts: int = 1,
+                 author_fields=AUTHOR_FIELDS, text_fields=TEXT_FIELDS, fixed_author: Optional[str] = None,
+                 spill_dir: Optional[str] = None, progress_seconds: float = 5.0, echo=None):
+        self.platform = platform
+        self.workers = max(1, workers)
+        self.chunk_size = chunk_size
+        self.max_posts_per_author = max_posts_per_author
+        self.min_posts = max(1, min_posts)
+        self.author_fields = author_fields
+        self.text_fields = text_fields
+        self.fixed_author = fixed_author
+        self.spill_dir = spill_dir
+        self.progress_seconds = progress_seconds
+        self.echo = echo or (lambda message: click.echo(message, err=True))
+        self.stats = {'rows_read': 0, 'rows_scored': 0, 'rows_skipped': 0, 'rows_invalid': 0,
+                      'authors': 0, 'authors_written': 0}
+        self._started = None
+        self._last_progress = 0.0
+        self._input_bytes = 0
+        self._input_done = 0
+
+    def run(self, paths: List[str], output=None, posts_output=None, store=None) -> Dict:
+        """
+        Score every record of the input files and emit per-author aggregates.
+
+        Args:
+            paths: Input files ('-' for stdin)
+            output: Text stream for per-author NDJSON, or None
+            posts_output: Text stream for per-post NDJSON, or None
+            store: Callable receiving (author, result) for each author, or None
+
+        Returns:
+            Dictionary of counters and throughput
+        """
+        self._started = self._last_progress = time.monotonic()
+        self._input_bytes = sum(os.path.getsize(path) for path in paths if path != '-')
+
+        spill_file = tempfile.NamedTemporaryFile(prefix='score-archive-', suffix='.db', dir=self.spill_dir, delete=False)
+        spill_file.close()
+        spill = sqlite3.connect(spill_file.name)
+        try:
+            spill.execute('PRAGMA journal_mode=OFF')
+            spill.execute('PRAGMA synchronous=OFF')
+            spill.execute(f"CREATE TABLE posts ({', '.join(SPILL_COLUMNS)})")
+
+            self._score_pass(paths, spill, posts_output)
+            scored_at = time.monotonic()
+            self.stats['score_seconds'] = round(scored_at - self._started, 1)
+            self.stats['score_rows_per_second'] = round(self.stats['rows_read'] / max(scored_at - self._started, 1e-9), 1)
+            self.echo('Indexing scored posts by author...')
+            spill.execute('CREATE INDEX ix_posts_author ON posts (author, created_utc)')
+            self._aggregate_pass(spill, output, store)
+            self.stats['aggregate_seconds'] = round(time.monotonic() - scored_at, 1)
+        finally:
+            spill.close()
+            os.unlink(spill_file.name)
+
+        elapsed = time.monotonic() - self._started
+        self.stats['elapsed_seconds'] = round(elapsed, 1)
+        self.stats['rows_per_second'] = round(self.stats['rows_read'] / elapsed, 1) if elapsed else 0.0
+        return self.stats
+
+    def _records(self, paths) -> Iterator[Tuple[str, Dict]]:
+        for path in paths:
+            raw, stream = open_text(path)
+            fmt = detect_format(path)
+            try:
+                for record in read_records(stream, fmt, path):
+                    self.stats['rows_read'] += 1
+                    if record is None:
+                        self.stats['rows_invalid'] += 1
+                    else:
+                        normalized = normalize_record(record, self.author_fields, self.text_fields, self.fixed_author)
+                        if normalized is None:
+                            self.stats['rows_skipped'] += 1
+                        else:
+                            yield normalized
+                    if self.stats['rows_read'] % 1000 == 0:
+                        self._progress(raw)
+            finally:
+                if raw is not None:
+                    self._input_done += os.path.getsize(path)
+                stream.close()
+
+    def _progress(self, raw, force=False):
+        now = time.monotonic()
+        if not force and now - self._last_progress < self.progress_seconds:
+            return
+        self._last_progress = now
+        elapsed = max(now - self._started, 1e-9)
+        position = ''
+        if raw is not None and self._input_bytes:
+            try:
+                done = self._input_done + raw.tell()
+                position = f' ({done / self._input_bytes:.1%} of input)'
+            except (OSError, ValueError):
+                pass
+        self.echo(f"read {self.stats['rows_read']:,} rows{position}, scored {self.stats['rows_scored']:,}, "
+                  f"skipped {self.stats['rows_skipped'] + self.stats['rows_invalid']:,}; "
+                  f"{self.stats['rows_read'] / elapsed:,.0f} rows/s")
+
+    def _score_pass(self, paths, spill, posts_output):
+        """Pass 1: stream, score in chunks and spill"""
+        timeline = (Config.STRESS_TIMELINE_RESOLUTION_HOURS, Config.STRESS_TIMELINE_WINDOW_DAYS)
+        pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                   initargs=timeline) if self.workers > 1 else None
+        if pool is None:
+            _init_worker(*timeline)
+        pending = deque()
+        try:
+            records = self._records(paths)
+            while True:
+                chunk = list(itertools.islice(records, self.chunk_size))
+                if not chunk:
+                    break
+                texts = [post['text'] for _, post in chunk]
+                pending.append((chunk, pool.submit(_score_texts, texts) if pool else _score_texts(texts)))
+                # Bounded look-ahead keeps memory flat when reading outpaces scoring
+                while len(pending) > (self.workers * 2 if pool else 0):
+                    self._spill(spill, posts_output, *pending.popleft())
+            while pending:
+                self._spill(spill, posts_output, *pending.popleft())
+        finally:
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+        spill.commit()
+        self._progress(None, force=True)
+
+    def _spill(self, spill, posts_output, chunk, scores):
+        if isinstance(scores, Future):
+            scores = scores.result()
+        rows = []
+        for (author, post), (score, stressed, sentiment, indicators) in zip(chunk, scores):
+            rows.append((author, post['id'], post['created_utc'], post['created_at'], post['content_type'],
+                         score, int(stressed), sentiment, json.dumps(indicators), post['text'][:200]))
+            if posts_output is not None:
+                posts_output.write(json.dumps({
+                    'author': author, 'id': post['id'], 'created_utc': post['created_utc'],
+                    'created_at': post['created_at'], 'stress_score': score,
+                    'has_stress_indicators': stressed, 'sentiment': sentiment, 'indicators_found': indicators,
+                }) + '\n')
+        spill.executemany(f"INSERT INTO posts VALUES ({', '.join('?' * len(SPILL_COLUMNS))})", rows)
+        self.stats['rows_scored'] += len(rows)
+
+    def _aggregate_pass(self, spill, output, store):
+        """Pass 2: one aggregate per author, newest posts first (as the APIs return them)"""
+        analyzer = offline_analyzer(Config.STRESS_TIMELINE_RESOLUTION_HOURS, Config.STRESS_TIMELINE_WINDOW_DAYS)
+        cursor = spill.execute(f"SELECT {', '.join(SPILL_COLUMNS)} FROM posts ORDER BY author, created_utc DESC")
+        last_progress = time.monotonic()
+        for author, rows in itertools.groupby(cursor, key=lambda row: row[0]):
+            self.stats['authors'] += 1
+            scored = []
+            for row in itertools.islice(rows, self.max_posts_per_author or None):
+                _, post_id, created_utc, created_at, content_type, score, stressed, sentiment, indicators, text = row
+                post = PostRecord(post_id, text, created_utc, content_type, created_at=created_at)
+                scored.append((post, {'stress_score': score, 'has_stress_indicators': bool(stressed),
+                                      'indicators_found': json.loads(indicators), 'sentiment': sentiment,
+                                      'tweet_text': text}))
+            posts_seen = len(scored) + sum(1 for _ in rows)
+            if posts_seen < self.min_posts:
+                continue
+
+            result = analyzer.aggregate_analyses(scored)
+            result['username_analyzed'] = author
+            if output is not None:
+                output.write(json.dumps({'author': author, 'platform': self.platform, 'posts_seen': posts_seen,
+                                         **result}) + '\n')
+            if store is not None:
+                store(author, result)
+            self.stats['authors_written'] += 1
+
+            if time.monotonic() - last_progress >= self.progress_seconds:
+                last_progress = time.monotonic()
+                self.echo(f"aggregated {self.stats['authors']:,} authors, wrote {self.stats['authors_written']:,}")
+
+
+class AnalysisStore:
+    """
+    Writes per-author results as Analysis rows (analysis_type 'archive'), committing in batches.
+
+    All rows belong to the ARCHIVE_OWNER_USERNAME account rather than to a user per
+    author, so signing in with an author's handle never shows archive results.
+    """
+
+    def __init__(self, platform: str, batch_size: int = 500):
+        self.platform = platform
+        self.batch_size = batch_size
+        self._pending = 0
+        self._owner_id = None
+
+    def owner_id(self) -> int:
+        """ID of the archive owner account, created on first use"""
+        from backend.models import db, User
+
+        if self._owner_id is None:
+            owner = User.query.filter_by(username=ARCHIVE_OWNER_USERNAME, twitter_id=None, reddit_id=None,
+                                         is_oauth_connected=False).first()
+            if not owner:
+                owner = User(username=ARCHIVE_OWNER_USERNAME, display_name='Archive imports', is_oauth_connected=False)
+                db.session.add(owner)
+                db.session.flush()
+            self._owner_id = owner.id
+        return self._owner_id
+
+    def __call__(self, author: str, result: Dict):
+        from backend.models import db, Analysis
+        from backend.services.stress_analyzer import StressAnalyzer
+
+        analysis = Analysis.from_result(self.owner_id(), self.platform, 'archive', author[:50], result,
+                                        scorer_version=StressAnalyzer.scorer_version())
+        db.session.add(analysis)
+        self._pending += 1
+        if self._pending >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        from backend.models import db
+
+        db.session.commit()
+        self._pending = 0
+
+
+@click.command('score-archive')
+@click.argument('paths', nargs=-1, required=True)
+@click.option('--platform', type=click.Choice(['twitter', 'reddit']), required=True)
+@click.option('--output', '-o', type=click.File('w'), help='Per-author aggregates as NDJSON (- for stdout)')
+@click.option('--posts-output', type=click.File('w'), help='Per-post scores as NDJSON')
+@click.option('--to-db', is_flag=True, help="Store per-author results as Analysis rows (analysis_type 'archive')")
+@click.option('--workers', type=int, default=1, show_default=True, help='Scoring processes')
+@click.option('--chunk-size', type=int, default=2000, show_default=True, help='Records per scoring chunk')
+@click.option('--max-posts-per-author', type=int, default=10000, show_default=True,
+              help='Newest posts aggregated per author (0 = all)')
+@click.option('--min-posts', type=int, default=1, show_default=True, help='Skip authors with fewer posts')
+@click.option('--author', 'fixed_author', help='Author for every record (single-account archives)')
+@click.option('--author-field', multiple=True, help='Author field path, tried in order (default: common names)')
+@click.option('--text-field', multiple=True, help='Text field path, tried in order (default: common names)')
+@click.option('--spill-dir', type=click.Path(file_okay=False), help='Directory for the temporary score file')
+@click.option('--progress-seconds', type=float, default=5.0, show_default=True)
+@with_appcontext
+def score_archive_command(paths, platform, output, posts_output, to_db, workers, chunk_size, max_posts_per_author,
+                          min_posts, fixed_author, author_field, text_field, spill_dir, progress_seconds):
+    """Score NDJSON, JSON array, Twitter tweets.js or CSV archives (optionally .gz/.bz2/.xz/.zst) per author"""
+    if output is None and not to_db:
+        raise click.UsageError('Nothing to write: pass --output and/or --to-db')
+    for path in paths:
+        if path.lower().endswith('.zip'):
+            raise click.UsageError(f'{path}: extract data/tweets.js (and any tweets-partN.js) from the archive '
+                                   'and pass those files')
+        if detect_format(path) == 'twitter-archive' and not fixed_author:
+            raise click.UsageError(f'{path}: Twitter archive tweets do not name their author; pass --author')
+
+    store = AnalysisStore(platform) if to_db else None
+    scorer = BulkScorer(
+        platform,
+        workers=workers,
+        chunk_size=chunk_size,
+        max_posts_per_author=max_posts_per_author,
+        min_posts=min_posts,
+        author_fields=author_field or AUTHOR_FIELDS,
+        text_fields=text_field or TEXT_FIELDS,
+        fixed_author=fixed_author,
+        spill_dir=spill_dir,
+        progress_seconds=progress_seconds,
+    )
+    try:
+        stats = scorer.run(list(paths), output=output, posts_output=posts_output, store=store)
+        if store is not None:
+            store.flush()
+    except (OSError, CustomException) as e:
+        logging.error(f"Bulk scoring failed: {str(e)}")
+        raise click.ClickException(str(e))
+
+    logging.info(f"Bulk scoring finished: {stats}")
+    click.echo(json.dumps(stats), err=True)
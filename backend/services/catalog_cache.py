@@ -0,0 +1,100 @@
+"""
+Process-level cache of pre-serialized resource catalog responses.
+"""
+import hashlib
+import threading
+import time
+from typing import Callable, Dict, Hashable
+from backend.database import on_model_commit
+from backend.metrics import observe_cache
+from src.logger import logging
+
+
+class CachedBody:
+    """Serialized response body with its strong ETag"""
+
+    __slots__ = ('body', 'etag', 'version', 'expires_at')
+
+    def __init__(self, body: bytes, version: int, expires_at: float):
+        self.body = body
+        self.etag = hashlib.sha1(body).hexdigest()
+        self.version = version
+        self.expires_at = expires_at
+
+
+class CatalogCache:
+    """
+    Cache of serialized catalog responses keyed by filter combination.
+
+    Entries carry the catalog version they were built at; any committed write to
+    a watched model bumps the version, so stale entries are never served. The TTL
+    bounds staleness for writes made by other processes.
+    """
+
+    def __init__(self, name: str, max_entries: int = 256, ttl_seconds: float = 300):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: Dict[Hashable, CachedBody] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, build: Callable[[], bytes]) -> CachedBody:
+        """
+        Return the cached body for key, building it on a miss.
+
+        Args:
+            key: Filter combination identifying the response
+            build: Callable producing the serialized body (runs the DB query)
+
+        Returns:
+            CachedBody with body bytes and ETag
+        """
+        entry = self._entries.get(key)
+        if entry is not None and entry.version == self.version and entry.expires_at > time.monotonic():
+            self.hits += 1
+            observe_cache(self.name, True)
+            return entry
+
+        self.misses += 1
+        observe_cache(self.name, False)
+        version = self.version
+        entry = CachedBody(build(), version, time.monotonic() + self.ttl_seconds)
+
+        with self._lock:
+            # Don't store a body built from data a concurrent write just invalidated
+            if version == self.version:
+                if key not in self._entries and len(self._entries) >= self.max_entries:
+                    self._entries.pop(next(iter(self._entries)))
+                self._entries[key] = entry
+        return entry
+
+    def invalidate(self):
+        """Bump the catalog version and drop all cached bodies"""
+        with self._lock:
+            self.version += 1
+            self._entries.clear()
+        logging.info(f"Catalog cache invalidated (version {self.version})")
+
+    def watch(self, session_class, model):
+        """
+        Invalidate after any committed transaction that wrote rows of model.
+
+        Args:
+            session_class: Session class to listen on
+            model: Mapped class whose writes change the catalog
+        """
+        on_model_commit(session_class, model, self.invalidate)
+
+    def stats(self) -> Dict:
+        """Return hit/miss counters and current size"""
+        total = self.hits + self.misses
+        return {
+            'version': self.version,
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': round(self.hits / total, 3) if total else 0.0,
+        }
@@ -0,0 +1,157 @@
+"""
+Per-platform, per-endpoint circuit breakers for upstream API calls.
+"""
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional
+from backend.config import Config
+from backend.metrics import CIRCUIT_STATE
+from src.logger import logging
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream endpoint whose breaker is open"""
+
+    def __init__(self, platform: str, endpoint: str, retry_after: float):
+        self.platform = platform
+        self.endpoint = endpoint
+        self.retry_after = retry_after
+        super().__init__(f"{platform} {endpoint} is unavailable (circuit open, retry in {retry_after:.0f}s)")
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures, or once the failure
+    rate over the last `window_seconds` reaches `error_rate` with at least
+    `min_calls` calls. While open, calls are refused; after `reset_seconds` up
+    to `half_open_probes` calls are let through, and their outcome closes or
+    re-opens the breaker. Thread-safe.
+    """
+
+    def __init__(self, platform: str, endpoint: str, failure_threshold: int = 5, error_rate: float = 0.5,
+                 min_calls: int = 10, window_seconds: float = 60, reset_seconds: float = 30,
+                 half_open_probes: int = 1):
+        self.platform = platform
+        self.endpoint = endpoint
+        self.failure_threshold = failure_threshold
+        self.error_rate = error_rate
+        self.min_calls = min_calls
+        self.window_seconds = window_seconds
+        self.reset_seconds = reset_seconds
+        self.half_open_probes = half_open_probes
+
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.probes_in_flight = 0
+        self._outcomes = deque()  # (monotonic time, ok)
+        self._lock = threading.Lock()
+
+    def _set_state(self, state: str):
+        if state != self.state:
+            logging.warning(f"Circuit {self.platform}/{self.endpoint}: {self.state} -> {state}")
+            self.state = state
+            CIRCUIT_STATE.labels(self.platform, self.endpoint).set(_STATE_VALUES[state])
+
+    def _trim(self, now: float):
+        while self._outcomes and now - self._outcomes[0][0] > self.window_seconds:
+            self._outcomes.popleft()
+
+    def retry_after(self) -> float:
+        return max(0.0, self.reset_seconds - (time.monotonic() - self.opened_at))
+
+    def allow(self) -> bool:
+        """Whether a call may go out now (reserves a probe slot when half-open)"""
+        with self._lock:
+            if self.state == OPEN:
+                if time.monotonic() - self.opened_at < self.reset_seconds:
+                    return False
+                self._set_state(HALF_OPEN)
+                self.probes_in_flight = 0
+            if self.state == HALF_OPEN:
+                if self.probes_in_flight >= self.half_open_probes:
+                    return False
+                self.probes_in_flight += 1
+            return True
+
+    def record(self, ok: bool):
+        """Record the outcome of a call that allow() let through"""
+        now = time.monotonic()
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self.probes_in_flight = max(0, self.probes_in_flight - 1)
+                if ok:
+                    self._outcomes.clear()
+                    self.consecutive_failures = 0
+                    self._set_state(CLOSED)
+                else:
+                    self.opened_at = now
+                    self._set_state(OPEN)
+                return
+
+            self._outcomes.append((now, ok))
+            self._trim(now)
+            self.consecutive_failures = 0 if ok else self.consecutive_failures + 1
+            if ok or self.state == OPEN:
+                return
+
+            failures = sum(1 for _, outcome in self._outcomes if not outcome)
+            calls = len(self._outcomes)
+            if self.consecutive_failures >= self.failure_threshold or \
+                    (calls >= self.min_calls and failures / calls >= self.error_rate):
+                self.opened_at = now
+                self._set_state(OPEN)
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            self._trim(time.monotonic())
+            calls = len(self._outcomes)
+            failures = sum(1 for _, outcome in self._outcomes if not outcome)
+            snapshot = {
+                'state': self.state,
+                'consecutive_failures': self.consecutive_failures,
+                'window_calls': calls,
+                'window_error_rate': round(failures / calls, 3) if calls else 0.0,
+            }
+        if snapshot['state'] == OPEN:
+            snapshot['retry_after_seconds'] = round(self.retry_after(), 1)
+        return snapshot
+
+
+_breakers: Dict[tuple, CircuitBreaker] = {}
+_registry_lock = threading.Lock()
+
+
+def get_breaker(platform: str, endpoint: str) -> Optional[CircuitBreaker]:
+    """The process-wide breaker for an upstream endpoint (None when disabled)"""
+    if not Config.CIRCUIT_BREAKER_ENABLED:
+        return None
+    key = (platform, endpoint)
+    breaker = _breakers.get(key)
+    if breaker is None:
+        with _registry_lock:
+            breaker = _breakers.get(key)
+            if breaker is None:
+                breaker = _breakers[key] = CircuitBreaker(
+                    platform, endpoint,
+                    failure_threshold=Config.CIRCUIT_FAILURE_THRESHOLD,
+                    error_rate=Config.CIRCUIT_ERROR_RATE,
+                    min_calls=Config.CIRCUIT_MIN_CALLS,
+                    window_seconds=Config.CIRCUIT_WINDOW_SECONDS,
+                    reset_seconds=Config.CIRCUIT_RESET_SECONDS,
+                    half_open_probes=Config.CIRCUIT_HALF_OPEN_PROBES,
+                )
+    return breaker
+
+
+def breaker_states() -> Dict[str, Dict]:
+    """Snapshot of every breaker that has seen traffic, keyed 'platform/endpoint'"""
+    return {f"{platform}/{endpoint}": breaker.snapshot()
+            for (platform, endpoint), breaker in sorted(_breakers.items())}
@@ -0,0 +1,203 @@
+"""
+Host-wide cache of upstream API pages, shared by all worker processes.
+
+Pages are stored in a small SQLite file (WAL mode, so readers never block each
+other or the writer) keyed by a digest of (platform, endpoint, URL, query
+parameters including the paging cursor, credential scope). Bodies are kept
+zlib-compressed; entries expire after a TTL and the least recently used ones
+are evicted once the file holds more than its size cap. The cache is strictly
+best-effort: a locked or unreadable file counts as a miss and never fails the
+request.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Dict, Optional
+from backend.config import Config
+from backend.metrics import CONTENT_CACHE_WORKER, observe_cache
+from src.logger import logging
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    key BLOB PRIMARY KEY,
+    body BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    expires_at REAL NOT NULL,
+    last_used REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS pages_last_used ON pages (last_used);
+CREATE TABLE IF NOT EXISTS usage (id INTEGER PRIMARY KEY CHECK (id = 0), bytes INTEGER NOT NULL);
+INSERT OR IGNORE INTO usage VALUES (0, 0);
+CREATE TRIGGER IF NOT EXISTS pages_insert AFTER INSERT ON pages
+    BEGIN UPDATE usage SET bytes = bytes + new.size; END;
+CREATE TRIGGER IF NOT EXISTS pages_update AFTER UPDATE OF size ON pages
+    BEGIN UPDATE usage SET bytes = bytes + new.size - old.size; END;
+CREATE TRIGGER IF NOT EXISTS pages_delete AFTER DELETE ON pages
+    BEGIN UPDATE usage SET bytes = bytes - old.size; END;
+"""
+
+# Credential scope of requests whose responses don't depend on who asked
+SHARED_SCOPE = 'shared'
+
+
+def user_scope(access_token: str) -> str:
+    """Cache scope for requests made with one user's OAuth token"""
+    return 'user:' + hashlib.sha1(access_token.encode('utf-8')).hexdigest()[:16]
+
+
+class ContentCache:
+    """
+    TTL + LRU cache of raw upstream response bodies in a SQLite file.
+
+    Each thread of each process opens its own connection. Hits refresh an
+    entry's LRU position at most every `touch_seconds`, so repeated hits on a
+    hot page don't turn every read into a write. Hit/miss counts and the bytes
+    not downloaded again are tracked per process.
+    """
+
+    def __init__(self, path: str, ttl_seconds: float = 120, max_bytes: int = 64 * 1024 * 1024,
+                 touch_seconds: float = 30, busy_timeout_ms: int = 50, enabled: bool = True):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.touch_seconds = touch_seconds
+        self.busy_timeout_ms = busy_timeout_ms
+        self.enabled = enabled and ttl_seconds > 0 and max_bytes > 0
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+        self.errors = 0
+        self._local = threading.local()
+
+    @staticmethod
+    def key(platform: str, endpoint: str, url: str, params: Optional[Dict], scope: str) -> bytes:
+        """Digest identifying one page: endpoint, URL, query parameters (cursor included) and scope"""
+        canonical = json.dumps(
+            [platform, endpoint, url, sorted((str(name), str(value)) for name, value in (params or {}).items()), scope],
+            separators=(',', ':')
+        )
+        return hashlib.blake2b(canonical.encode('utf-8'), digest_size=16).digest()
+
+    def _connection(self) -> Optional[sqlite3.Connection]:
+        """This thread's connection (reopened after a fork), or None if the file can't be used"""
+        local = self._local
+        if getattr(local, 'pid', None) == os.getpid():
+            return local.connection
+        local.pid = os.getpid()
+        local.connection = None
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=2.0, isolation_level=None, check_same_thread=False)
+            connection.execute('PRAGMA journal_mode=WAL')
+            # Losing the last writes on a crash only costs a refetch
+            connection.execute('PRAGMA synchronous=OFF')
+            connection.executescript(SCHEMA)
+            connection.execute(f'PRAGMA busy_timeout={int(self.busy_timeout_ms)}')
+            local.connection = connection
+        except (OSError, sqlite3.Error) as e:
+            self.errors += 1
+            logging.warning(f"Upstream content cache unavailable ({self.path}): {str(e)}")
+        return local.connection
+
+    def get(self, key: bytes, cache_name: str = 'upstream') -> Optional[bytes]:
+        """
+        Cached body for a page, or None on a miss.
+
+        Args:
+            key: ContentCache.key of the request
+            cache_name: Label for the hit/miss counter (e.g. 'upstream_reddit_posts')
+        """
+        connection = self._connection()
+        if connection is None:
+            return None
+        now = time.time()
+        try:
+            row = connection.execute('SELECT body, expires_at, last_used FROM pages WHERE key = ?', (key,)).fetchone()
+            if row is not None and row[1] > now and now - row[2] >= self.touch_seconds:
+                connection.execute('UPDATE pages SET last_used = ? WHERE key = ?', (now, key))
+        except sqlite3.Error:
+            # Locked by a writer: skip the cache rather than wait
+            self.errors += 1
+            row = None
+
+        if row is None or row[1] <= now:
+            self.misses += 1
+            observe_cache(cache_name, False)
+            self._report()
+            return None
+
+        body = zlib.decompress(row[0])
+        self.hits += 1
+        self.bytes_saved += len(body)
+        observe_cache(cache_name, True)
+        self._report()
+        return body
+
+    def put(self, key: bytes, body: bytes):
+        """Store a page's body, evicting expired and least recently used pages beyond the size cap"""
+        connection = self._connection()
+        if connection is None:
+            return
+        now = time.time()
+        blob = zlib.compress(body, 1)
+        try:
+            connection.execute('BEGIN IMMEDIATE')
+            connection.execute(
+                'INSERT INTO pages (key, body, size, expires_at, last_used) VALUES (?, ?, ?, ?, ?) '
+                'ON CONFLICT (key) DO UPDATE SET body = excluded.body, size = excluded.size, '
+                'expires_at = excluded.expires_at, last_used = excluded.last_used',
+                (key, blob, len(blob), now + self.ttl_seconds, now)
+            )
+            if connection.execute('SELECT bytes FROM usage').fetchone()[0] > self.max_bytes:
+                self._evict(connection, now)
+            connection.execute('COMMIT')
+        except sqlite3.Error:
+            self.errors += 1
+            if connection.in_transaction:
+                connection.execute('ROLLBACK')
+
+    def _evict(self, connection: sqlite3.Connection, now: float):
+        """Drop expired pages, then least recently used ones until 10% under the cap"""
+        connection.execute('DELETE FROM pages WHERE expires_at <= ?', (now,))
+        target = int(self.max_bytes * 0.9)
+        used = connection.execute('SELECT bytes FROM usage').fetchone()[0]
+        while used > target:
+            victims = []
+            for key, size in connection.execute('SELECT key, size FROM pages ORDER BY last_used LIMIT 256'):
+                victims.append((key,))
+                used -= size
+                if used <= target:
+                    break
+            if not victims:
+                break
+            connection.executemany('DELETE FROM pages WHERE key = ?', victims)
+
+    def _report(self):
+        CONTENT_CACHE_WORKER.labels('hits').set(self.hits)
+        CONTENT_CACHE_WORKER.labels('misses').set(self.misses)
+        CONTENT_CACHE_WORKER.labels('bytes_saved').set(self.bytes_saved)
+
+    def stats(self) -> Dict:
+        """This process's hit rate and bytes saved"""
+        lookups = self.hits + self.misses
+        return {
+            'enabled': self.enabled,
+            'pid': os.getpid(),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+            'bytes_saved': self.bytes_saved,
+            'errors': self.errors,
+        }
+
+
+content_cache = ContentCache(
+    Config.CONTENT_CACHE_PATH,
+    ttl_seconds=Config.CONTENT_CACHE_TTL_SECONDS,
+    max_bytes=Config.CONTENT_CACHE_MAX_MB * 1024 * 1024,
+    enabled=Config.CONTENT_CACHE_ENABLED
+)
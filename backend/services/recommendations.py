@@ -0,0 +1,206 @@
+"""
+In-memory index mapping stress categories and indicator keywords to ranked resources.
+"""
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+from backend.database import on_model_commit
+from backend.models import db, Resource
+from src.logger import logging
+
+
+class RecommendationIndex:
+    """
+    Precomputed, ranked resource lists per stress category and indicator keyword.
+
+    Resources are matched on their lower-cased tags, category and resource type.
+    Lookups never touch the database and only read the current snapshot. A
+    background thread (`start`) rebuilds it right after committed Resource
+    writes in this process and once the TTL expires; a request never waits
+    for a rebuild.
+    """
+
+    # Topics (tags / categories / resource types) that help at each stress level,
+    # most relevant first
+    CATEGORY_TOPICS = {
+        'very_high': ['support', 'professional', 'breathing', 'meditation'],
+        'high': ['breathing', 'meditation', 'practice', 'support'],
+        'moderate': ['mindfulness', 'practice', 'writing', 'reflection'],
+        'low': ['growth', 'research', 'lifestyle', 'education'],
+    }
+
+    INDICATOR_TOPICS = {
+        'anxious': ['breathing', 'meditation', 'mindfulness'],
+        'panic': ['breathing', 'support', 'techniques'],
+        'worried': ['mindfulness', 'writing', 'reflection'],
+        'overwhelmed': ['mindfulness', 'practice', 'breathing'],
+        'overwhelming': ['mindfulness', 'practice'],
+        'stressed': ['breathing', 'practice', 'techniques'],
+        'exhausted': ['health', 'lifestyle', 'audio'],
+        'tired': ['health', 'lifestyle', 'audio'],
+        'burnout': ['health', 'growth', 'support'],
+        'depressed': ['support', 'professional'],
+        'hopeless': ['support', 'professional'],
+        'helpless': ['support', 'professional', 'growth'],
+        'mental breakdown': ['support', 'professional'],
+        "can't cope": ['support', 'professional', 'breathing'],
+        'breaking point': ['support', 'breathing'],
+        'angry': ['breathing', 'writing', 'meditation'],
+        'frustrated': ['writing', 'reflection', 'breathing'],
+        'trapped': ['growth', 'psychology', 'writing'],
+        'stuck': ['growth', 'psychology', 'writing'],
+        'drowning': ['support', 'breathing'],
+        'suffocating': ['breathing', 'support'],
+        'deadline': ['practice', 'techniques', 'mindfulness'],
+        'pressure': ['practice', 'techniques', 'mindfulness'],
+        'busy': ['mindfulness', 'lifestyle'],
+        'struggling': ['support', 'growth'],
+        'negative_pattern': ['writing', 'reflection', 'psychology'],
+    }
+
+    # Max ranked resource IDs kept per key
+    MAX_PER_KEY = 20
+
+    def __init__(self, top_n: int = 5, ttl_seconds: float = 300):
+        self.top_n = top_n
+        self.ttl_seconds = ttl_seconds
+        self.stale = True
+        self._built_at = 0.0
+        self._lock = threading.Lock()
+        # (by_category, by_indicator, resources) swapped in as one tuple
+        self._index = ({}, {}, {})
+        # Set by mark_stale and stop to wake the refresh thread early
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @staticmethod
+    def resource_topics(resource: Dict) -> set:
+        topics = {tag.lower() for tag in resource.get('tags') or [] if isinstance(tag, str)}
+        for field in ('category', 'resource_type'):
+            if resource.get(field):
+                topics.add(resource[field].lower())
+        return topics
+
+    def _rank(self, topics: List[str], resources: Dict[int, Dict],
+              resource_topics: Dict[int, set]) -> List[tuple]:
+        """Score resources against an ordered topic list; earlier topics weigh more"""
+        weights = {topic: len(topics) - i for i, topic in enumerate(topics)}
+        scored = []
+        for resource_id, resource in resources.items():
+            score = sum(weights.get(topic, 0) for topic in resource_topics[resource_id])
+            if score:
+                # Featured resources win ties
+                scored.append((score + (0.5 if resource.get('is_featured') else 0), resource_id))
+        scored.sort(key=lambda item: (-item[0], item[1]))
+        return scored[:self.MAX_PER_KEY]
+
+    def build(self, resources: Iterable[Resource]):
+        """
+        Rebuild the index from resource rows.
+
+        Args:
+            resources: Active Resource objects
+        """
+        serialized = {resource.id: resource.to_dict() for resource in resources}
+        topics = {resource_id: self.resource_topics(data) for resource_id, data in serialized.items()}
+
+        by_category = {
+            category: self._rank(category_topics, serialized, topics)
+            for category, category_topics in self.CATEGORY_TOPICS.items()
+        }
+        by_indicator = {
+            indicator: self._rank(indicator_topics, serialized, topics)
+            for indicator, indicator_topics in self.INDICATOR_TOPICS.items()
+        }
+
+        self._index = (by_category, by_indicator, serialized)
+        self._built_at = time.monotonic()
+        logging.info(f"Recommendation index built over {len(serialized)} resources")
+
+    def needs_refresh(self) -> bool:
+        return self.stale or time.monotonic() - self._built_at >= self.ttl_seconds
+
+    def refresh(self, session, force: bool = False):
+        """Rebuild from the database if resources changed or the TTL expired"""
+        if not force and not self.needs_refresh():
+            return
+        with self._lock:
+            if force or self.needs_refresh():
+                # Cleared before reading, so a write committed during the build marks it stale again
+                self.stale = False
+                try:
+                    self.build(session.query(Resource).filter_by(is_active=True).all())
+                except Exception:
+                    self.stale = True
+                    raise
+
+    def recommend(self, stress_category: str, indicators: Optional[Iterable[str]] = None,
+                  limit: Optional[int] = None) -> List[Dict]:
+        """
+        Return the top resources for an analysis outcome from the in-memory index.
+
+        Args:
+            stress_category: 'low', 'moderate', 'high' or 'very_high'
+            indicators: Indicator keywords found, most frequent first
+            limit: Number of recommendations (defaults to top_n)
+
+        Returns:
+            List of serialized resources with a 'matched' list of reasons
+        """
+        by_category, by_indicator, resources = self._index
+        limit = limit or self.top_n
+
+        scores: Dict[int, float] = {}
+        reasons: Dict[int, List[str]] = {}
+        for score, resource_id in by_category.get(stress_category, []):
+            scores[resource_id] = scores.get(resource_id, 0) + score
+            reasons.setdefault(resource_id, []).append(stress_category)
+        for indicator in indicators or []:
+            for score, resource_id in by_indicator.get(indicator, []):
+                scores[resource_id] = scores.get(resource_id, 0) + score
+                reasons.setdefault(resource_id, []).append(indicator)
+
+        ranked = sorted(scores, key=lambda resource_id: (-scores[resource_id], resource_id))[:limit]
+        return [dict(resources[resource_id], matched=reasons[resource_id]) for resource_id in ranked]
+
+    def mark_stale(self):
+        """Force a rebuild on the next refresh and wake the refresh thread"""
+        self.stale = True
+        self._wake.set()
+
+    def watch(self, session_class):
+        """Mark the index stale after any committed transaction that wrote Resource rows"""
+        on_model_commit(session_class, Resource, self.mark_stale)
+
+    def start(self, app):
+        """Start the background rebuild thread (no-op if already running)"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+
+        def run():
+            while not self._stop.is_set():
+                self._wake.clear()
+                if self.needs_refresh():
+                    with app.app_context():
+                        try:
+                            self.refresh(db.session)
+                        except Exception as e:
+                            logging.error(f"Recommendation index rebuild failed: {str(e)}")
+                        finally:
+                            db.session.remove()
+                # After a failed rebuild, retry at most once a second
+                self._wake.wait(max(self.ttl_seconds - (time.monotonic() - self._built_at), 1.0))
+
+        self._thread = threading.Thread(target=run, name='recommendation-index', daemon=True)
+        self._thread.start()
+        logging.info(f"Recommendation index refresher started (TTL {self.ttl_seconds:.0f}s)")
+
+    def stop(self, timeout: float = 5.0):
+        """Stop the background thread, letting an in-flight rebuild finish"""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
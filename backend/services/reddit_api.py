@@ -1,9 +1,15 @@
 """
 Reddit API service for fetching posts and comments.
 """
-import requests
-from datetime import datetime, timedelta
 from typing import List, Dict, Optional
+import requests
+from backend.config import Config
+from backend.services.circuit_breaker import CircuitOpenError
+from backend.services.content_cache import SHARED_SCOPE, user_scope
+from backend.services.upstream import UpstreamNotFoundError, upstream_request
+from backend.utils.deadline import UNBOUNDED
+from backend.utils.post_record import PostRecord
+from backend.utils.timing import NULL_RECORDER
 from src.logger import logging
 from src.exception import CustomException
 import sys
@@ -14,18 +20,69 @@ class RedditAPIService:
     def __init__(self, access_token: Optional[str] = None, user_agent: str = 'DetectTheStress/1.0'):
         self.access_token = access_token
         self.user_agent = user_agent
-        self.base_url = 'https://oauth.reddit.com' if access_token else 'https://www.reddit.com'
+        self.base_url = Config.REDDIT_OAUTH_API_BASE_URL if access_token else Config.REDDIT_API_BASE_URL
         self.headers = {
             'User-Agent': user_agent
         }
+        self.pages_fetched = 0
+        self.recorder = NULL_RECORDER
+        # Budget for this service's calls; paging stops (truncated) when it runs out
+        self.deadline = UNBOUNDED
+        self.truncated = False
+        self.items_fetched = 0
+        self.items_expected = 0
+        # Set when paging stopped because an endpoint's circuit breaker was open
+        self.circuit_error = None
+        # Pages fetched anonymously or with the app-only token are shared through the content cache
+        self.cache_scope = SHARED_SCOPE
+        # Called with a rejected app-only token to get a renewed one (see set_access_token)
+        self.renew_token = None
         if access_token:
             self.headers['Authorization'] = f'Bearer {access_token}'
     
-    def set_access_token(self, access_token: str):
-        """Set OAuth access token for authenticated requests"""
+    def set_access_token(self, access_token: str, app_only: bool = False, renew=None):
+        """
+        Set OAuth access token for authenticated requests.
+        
+        Args:
+            access_token: User or application-only access token
+            app_only: The token is the shared application-only one (pages may be
+                shared across users); a user's token caches its pages for itself
+            renew: For an app-only token, callable taking the rejected token and
+                returning a new one (RedditOAuthService.renew_app_access_token);
+                a call answered 401 is then retried once with the new token
+        """
         self.access_token = access_token
-        self.base_url = 'https://oauth.reddit.com'
+        self.base_url = Config.REDDIT_OAUTH_API_BASE_URL
         self.headers['Authorization'] = f'Bearer {access_token}'
+        self.cache_scope = SHARED_SCOPE if app_only else user_scope(access_token)
+        self.renew_token = renew if app_only else None
+    
+    def _get(self, endpoint: str, url: str, params: Optional[Dict] = None):
+        """GET through upstream_request, renewing a revoked app-only token once on 401"""
+        response = upstream_request('reddit', endpoint, 'GET', url, headers=self.headers, params=params,
+                                    timeout=self.deadline.timeout(), cache_scope=self.cache_scope)
+        if response.status_code == 401 and self.renew_token is not None:
+            token = self.renew_token(self.access_token)
+            if token and token != self.access_token:
+                logging.warning("Reddit rejected the application-only token; retrying with a renewed one")
+                self.set_access_token(token, app_only=True, renew=self.renew_token)
+                response = upstream_request('reddit', endpoint, 'GET', url, headers=self.headers, params=params,
+                                            timeout=self.deadline.timeout(), cache_scope=self.cache_scope)
+        return response
+    
+    def _record_coverage(self, fetched: int, limit: int, truncated: bool):
+        """Track how much of the requested content was fetched before the deadline"""
+        self.items_fetched += fetched
+        self.items_expected += max(limit, fetched) if truncated else fetched
+        self.truncated = self.truncated or truncated
+    
+    @property
+    def coverage(self) -> float:
+        """Fraction of the requested content fetched (1.0 unless paging was cut short)"""
+        if not self.items_expected:
+            return 0.0 if self.truncated else 1.0
+        return round(self.items_fetched / self.items_expected, 3)
     
     def get_user_by_username(self, username: str) -> Dict:
         """
@@ -43,10 +100,10 @@ class RedditAPIService:
             
             url = f"{self.base_url}/user/{username}/about.json"
             
-            response = requests.get(url, headers=self.headers)
+            response = self._get('user_about', url)
             
             if response.status_code == 404:
-                raise CustomException(f"User u/{username} not found", sys)
+                raise UpstreamNotFoundError(f"User u/{username} not found", sys)
             elif response.status_code != 200:
                 logging.error(f"Failed to get Reddit user: {response.text}")
                 raise CustomException(f"Failed to get user: {response.text}", sys)
@@ -64,14 +121,15 @@ class RedditAPIService:
                 'subreddit': user_data.get('subreddit', {})
             }
             
-        except CustomException:
+        except (CustomException, CircuitOpenError, requests.Timeout):
+            # Timeouts stay distinguishable from "not found" (the analysis budget may have run out)
             raise
         except Exception as e:
             logging.error(f"Error getting Reddit user by username: {str(e)}")
             raise CustomException(f"Failed to get user: {str(e)}", sys)
     
     def get_user_posts(self, username: str, limit: int = 100, 
-                      sort: str = 'new', time_filter: str = 'all') -> List[Dict]:
+                      sort: str = 'new', time_filter: str = 'all', since_utc: Optional[float] = None) -> List[PostRecord]:
         """
         Get recent posts from a user.
         
@@ -80,9 +138,10 @@ class RedditAPIService:
             limit: Maximum number of posts to fetch (max 100)
             sort: Sort order ('hot', 'new', 'top', 'controversial')
             time_filter: Time filter for 'top' and 'controversial' ('hour', 'day', 'week', 'month', 'year', 'all')
+            since_utc: With sort='new', stop at the first post not newer than this epoch (incremental fetch)
             
         Returns:
-            List of post dictionaries
+            List of PostRecord (text is the selftext, or the title for link posts)
         """
         try:
             # Remove u/ if present
@@ -99,12 +158,29 @@ class RedditAPIService:
             
             all_posts = []
             after = None
+            truncated = False
+            caught_up = False
             
             while len(all_posts) < limit:
+                if self.deadline.expired:
+                    truncated = True
+                    break
                 if after:
                     params['after'] = after
                 
-                response = requests.get(url, headers=self.headers, params=params)
+                try:
+                    with self.recorder.span('fetch_page.posts'):
+                        response = self._get('posts', url, params)
+                except requests.Timeout:
+                    logging.warning(f"Reddit posts page timed out after {len(all_posts)} posts")
+                    truncated = True
+                    break
+                except CircuitOpenError as e:
+                    logging.warning(str(e))
+                    self.circuit_error = e
+                    truncated = True
+                    break
+                self.pages_fetched += 1
                 
                 if response.status_code != 200:
                     logging.error(f"Failed to get Reddit posts: {response.text}")
@@ -119,27 +195,17 @@ class RedditAPIService:
                 # Extract post data
                 for post_wrapper in posts:
                     post_data = post_wrapper.get('data', {})
-                    all_posts.append({
-                        'id': post_data.get('id'),
-                        'title': post_data.get('title', ''),
-                        'selftext': post_data.get('selftext', ''),
-                        'text': post_data.get('selftext', ''),  # Alias for consistency
-                        'created_utc': post_data.get('created_utc'),
-                        'created_at': datetime.fromtimestamp(post_data.get('created_utc', 0)).isoformat() if post_data.get('created_utc') else None,
-                        'subreddit': post_data.get('subreddit', ''),
-                        'score': post_data.get('score', 0),
-                        'num_comments': post_data.get('num_comments', 0),
-                        'url': post_data.get('url', ''),
-                        'permalink': f"https://reddit.com{post_data.get('permalink', '')}",
-                        'is_self': post_data.get('is_self', False),
-                        'link_flair_text': post_data.get('link_flair_text'),
-                    })
+                    if since_utc is not None and (post_data.get('created_utc') or 0) <= since_utc:
+                        caught_up = True
+                        break
+                    all_posts.append(PostRecord.from_reddit_post(post_data))
                 
-                # Check for pagination
+                # Check for pagination (listings are newest first, so nothing newer follows)
                 after = data.get('data', {}).get('after')
-                if not after or len(all_posts) >= limit:
+                if caught_up or not after or len(all_posts) >= limit:
                     break
             
+            self._record_coverage(min(len(all_posts), limit), limit, truncated)
             logging.info(f"Retrieved {len(all_posts)} Reddit posts for user {username}")
             return all_posts[:limit]
             
@@ -148,7 +214,7 @@ class RedditAPIService:
             raise CustomException(f"Failed to get posts: {str(e)}", sys)
     
     def get_user_comments(self, username: str, limit: int = 100,
-                         sort: str = 'new') -> List[Dict]:
+                         sort: str = 'new', since_utc: Optional[float] = None) -> List[PostRecord]:
         """
         Get recent comments from a user.
         
@@ -156,9 +222,10 @@ class RedditAPIService:
             username: Reddit username (without u/)
             limit: Maximum number of comments to fetch (max 100)
             sort: Sort order ('top', 'new', 'controversial', 'old')
+            since_utc: With sort='new', stop at the first comment not newer than this epoch (incremental fetch)
             
         Returns:
-            List of comment dictionaries
+            List of PostRecord
         """
         try:
             # Remove u/ if present
@@ -172,12 +239,29 @@ class RedditAPIService:
             
             all_comments = []
             after = None
+            truncated = False
+            caught_up = False
             
             while len(all_comments) < limit:
+                if self.deadline.expired:
+                    truncated = True
+                    break
                 if after:
                     params['after'] = after
                 
-                response = requests.get(url, headers=self.headers, params=params)
+                try:
+                    with self.recorder.span('fetch_page.comments'):
+                        response = self._get('comments', url, params)
+                except requests.Timeout:
+                    logging.warning(f"Reddit comments page timed out after {len(all_comments)} comments")
+                    truncated = True
+                    break
+                except CircuitOpenError as e:
+                    logging.warning(str(e))
+                    self.circuit_error = e
+                    truncated = True
+                    break
+                self.pages_fetched += 1
                 
                 if response.status_code != 200:
                     logging.error(f"Failed to get Reddit comments: {response.text}")
@@ -192,22 +276,17 @@ class RedditAPIService:
                 # Extract comment data
                 for comment_wrapper in comments:
                     comment_data = comment_wrapper.get('data', {})
-                    all_comments.append({
-                        'id': comment_data.get('id'),
-                        'text': comment_data.get('body', ''),
-                        'created_utc': comment_data.get('created_utc'),
-                        'created_at': datetime.fromtimestamp(comment_data.get('created_utc', 0)).isoformat() if comment_data.get('created_utc') else None,
-                        'subreddit': comment_data.get('subreddit', ''),
-                        'score': comment_data.get('score', 0),
-                        'post_id': comment_data.get('link_id', '').replace('t3_', ''),
-                        'permalink': f"https://reddit.com{comment_data.get('permalink', '')}",
-                    })
+                    if since_utc is not None and (comment_data.get('created_utc') or 0) <= since_utc:
+                        caught_up = True
+                        break
+                    all_comments.append(PostRecord.from_reddit_comment(comment_data))
                 
                 # Check for pagination
                 after = data.get('data', {}).get('after')
-                if not after or len(all_comments) >= limit:
+                if caught_up or not after or len(all_comments) >= limit:
                     break
             
+            self._record_coverage(min(len(all_comments), limit), limit, truncated)
             logging.info(f"Retrieved {len(all_comments)} Reddit comments for user {username}")
             return all_comments[:limit]
             
@@ -216,7 +295,8 @@ class RedditAPIService:
             raise CustomException(f"Failed to get comments: {str(e)}", sys)
     
     def get_user_content(self, username: str, include_comments: bool = True,
-                        max_posts: int = 50, max_comments: int = 50) -> List[Dict]:
+                        max_posts: int = 50, max_comments: int = 50,
+                        since_utc: Optional[float] = None) -> List[PostRecord]:
         """
         Get both posts and comments from a user.
         
@@ -225,28 +305,23 @@ class RedditAPIService:
             include_comments: Whether to include comments
             max_posts: Maximum posts to fetch
             max_comments: Maximum comments to fetch
+            since_utc: Only fetch content newer than this epoch (incremental fetch)
             
         Returns:
-            Combined list of posts and comments
+            Combined list of posts and comments (PostRecord), newest first
         """
         try:
             all_content = []
             
             # Get posts
-            posts = self.get_user_posts(username, limit=max_posts)
-            for post in posts:
-                post['content_type'] = 'post'
-                all_content.append(post)
+            all_content.extend(self.get_user_posts(username, limit=max_posts, since_utc=since_utc))
             
             # Get comments if requested
             if include_comments:
-                comments = self.get_user_comments(username, limit=max_comments)
-                for comment in comments:
-                    comment['content_type'] = 'comment'
-                    all_content.append(comment)
+                all_content.extend(self.get_user_comments(username, limit=max_comments, since_utc=since_utc))
             
             # Sort by creation time (newest first)
-            all_content.sort(key=lambda x: x.get('created_utc', 0), reverse=True)
+            all_content.sort(key=lambda x: x.created_utc or 0, reverse=True)
             
             logging.info(f"Retrieved {len(all_content)} total Reddit content items for user {username}")
             return all_content
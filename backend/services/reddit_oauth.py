@@ -4,23 +4,83 @@ Reddit OAuth 2.0 service for authentication.
 import os
 import base64
 import secrets
-import requests
+import threading
+import time
 from urllib.parse import urlencode
 from flask import session
+from backend.config import Config
+from backend.services.upstream import upstream_request
 from src.logger import logging
 from src.exception import CustomException
 import sys
 
+class AppTokenCache:
+    """
+    Process-wide application-only access token. One thread renews it ahead of
+    expiry while the others keep using the current token; threads only wait
+    when there is no valid token at all.
+    """
+    
+    def __init__(self):
+        self.access_token = None
+        self.expires_at = 0.0
+        self._lock = threading.Lock()
+    
+    def valid_for(self) -> float:
+        return self.expires_at - time.monotonic() if self.access_token else 0.0
+    
+    def get(self, fetch, margin: float):
+        """
+        Return a cached token, renewing it with fetch() -> (token, expires_in)
+        once it is within `margin` seconds of expiry.
+        """
+        if self.valid_for() > margin:
+            return self.access_token
+        if not self._lock.acquire(blocking=self.valid_for() <= 0):
+            # Someone else is renewing and the current token still works
+            return self.access_token
+        try:
+            if self.valid_for() > margin:
+                return self.access_token
+            requested_at = time.monotonic()
+            try:
+                token, expires_in = fetch()
+            except Exception as e:
+                logging.error(f"Error getting Reddit application token: {str(e)}")
+                token, expires_in = None, 0
+            if token:
+                self.access_token = token
+                self.expires_at = requested_at + expires_in
+            # On failure keep serving the old token until it actually expires
+            return self.access_token if self.valid_for() > 0 else None
+        finally:
+            self._lock.release()
+    
+    def invalidate(self, token=None):
+        """
+        Drop the cached token, e.g. after Reddit answered 401 for it. With
+        `token`, only if that is still the cached one, so a token another
+        thread already renewed is kept.
+        """
+        with self._lock:
+            if token is None or token == self.access_token:
+                self.access_token = None
+                self.expires_at = 0.0
+
+
 class RedditOAuthService:
     """Service for handling Reddit OAuth 2.0 flow"""
     
+    # Shared by every request in the process
+    app_token_cache = AppTokenCache()
+    
     def __init__(self, client_id, client_secret, redirect_uri):
         self.client_id = client_id
         self.client_secret = client_secret
         self.redirect_uri = redirect_uri
         self.auth_base_url = 'https://www.reddit.com/api/v1/authorize'
-        self.token_url = 'https://www.reddit.com/api/v1/access_token'
-        self.user_info_url = 'https://oauth.reddit.com/api/v1/me'
+        self.token_url = f'{Config.REDDIT_API_BASE_URL}/api/v1/access_token'
+        self.user_info_url = f'{Config.REDDIT_OAUTH_API_BASE_URL}/api/v1/me'
         
     def get_authorization_url(self):
         """
@@ -81,7 +141,7 @@ class RedditOAuthService:
                 'redirect_uri': self.redirect_uri
             }
             
-            response = requests.post(self.token_url, headers=headers, data=data)
+            response = upstream_request('reddit', 'token', 'POST', self.token_url, headers=headers, data=data)
             
             if response.status_code != 200:
                 logging.error(f"Token exchange failed: {response.text}")
@@ -121,7 +181,7 @@ class RedditOAuthService:
                 'User-Agent': 'DetectTheStress/1.0 by YourUsername'
             }
             
-            response = requests.get(self.user_info_url, headers=headers)
+            response = upstream_request('reddit', 'me', 'GET', self.user_info_url, headers=headers)
             
             if response.status_code != 200:
                 logging.error(f"Failed to get Reddit user info: {response.text}")
@@ -167,7 +227,7 @@ class RedditOAuthService:
                 'refresh_token': refresh_token
             }
             
-            response = requests.post(self.token_url, headers=headers, data=data)
+            response = upstream_request('reddit', 'token_refresh', 'POST', self.token_url, headers=headers, data=data)
             
             if response.status_code != 200:
                 logging.error(f"Reddit token refresh failed: {response.text}")
@@ -185,3 +245,51 @@ class RedditOAuthService:
         except Exception as e:
             logging.error(f"Error refreshing Reddit token: {str(e)}")
             raise CustomException(f"Failed to refresh token: {str(e)}", sys)
+    
+    def get_app_access_token(self):
+        """
+        Application-only (client credentials) access token for reading public
+        content through oauth.reddit.com, cached for the process and renewed
+        REDDIT_APP_TOKEN_REFRESH_MARGIN_SECONDS before it expires.
+        
+        Returns:
+            Access token, or None when no client credentials are configured
+            or Reddit could not issue one
+        """
+        if not self.client_id or not self.client_secret:
+            return None
+        return self.app_token_cache.get(self._fetch_app_token, Config.REDDIT_APP_TOKEN_REFRESH_MARGIN_SECONDS)
+    
+    def renew_app_access_token(self, rejected_token):
+        """
+        Replacement for an application-only token Reddit rejected (revoked or
+        rotated before its TTL ran out).
+        
+        Args:
+            rejected_token: The token that got a 401
+            
+        Returns:
+            A new access token, or None if none could be obtained
+        """
+        self.app_token_cache.invalidate(rejected_token)
+        return self.get_app_access_token()
+    
+    def _fetch_app_token(self):
+        """Request a client-credentials token; returns (access_token, expires_in)"""
+        credentials = f"{self.client_id}:{self.client_secret}"
+        encoded_credentials = base64.b64encode(credentials.encode()).decode()
+        
+        headers = {
+            'Authorization': f'Basic {encoded_credentials}',
+            'User-Agent': Config.REDDIT_USER_AGENT
+        }
+        data = {'grant_type': 'client_credentials'}
+        
+        response = upstream_request('reddit', 'app_token', 'POST', self.token_url, headers=headers, data=data)
+        if response.status_code != 200:
+            logging.error(f"Reddit application token request failed: {response.text}")
+            return None, 0
+        
+        token_data = response.json()
+        logging.info("Obtained Reddit application-only access token")
+        return token_data.get('access_token'), float(token_data.get('expires_in', 3600))
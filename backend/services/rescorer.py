@@ -0,0 +1,233 @@
+"""
+Resumable re-scoring of stored analyses after the lexicon or scoring code changes
+(the `rescore-analyses` command).
+"""
+import json
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import bindparam, select, update
+from backend.config import Config
+from backend.models import db, Analysis, AnalysisPost, BackfillCheckpoint
+from backend.services.stress_analyzer import StressAnalyzer
+from src.logger import logging
+
+# detailed_metrics keys describing the original request rather than the scoring; carried over as-is
+REQUEST_METRICS = ('timings', 'partial', 'coverage')
+
+_worker_analyzer = None
+
+
+def _init_worker(resolution_hours: float, window_days: float):
+    global _worker_analyzer
+    _worker_analyzer = StressAnalyzer(
+        timeline_resolution=timedelta(hours=resolution_hours),
+        timeline_window=timedelta(days=window_days),
+        record_metrics=False
+    )
+
+
+def _rescore(work: List[Tuple[int, List[Dict]]]) -> List[Tuple[int, Dict]]:
+    """analyze_tweets result for each (analysis id, stored posts) pair"""
+    return [(analysis_id, _worker_analyzer.analyze_tweets(posts)) for analysis_id, posts in work]
+
+
+class Rescorer:
+    """
+    Re-scores stored analyses in primary-key order under the current scorer version.
+
+    Each batch of analyses is read with its stored posts, scored (optionally in a
+    process pool, a few batches ahead) and written back in one transaction together
+    with the job's checkpoint, so a crash resumes after the last committed batch and
+    no batch is applied twice. Every analysis is replaced by a single UPDATE that
+    sets the aggregates, samples and scorer_version at once, so a reader sees either
+    the old or the new result for it, never a mix.
+    """
+
+    def __init__(self, workers: int = 1, batch_size: int = 200, progress_seconds: float = 5.0, echo=None):
+        self.workers = max(1, workers)
+        self.batch_size = batch_size
+        self.progress_seconds = progress_seconds
+        self.echo = echo or (lambda message: click.echo(message, err=True))
+        self.version = StressAnalyzer.scorer_version()
+        self.job = f'rescore:{self.version}'
+        self.stats = {'scanned': 0, 'rescored': 0, 'current': 0, 'no_content': 0, 'category_changed': 0}
+
+    def checkpoint(self, restart: bool = False) -> BackfillCheckpoint:
+        """The job's checkpoint row, created (or reset) and committed"""
+        checkpoint = db.session.get(BackfillCheckpoint, self.job)
+        if checkpoint is None:
+            checkpoint = BackfillCheckpoint(job=self.job, last_id=0, rows_done=0, rows_skipped=0)
+            db.session.add(checkpoint)
+        elif restart:
+            checkpoint.last_id = checkpoint.rows_done = checkpoint.rows_skipped = 0
+            checkpoint.started_at = datetime.utcnow()
+            checkpoint.finished_at = None
+        db.session.commit()
+        return checkpoint
+
+    def run(self, restart: bool = False, limit: Optional[int] = None) -> Dict:
+        """
+        Re-score analyses after the checkpoint until none are left (or `limit` are scanned).
+
+        Args:
+            restart: Start again from the lowest id instead of resuming
+            limit: Stop after scanning this many analyses (the checkpoint keeps the position)
+
+        Returns:
+            Dictionary of counters for this run
+        """
+        started = last_progress = time.monotonic()
+        checkpoint = self.checkpoint(restart)
+        self.echo(f"Re-scoring to {self.version}, resuming after analysis id {checkpoint.last_id}")
+
+        pool = None
+        if self.workers > 1:
+            pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                       initargs=(Config.STRESS_TIMELINE_RESOLUTION_HOURS,
+                                                 Config.STRESS_TIMELINE_WINDOW_DAYS))
+        else:
+            _init_worker(Config.STRESS_TIMELINE_RESOLUTION_HOURS, Config.STRESS_TIMELINE_WINDOW_DAYS)
+
+        pending = deque()
+        cursor = checkpoint.last_id
+        try:
+            while limit is None or self.stats['scanned'] < limit:
+                size = self.batch_size if limit is None else min(self.batch_size, limit - self.stats['scanned'])
+                batch = self._read_batch(cursor, size)
+                if batch is None:
+                    break
+                cursor, work, skipped = batch
+                pending.append((cursor, skipped, pool.submit(_rescore, work) if pool else _rescore(work)))
+                # Scoring of the next batches overlaps with committing this one
+                while len(pending) > (self.workers * 2 if pool else 0):
+                    self._apply(checkpoint, *pending.popleft())
+                if time.monotonic() - last_progress >= self.progress_seconds:
+                    last_progress = time.monotonic()
+                    self._progress(started, cursor)
+            while pending:
+                self._apply(checkpoint, *pending.popleft())
+        finally:
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+            db.session.rollback()
+
+        if not self._has_more(checkpoint.last_id) and checkpoint.finished_at is None:
+            checkpoint.finished_at = datetime.utcnow()
+            db.session.commit()
+        self._progress(started, checkpoint.last_id)
+        self.stats['finished'] = checkpoint.finished_at is not None
+        self.stats['last_id'] = checkpoint.last_id
+        self.stats['scorer_version'] = self.version
+        self.stats['elapsed_seconds'] = round(time.monotonic() - started, 1)
+        return self.stats
+
+    def _has_more(self, after_id: int) -> bool:
+        """Whether any analysis is left after the given id (no counting, no posts loaded)"""
+        more = db.session.execute(select(Analysis.id).where(Analysis.id > after_id).limit(1)).first() is not None
+        db.session.commit()
+        return more
+
+    def _read_batch(self, after_id: int, size: int):
+        """(last id, [(analysis id, posts)] to re-score, skipped count) for the next batch, or None at the end"""
+        rows = db.session.execute(
+            select(Analysis.id, Analysis.scorer_version)
+            .where(Analysis.id > after_id)
+            .order_by(Analysis.id)
+            .limit(size)
+        ).all()
+        db.session.commit()
+        if not rows:
+            return None
+
+        self.stats['scanned'] += len(rows)
+        stale = [analysis_id for analysis_id, version in rows if version != self.version]
+        self.stats['current'] += len(rows) - len(stale)
+
+        posts = {}
+        if stale:
+            for post in db.session.execute(
+                select(AnalysisPost).where(AnalysisPost.analysis_id.in_(stale)).order_by(AnalysisPost.id)
+            ).scalars():
+                posts.setdefault(post.analysis_id, []).append(post.to_post())
+            db.session.commit()
+        work = [(analysis_id, posts[analysis_id]) for analysis_id in stale if analysis_id in posts]
+        self.stats['no_content'] += len(stale) - len(work)
+        return rows[-1][0], work, len(rows) - len(work)
+
+    def _apply(self, checkpoint: BackfillCheckpoint, last_id: int, skipped: int, results):
+        """Write one batch's results and advance the checkpoint in a single transaction"""
+        if isinstance(results, Future):
+            results = results.result()
+
+        if results:
+            ids = [analysis_id for analysis_id, _ in results]
+            previous = {
+                row.id: row for row in db.session.execute(
+                    select(Analysis.id, Analysis.stress_category, Analysis.detailed_metrics)
+                    .where(Analysis.id.in_(ids))
+                )
+            }
+            table = Analysis.__table__
+            params = []
+            for analysis_id, result in results:
+                old = previous.get(analysis_id)
+                if old is None:
+                    continue  # Deleted meanwhile
+                metrics = dict(result['detailed_metrics'])
+                for key in REQUEST_METRICS:
+                    if key in (old.detailed_metrics or {}):
+                        metrics[key] = old.detailed_metrics[key]
+                if old.stress_category != result['stress_category']:
+                    self.stats['category_changed'] += 1
+                params.append({
+                    'analysis_id': analysis_id,
+                    'stress_level': result['stress_level'],
+                    'stress_category': result['stress_category'],
+                    'confidence_score': result['confidence_score'],
+                    'total_posts_analyzed': result['total_tweets_analyzed'],
+                    'posts_with_stress_indicators': result['tweets_with_stress_indicators'],
+                    'average_sentiment': result['average_sentiment'],
+                    'detailed_metrics': metrics,
+                    'content_samples': result['tweet_samples'],
+                    'scorer_version': self.version,
+                })
+            if params:
+                db.session.execute(
+                    update(table)
+                    .where(table.c.id == bindparam('analysis_id'))
+                    .values({column: bindparam(column) for column in params[0] if column != 'analysis_id'}),
+                    params
+                )
+            self.stats['rescored'] += len(params)
+
+        checkpoint.last_id = last_id
+        checkpoint.rows_done += len(results)
+        checkpoint.rows_skipped += skipped
+        db.session.commit()
+
+    def _progress(self, started: float, cursor: int):
+        elapsed = max(time.monotonic() - started, 1e-9)
+        self.echo(f"scanned {self.stats['scanned']:,} analyses (up to id {cursor}), re-scored "
+                  f"{self.stats['rescored']:,}, {self.stats['no_content']:,} without stored posts; "
+                  f"{self.stats['scanned'] / elapsed:,.0f} analyses/s")
+
+
+@click.command('rescore-analyses')
+@click.option('--workers', type=int, default=1, show_default=True, help='Scoring processes')
+@click.option('--batch-size', type=int, default=200, show_default=True, help='Analyses per batch (and transaction)')
+@click.option('--limit', type=int, help='Stop after scanning this many analyses; a later run resumes')
+@click.option('--restart', is_flag=True, help='Ignore the checkpoint and start from the first analysis')
+@click.option('--progress-seconds', type=float, default=5.0, show_default=True)
+@with_appcontext
+def rescore_analyses_command(workers, batch_size, limit, restart, progress_seconds):
+    """Re-score stored analyses whose scorer_version differs from the current one"""
+    rescorer = Rescorer(workers=workers, batch_size=batch_size, progress_seconds=progress_seconds)
+    stats = rescorer.run(restart=restart, limit=limit)
+    logging.info(f"Re-scoring finished: {stats}")
+    click.echo(json.dumps(stats), err=True)
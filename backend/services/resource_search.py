@@ -0,0 +1,154 @@
+"""
+Full-text search over the resource catalog, backed by SQLite FTS5 and a tag index.
+"""
+import re
+from typing import List, Optional
+from sqlalchemy import select, table, column, literal_column, text, or_, cast, String
+from backend.models import Resource
+from src.logger import logging
+
+FTS_TABLE = 'resources_fts'
+TAG_TABLE = 'resource_tags'
+
+# bm25 column weights: title, description, tags
+BM25_WEIGHTS = (10.0, 5.0, 2.0)
+
+fts = table(FTS_TABLE, column('rowid'))
+resource_tags = table(TAG_TABLE, column('tag'), column('resource_id'))
+
+# External-content FTS5 table and tag inverted index, kept in sync with
+# `resources` by triggers so writes from any process or script are indexed.
+SCHEMA = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        title, description, tags,
+        content='resources', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE TABLE IF NOT EXISTS {TAG_TABLE} (
+        tag TEXT NOT NULL,
+        resource_id INTEGER NOT NULL,
+        PRIMARY KEY (tag, resource_id)
+    ) WITHOUT ROWID
+    """,
+    f"CREATE INDEX IF NOT EXISTS ix_{TAG_TABLE}_resource ON {TAG_TABLE} (resource_id)",
+    f"""
+    CREATE TRIGGER IF NOT EXISTS resources_search_ai AFTER INSERT ON resources BEGIN
+        INSERT INTO {FTS_TABLE} (rowid, title, description, tags)
+        VALUES (new.id, new.title, new.description, new.tags);
+        INSERT OR IGNORE INTO {TAG_TABLE} (tag, resource_id)
+        SELECT lower(value), new.id FROM json_each(CASE WHEN json_valid(new.tags) THEN new.tags END);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS resources_search_ad AFTER DELETE ON resources BEGIN
+        INSERT INTO {FTS_TABLE} ({FTS_TABLE}, rowid, title, description, tags)
+        VALUES ('delete', old.id, old.title, old.description, old.tags);
+        DELETE FROM {TAG_TABLE} WHERE resource_id = old.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS resources_search_au AFTER UPDATE OF title, description, tags ON resources BEGIN
+        INSERT INTO {FTS_TABLE} ({FTS_TABLE}, rowid, title, description, tags)
+        VALUES ('delete', old.id, old.title, old.description, old.tags);
+        INSERT INTO {FTS_TABLE} (rowid, title, description, tags)
+        VALUES (new.id, new.title, new.description, new.tags);
+        DELETE FROM {TAG_TABLE} WHERE resource_id = old.id;
+        INSERT OR IGNORE INTO {TAG_TABLE} (tag, resource_id)
+        SELECT lower(value), new.id FROM json_each(CASE WHEN json_valid(new.tags) THEN new.tags END);
+    END
+    """,
+]
+
+
+def install_search_index(engine):
+    """
+    Create the FTS5 table, tag index and sync triggers if missing, and backfill
+    them from existing rows on first install. No-op for non-SQLite databases.
+
+    Args:
+        engine: SQLAlchemy engine for the primary database
+    """
+    if engine.dialect.name != 'sqlite':
+        return
+
+    with engine.begin() as conn:
+        exists = conn.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {'name': FTS_TABLE}
+        ).first()
+        for statement in SCHEMA:
+            conn.exec_driver_sql(statement)
+        if not exists:
+            conn.exec_driver_sql(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('rebuild')")
+            conn.exec_driver_sql(f"DELETE FROM {TAG_TABLE}")
+            conn.exec_driver_sql(
+                f"""
+                INSERT OR IGNORE INTO {TAG_TABLE} (tag, resource_id)
+                SELECT lower(j.value), r.id FROM resources AS r,
+                    json_each(CASE WHEN json_valid(r.tags) THEN r.tags END) AS j
+                """
+            )
+            logging.info("Resource search index created and backfilled")
+
+
+def to_match_query(query: str) -> Optional[str]:
+    """
+    Turn free text into a safe FTS5 MATCH expression: every word must match,
+    the last as a prefix so search-as-you-type works.
+    """
+    terms = re.findall(r'\w+', query.lower())
+    if not terms:
+        return None
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += '*'
+    return ' '.join(quoted)
+
+
+def search_resources(session, query: str = '', tags: Optional[List[str]] = None,
+                     limit: int = 20) -> List[Resource]:
+    """
+    Search active resources by text and/or exact tags, best matches first.
+
+    Args:
+        session: SQLAlchemy session
+        query: Free-text query over title, description and tags
+        tags: Tags every result must carry (case-insensitive)
+        limit: Maximum number of results
+
+    Returns:
+        List of matching Resource objects; empty if the query has text but no
+        searchable terms (e.g. only punctuation)
+    """
+    match = to_match_query(query or '')
+    if query and query.strip() and not match:
+        return []
+
+    is_sqlite = session.get_bind(mapper=Resource).dialect.name == 'sqlite'
+    stmt = select(Resource).where(Resource.is_active.is_(True))
+
+    for tag in tags or []:
+        if is_sqlite:
+            stmt = stmt.where(Resource.id.in_(
+                select(resource_tags.c.resource_id).where(resource_tags.c.tag == tag.lower())
+            ))
+        else:
+            stmt = stmt.where(cast(Resource.tags, String).ilike(f'%"{tag}"%'))
+
+    if match and is_sqlite:
+        weights = ', '.join(str(w) for w in BM25_WEIGHTS)
+        stmt = stmt.join(fts, fts.c.rowid == Resource.id)\
+            .where(literal_column(FTS_TABLE).op('MATCH')(match))\
+            .order_by(text(f"bm25({FTS_TABLE}, {weights})"))
+    elif match:
+        # No FTS5 outside SQLite: fall back to an unranked substring scan
+        for term in re.findall(r'\w+', query.lower()):
+            pattern = f'%{term}%'
+            stmt = stmt.where(or_(Resource.title.ilike(pattern), Resource.description.ilike(pattern)))
+        stmt = stmt.order_by(Resource.created_at.desc())
+    else:
+        stmt = stmt.order_by(Resource.created_at.desc())
+
+    return session.execute(stmt.limit(limit)).scalars().all()
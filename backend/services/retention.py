@@ -0,0 +1,110 @@
+"""
+Retention for stored analysis content (the `prune-analyses` command).
+
+The analyzed posts kept with each analysis (ANALYSIS_STORE_POSTS) hold the full
+text of other people's posts, so they are only kept for a limited window. The
+analyses themselves stay; once their posts are gone, `rescore-analyses` skips
+them as `no_content`. Scheduled analyses, written by the watchlist every
+interval, are deleted altogether after their own window.
+"""
+import json
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import delete, select
+from backend.config import Config
+from backend.models import db, Analysis, AnalysisPost, Watch
+from src.logger import logging
+
+
+def prune_analysis_posts(retention_days: float, batch_size: int = 500, now: Optional[datetime] = None) -> int:
+    """
+    Delete the stored posts of analyses older than the retention window.
+
+    The post set of each watch's last analysis is kept: the watchlist scheduler
+    merges new content into it on the next run.
+
+    Args:
+        retention_days: Keep posts of analyses made within this many days
+        batch_size: Analyses whose posts are deleted per transaction
+        now: Reference time (defaults to the current UTC time)
+
+    Returns:
+        Number of post rows deleted
+    """
+    cutoff = (now or datetime.utcnow()) - timedelta(days=retention_days)
+    in_use = select(Watch.last_analysis_id).where(Watch.last_analysis_id.is_not(None))
+    deleted = 0
+    after_id = 0
+    while True:
+        # Analyses are walked in id order so each batch is a short transaction
+        ids = db.session.execute(
+            select(Analysis.id)
+            .where(Analysis.id > after_id, Analysis.analysis_date < cutoff, Analysis.id.not_in(in_use))
+            .order_by(Analysis.id)
+            .limit(batch_size)
+        ).scalars().all()
+        if not ids:
+            break
+        after_id = ids[-1]
+        deleted += db.session.execute(delete(AnalysisPost).where(AnalysisPost.analysis_id.in_(ids))).rowcount
+        db.session.commit()
+    return deleted
+
+
+def prune_scheduled_analyses(retention_days: float, batch_size: int = 500, now: Optional[datetime] = None) -> int:
+    """
+    Delete scheduled (watchlist) analyses older than the retention window, with their posts.
+
+    Each watch's last analysis is kept whatever its age.
+
+    Args:
+        retention_days: Keep scheduled analyses made within this many days
+        batch_size: Analyses deleted per transaction
+        now: Reference time (defaults to the current UTC time)
+
+    Returns:
+        Number of analyses deleted
+    """
+    cutoff = (now or datetime.utcnow()) - timedelta(days=retention_days)
+    in_use = select(Watch.last_analysis_id).where(Watch.last_analysis_id.is_not(None))
+    deleted = 0
+    while True:
+        ids = db.session.execute(
+            select(Analysis.id)
+            .where(Analysis.analysis_type == 'scheduled', Analysis.analysis_date < cutoff,
+                   Analysis.id.not_in(in_use))
+            .order_by(Analysis.id)
+            .limit(batch_size)
+        ).scalars().all()
+        if not ids:
+            break
+        db.session.execute(delete(AnalysisPost).where(AnalysisPost.analysis_id.in_(ids)))
+        deleted += db.session.execute(delete(Analysis).where(Analysis.id.in_(ids))).rowcount
+        db.session.commit()
+    return deleted
+
+
+def prune_analyses(batch_size: int = 500) -> Dict:
+    """Apply the configured retention settings; returns counts of deleted rows"""
+    started = time.monotonic()
+    stats = {'scheduled_analyses': 0, 'analysis_posts': 0}
+    if Config.WATCHLIST_ANALYSIS_RETENTION_DAYS > 0:
+        stats['scheduled_analyses'] = prune_scheduled_analyses(Config.WATCHLIST_ANALYSIS_RETENTION_DAYS, batch_size)
+    if Config.ANALYSIS_POSTS_RETENTION_DAYS > 0:
+        stats['analysis_posts'] = prune_analysis_posts(Config.ANALYSIS_POSTS_RETENTION_DAYS, batch_size)
+    stats['elapsed_seconds'] = round(time.monotonic() - started, 1)
+    return stats
+
+
+@click.command('prune-analyses')
+@click.option('--batch-size', type=int, default=500, show_default=True, help='Analyses per transaction')
+@with_appcontext
+def prune_analyses_command(batch_size):
+    """Delete stored analysis content older than the configured retention windows"""
+    stats = prune_analyses(batch_size)
+    logging.info(f"Pruning finished: {stats}")
+    click.echo(json.dumps(stats), err=True)
@@ -2,13 +2,27 @@
 Stress analysis service that processes tweets and detects stress levels.
 """
 import re
+import hashlib
+import json
+from collections import Counter
+from functools import lru_cache
 from typing import List, Dict, Optional
-from datetime import datetime
+from datetime import datetime, timedelta
+from time import perf_counter_ns
 from src.logger import logging
 from src.exception import CustomException
 from src.pipeline.predict_pipeline import PredictPipeline
+from backend.metrics import observe_scoring
+from backend.utils.timing import NULL_RECORDER
 import sys
 
+
+@lru_cache(maxsize=None)
+def shared_predict_pipeline() -> PredictPipeline:
+    """One PredictPipeline per process, so model artifacts load once (in the master under a preloading server)"""
+    return PredictPipeline()
+
+
 class StressAnalyzer:
     """Service for analyzing stress levels in tweets"""
     
@@ -39,10 +53,115 @@ class StressAnalyzer:
         r'\b(hate|dislike|annoyed|irritated)',
     ]
     
-    def __init__(self):
-        self.predict_pipeline = PredictPipeline()
+    # Upper bound on buckets in the stress timeline; resolution is coarsened to fit
+    MAX_TIMELINE_BUCKETS = 2000
+    
+    # Bump when a change to the scoring or aggregation code alters results, so stored
+    # analyses are picked up by `flask rescore-analyses` (lexicon changes are detected)
+    ENGINE_REVISION = 1
+    
+    def __init__(self, timeline_resolution: timedelta = timedelta(days=1),
+                 timeline_window: timedelta = timedelta(days=7), record_metrics: bool = True):
+        self.predict_pipeline = shared_predict_pipeline()
+        self.timeline_resolution = timeline_resolution
+        self.timeline_window = timeline_window
+        # Offline jobs (score-archive, rescore-analyses) stay out of the live scoring metrics
+        self.record_metrics = record_metrics
         logging.info("StressAnalyzer initialized")
     
+    @classmethod
+    def scorer_version(cls) -> str:
+        """Fingerprint of the engine revision, keyword lists and patterns, stored with each analysis"""
+        payload = json.dumps([cls.STRESS_KEYWORDS, cls.NEGATIVE_PATTERNS], sort_keys=True)
+        return f"{cls.ENGINE_REVISION}-{hashlib.sha1(payload.encode('utf-8')).hexdigest()[:10]}"
+    
+    @staticmethod
+    def _post_timestamp(post: Dict) -> Optional[float]:
+        """Return the post's creation time as a UTC epoch, or None if unknown"""
+        created_utc = post.get('created_utc')
+        if isinstance(created_utc, (int, float)) and created_utc > 0:
+            return float(created_utc)
+        
+        created_at = post.get('created_at')
+        if not created_at:
+            return None
+        try:
+            if isinstance(created_at, datetime):
+                parsed = created_at
+            else:
+                parsed = datetime.fromisoformat(str(created_at).replace('Z', '+00:00'))
+            if parsed.tzinfo is None:
+                return (parsed - datetime(1970, 1, 1)).total_seconds()
+            return parsed.timestamp()
+        except (TypeError, ValueError):
+            return None
+    
+    def compute_stress_timeline(self, timestamps, stress_scores, stressed_flags) -> Dict:
+        """
+        Build a rolling stress time series from per-post scores.
+        
+        Posts are sorted and binned at ``timeline_resolution``; per-bucket sums are
+        turned into a trailing ``timeline_window`` rolling mean of stress and share
+        of stressed posts via cumulative sums, so the cost is O(n log n) overall.
+        
+        Args:
+            timestamps: UTC epoch seconds per post
+            stress_scores: Stress score per post
+            stressed_flags: Whether each post has stress indicators
+            
+        Returns:
+            Dictionary with bucket start times and rolling series
+        """
+        # Deferred: numpy is only needed once an analysis runs, not at import
+        import numpy as np
+
+        ts = np.asarray(timestamps, dtype=np.float64)
+        if ts.size == 0:
+            return {}
+        
+        scores = np.asarray(stress_scores, dtype=np.float64)
+        stressed = np.asarray(stressed_flags, dtype=np.float64)
+        
+        order = np.argsort(ts, kind='stable')
+        ts, scores, stressed = ts[order], scores[order], stressed[order]
+        
+        resolution = max(1, int(self.timeline_resolution.total_seconds()))
+        span = ts[-1] - ts[0]
+        if span // resolution + 1 > self.MAX_TIMELINE_BUCKETS:
+            resolution = int(np.ceil((span + 1) / self.MAX_TIMELINE_BUCKETS))
+        window_buckets = max(1, int(np.ceil(self.timeline_window.total_seconds() / resolution)))
+        
+        start = np.floor(ts[0] / resolution) * resolution
+        bucket_idx = ((ts - start) // resolution).astype(np.int64)
+        n_buckets = int(bucket_idx[-1]) + 1
+        
+        counts = np.bincount(bucket_idx, minlength=n_buckets).astype(np.float64)
+        score_sums = np.bincount(bucket_idx, weights=scores, minlength=n_buckets)
+        stressed_sums = np.bincount(bucket_idx, weights=stressed, minlength=n_buckets)
+        
+        def rolling(values):
+            cumulative = np.concatenate(([0.0], np.cumsum(values)))
+            upper = np.arange(1, n_buckets + 1)
+            lower = np.maximum(upper - window_buckets, 0)
+            return cumulative[upper] - cumulative[lower]
+        
+        window_counts = rolling(counts)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            rolling_mean = np.round(rolling(score_sums) / window_counts, 3)
+            rolling_share = np.round(rolling(stressed_sums) / window_counts, 3)
+        has_data = window_counts > 0
+        
+        bucket_starts = (start + np.arange(n_buckets) * resolution).astype('datetime64[s]')
+        
+        return {
+            'resolution_seconds': resolution,
+            'window_seconds': window_buckets * resolution,
+            'bucket_start': np.char.add(np.datetime_as_string(bucket_starts, unit='s'), 'Z').tolist(),
+            'post_count': counts.astype(np.int64).tolist(),
+            'rolling_stress_mean': np.where(has_data, rolling_mean, None).tolist(),
+            'rolling_stressed_share': np.where(has_data, rolling_share, None).tolist(),
+        }
+    
     def analyze_tweet(self, tweet_text: str) -> Dict:
         """
         Analyze a single tweet for stress indicators.
@@ -126,12 +245,13 @@ class StressAnalyzer:
                 'error': str(e)
             }
     
-    def analyze_tweets(self, tweets: List[Dict]) -> Dict:
+    def analyze_tweets(self, tweets: List[Dict], recorder=NULL_RECORDER) -> Dict:
         """
         Analyze multiple tweets and generate overall stress assessment.
         
         Args:
             tweets: List of tweet dictionaries with 'text' field
+            recorder: Optional SpanRecorder receiving 'score' and 'aggregate' spans
             
         Returns:
             Dictionary with comprehensive stress analysis
@@ -149,134 +269,183 @@ class StressAnalyzer:
                     'tweet_samples': []
                 }
             
-            start_time = datetime.utcnow()
-            tweet_analyses = []
-            total_stress_score = 0.0
-            tweets_with_stress = 0
-            sentiment_scores = []
+            start_ns = perf_counter_ns()
+            scored = []
             
             # Analyze each tweet
             for tweet in tweets:
                 tweet_text = tweet.get('text', '')
                 if not tweet_text:
                     continue
-                
-                analysis = self.analyze_tweet(tweet_text)
-                tweet_analyses.append({
-                    'tweet_id': tweet.get('id'),
-                    'created_at': tweet.get('created_at'),
-                    'analysis': analysis
-                })
-                
-                total_stress_score += analysis['stress_score']
-                if analysis['has_stress_indicators']:
-                    tweets_with_stress += 1
-                
-                # Convert sentiment to numeric score
-                sentiment_map = {
-                    'positive': 1.0,
-                    'neutral': 0.5,
-                    'slightly_negative': 0.3,
-                    'negative': 0.0
-                }
-                sentiment_scores.append(sentiment_map.get(analysis['sentiment'], 0.5))
-            
-            # Calculate overall metrics
-            total_tweets = len(tweet_analyses)
-            if total_tweets == 0:
-                return {
-                    'stress_level': 0.0,
-                    'stress_category': 'low',
-                    'confidence_score': 0.0,
-                    'total_tweets_analyzed': 0,
-                    'tweets_with_stress_indicators': 0,
-                    'average_sentiment': 0.0,
-                    'detailed_metrics': {},
-                    'tweet_samples': []
-                }
-            
-            average_stress = total_stress_score / total_tweets
-            average_sentiment = sum(sentiment_scores) / len(sentiment_scores) if sentiment_scores else 0.5
-            stress_percentage = (tweets_with_stress / total_tweets) * 100
-            
-            # Determine stress category
-            if average_stress >= 0.7:
-                stress_category = 'very_high'
-            elif average_stress >= 0.5:
-                stress_category = 'high'
-            elif average_stress >= 0.3:
-                stress_category = 'moderate'
-            else:
-                stress_category = 'low'
+                scored.append((tweet, self.analyze_tweet(tweet_text)))
             
-            # Calculate confidence score
-            # Higher confidence with more tweets and consistent patterns
-            confidence_score = min(0.95, 0.5 + (total_tweets / 200) * 0.3)
-            if tweets_with_stress > 0:
-                consistency = min(1.0, stress_percentage / 50)
-                confidence_score += consistency * 0.15
+            scored_ns = perf_counter_ns()
+            recorder.record('score', start_ns, scored_ns)
+            return self._aggregate(scored, start_ns, scored_ns, recorder)
             
-            # Get sample tweets with highest stress
-            high_stress_tweets = sorted(
-                tweet_analyses,
-                key=lambda x: x['analysis']['stress_score'],
-                reverse=True
-            )[:5]
+        except Exception as e:
+            logging.error(f"Error analyzing tweets: {str(e)}")
+            raise CustomException(f"Failed to analyze tweets: {str(e)}", sys)
+    
+    def aggregate_analyses(self, scored, recorder=NULL_RECORDER) -> Dict:
+        """
+        Build the analyze_tweets result from per-post analyses computed elsewhere
+        (e.g. by a bulk scorer), so every entry point shares one aggregation.
+        
+        Args:
+            scored: List of (tweet dict, analyze_tweet result) pairs for posts with text
+            recorder: Optional SpanRecorder receiving the 'aggregate' span
             
-            tweet_samples = [
-                {
-                    'tweet_id': t['tweet_id'],
-                    'text': t['analysis']['tweet_text'],
-                    'stress_score': t['analysis']['stress_score'],
-                    'indicators': t['analysis']['indicators_found'],
-                    'created_at': t.get('created_at')
-                }
-                for t in high_stress_tweets
-            ]
+        Returns:
+            Dictionary with comprehensive stress analysis, as from analyze_tweets
+        """
+        try:
+            start_ns = perf_counter_ns()
+            return self._aggregate(scored, start_ns, start_ns, recorder)
+        except Exception as e:
+            logging.error(f"Error aggregating analyses: {str(e)}")
+            raise CustomException(f"Failed to aggregate analyses: {str(e)}", sys)
+    
+    def _aggregate(self, scored, start_ns, scored_ns, recorder) -> Dict:
+        """Overall assessment from (tweet, analysis) pairs; processing time counts from start_ns"""
+        tweet_analyses = []
+        total_stress_score = 0.0
+        tweets_with_stress = 0
+        sentiment_scores = []
+        timeline_ts = []
+        timeline_scores = []
+        timeline_stressed = []
+        indicator_counts = Counter()
+        
+        for tweet, analysis in scored:
+            tweet_analyses.append({
+                'tweet_id': tweet.get('id'),
+                'post': tweet,
+                'analysis': analysis
+            })
             
-            processing_time = (datetime.utcnow() - start_time).total_seconds()
+            total_stress_score += analysis['stress_score']
+            indicator_counts.update(analysis['indicators_found'])
+            if analysis['has_stress_indicators']:
+                tweets_with_stress += 1
             
-            result = {
-                'stress_level': round(average_stress, 3),
-                'stress_category': stress_category,
-                'confidence_score': round(confidence_score, 3),
-                'total_tweets_analyzed': total_tweets,
-                'tweets_with_stress_indicators': tweets_with_stress,
-                'stress_percentage': round(stress_percentage, 2),
-                'average_sentiment': round(average_sentiment, 3),
-                'detailed_metrics': {
-                    'total_stress_score': round(total_stress_score, 3),
-                    'average_stress_per_tweet': round(average_stress, 3),
-                    'sentiment_distribution': {
-                        'positive': sum(1 for a in tweet_analyses if a['analysis']['sentiment'] == 'positive'),
-                        'neutral': sum(1 for a in tweet_analyses if a['analysis']['sentiment'] == 'neutral'),
-                        'negative': sum(1 for a in tweet_analyses if a['analysis']['sentiment'] in ['slightly_negative', 'negative'])
-                    }
-                },
-                'tweet_samples': tweet_samples,
-                'processing_time_seconds': round(processing_time, 3)
+            # Convert sentiment to numeric score
+            sentiment_map = {
+                'positive': 1.0,
+                'neutral': 0.5,
+                'slightly_negative': 0.3,
+                'negative': 0.0
             }
+            sentiment_scores.append(sentiment_map.get(analysis['sentiment'], 0.5))
             
-            logging.info(f"Analyzed {total_tweets} tweets. Stress level: {stress_category} ({average_stress:.3f})")
-            return result
-            
-        except Exception as e:
-            logging.error(f"Error analyzing tweets: {str(e)}")
-            raise CustomException(f"Failed to analyze tweets: {str(e)}", sys)
+            timestamp = self._post_timestamp(tweet)
+            if timestamp is not None:
+                timeline_ts.append(timestamp)
+                timeline_scores.append(analysis['stress_score'])
+                timeline_stressed.append(analysis['has_stress_indicators'])
+        
+        # Calculate overall metrics
+        total_tweets = len(tweet_analyses)
+        if total_tweets == 0:
+            return {
+                'stress_level': 0.0,
+                'stress_category': 'low',
+                'confidence_score': 0.0,
+                'total_tweets_analyzed': 0,
+                'tweets_with_stress_indicators': 0,
+                'average_sentiment': 0.0,
+                'detailed_metrics': {},
+                'tweet_samples': []
+            }
+        
+        average_stress = total_stress_score / total_tweets
+        average_sentiment = sum(sentiment_scores) / len(sentiment_scores) if sentiment_scores else 0.5
+        stress_percentage = (tweets_with_stress / total_tweets) * 100
+        
+        # Determine stress category
+        if average_stress >= 0.7:
+            stress_category = 'very_high'
+        elif average_stress >= 0.5:
+            stress_category = 'high'
+        elif average_stress >= 0.3:
+            stress_category = 'moderate'
+        else:
+            stress_category = 'low'
+        
+        # Calculate confidence score
+        # Higher confidence with more tweets and consistent patterns
+        confidence_score = min(0.95, 0.5 + (total_tweets / 200) * 0.3)
+        if tweets_with_stress > 0:
+            consistency = min(1.0, stress_percentage / 50)
+            confidence_score += consistency * 0.15
+        
+        # Get sample tweets with highest stress
+        high_stress_tweets = sorted(
+            tweet_analyses,
+            key=lambda x: x['analysis']['stress_score'],
+            reverse=True
+        )[:5]
+        
+        tweet_samples = [
+            {
+                'tweet_id': t['tweet_id'],
+                'text': t['analysis']['tweet_text'],
+                'stress_score': t['analysis']['stress_score'],
+                'indicators': t['analysis']['indicators_found'],
+                # Formatted (for records, derived) only for the samples shown
+                'created_at': t['post'].get('created_at')
+            }
+            for t in high_stress_tweets
+        ]
+        
+        end_ns = perf_counter_ns()
+        recorder.record('aggregate', scored_ns, end_ns)
+        processing_time = (end_ns - start_ns) / 1e9
+        if self.record_metrics:
+            observe_scoring(total_tweets, processing_time)
+        
+        result = {
+            'stress_level': round(average_stress, 3),
+            'stress_category': stress_category,
+            'confidence_score': round(confidence_score, 3),
+            'total_tweets_analyzed': total_tweets,
+            'tweets_with_stress_indicators': tweets_with_stress,
+            'stress_percentage': round(stress_percentage, 2),
+            'average_sentiment': round(average_sentiment, 3),
+            'detailed_metrics': {
+                'total_stress_score': round(total_stress_score, 3),
+                'average_stress_per_tweet': round(average_stress, 3),
+                'sentiment_distribution': {
+                    'positive': sum(1 for a in tweet_analyses if a['analysis']['sentiment'] == 'positive'),
+                    'neutral': sum(1 for a in tweet_analyses if a['analysis']['sentiment'] == 'neutral'),
+                    'negative': sum(1 for a in tweet_analyses if a['analysis']['sentiment'] in ['slightly_negative', 'negative'])
+                },
+                'top_indicators': dict(indicator_counts.most_common(10)),
+                'stress_timeline': self.compute_stress_timeline(
+                    timeline_ts, timeline_scores, timeline_stressed
+                )
+            },
+            'tweet_samples': tweet_samples,
+            'processing_time_seconds': round(processing_time, 3)
+        }
+        
+        logging.info(f"Analyzed {total_tweets} tweets. Stress level: {stress_category} ({average_stress:.3f})")
+        return result
     
-    def analyze_user_tweets(self, tweets: List[Dict], username: str) -> Dict:
+    def analyze_user_tweets(self, tweets: List[Dict], username: str, recorder=NULL_RECORDER) -> Dict:
         """
         Analyze user tweets and return formatted results.
         
         Args:
             tweets: List of tweet dictionaries
             username: Username being analyzed
+            recorder: Optional SpanRecorder passed to analyze_tweets
             
         Returns:
             Dictionary with analysis results ready for database storage
         """
         try:
-            analysis_result = self.analyze_tweets(tweets)
+            analysis_result = self.analyze_tweets(tweets, recorder=recorder)
             
             return {
                 'username_analyzed': username,
@@ -0,0 +1,234 @@
+"""
+Proactive renewal of users' Twitter/Reddit OAuth access tokens.
+
+A background thread refreshes tokens shortly before they expire, so analyses
+normally find a valid token. Each refresh holds a lease on the user's row
+(`<platform>_token_lease_until`), so two workers never spend the same refresh
+token (Twitter's are single-use). Within a process, a request that finds its
+token due waits for an in-flight refresh instead of starting another.
+"""
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+from sqlalchemy import or_, update
+from backend.config import Config
+from backend.metrics import TOKEN_REFRESHES
+from backend.models import db, User
+from backend.services.reddit_oauth import RedditOAuthService
+from backend.services.twitter_oauth import TwitterOAuthService
+from src.logger import logging
+
+PLATFORMS = ('twitter', 'reddit')
+
+# Poll interval while another worker holds a token's refresh lease
+_LEASE_POLL_SECONDS = 0.1
+
+
+def oauth_service(platform: str):
+    """OAuth client for a platform, built from the configured app credentials"""
+    if platform == 'twitter':
+        return TwitterOAuthService(Config.TWITTER_CLIENT_ID, Config.TWITTER_CLIENT_SECRET, Config.TWITTER_REDIRECT_URI)
+    return RedditOAuthService(Config.REDDIT_CLIENT_ID, Config.REDDIT_CLIENT_SECRET, Config.REDDIT_REDIRECT_URI)
+
+
+def store_tokens(user: User, platform: str, tokens: Dict, issued_at: Optional[datetime] = None):
+    """
+    Save an OAuth token response on the user and clear any refresh lease.
+
+    Args:
+        user: User to update (not committed)
+        platform: 'twitter' or 'reddit'
+        tokens: Dictionary with access_token and optionally refresh_token/expires_in
+        issued_at: When the token was requested (default: now)
+    """
+    issued_at = issued_at or datetime.utcnow()
+    expires_in = tokens.get('expires_in')
+    setattr(user, f'{platform}_access_token', tokens['access_token'])
+    if tokens.get('refresh_token'):
+        setattr(user, f'{platform}_refresh_token', tokens['refresh_token'])
+    setattr(user, f'{platform}_token_expires_at',
+            issued_at + timedelta(seconds=float(expires_in)) if expires_in else None)
+    setattr(user, f'{platform}_token_lease_until', None)
+    if platform == 'twitter':
+        # Legacy fields mirror the Twitter token
+        user.access_token = user.twitter_access_token
+        user.refresh_token = user.twitter_refresh_token
+
+
+class TokenRefresher:
+    """
+    Refreshes user access tokens that expire within `margin_seconds`, in the
+    background every `interval_seconds` and on demand from the request path.
+    """
+
+    # Striped locks: bounded memory however many users there are
+    _LOCK_STRIPES = 256
+
+    def __init__(self, margin_seconds: float = 600, interval_seconds: float = 60, lease_seconds: float = 30,
+                 backoff_seconds: float = 300, batch_size: int = 100):
+        self.margin_seconds = margin_seconds
+        self.interval_seconds = interval_seconds
+        self.lease_seconds = lease_seconds
+        self.backoff_seconds = backoff_seconds
+        self.batch_size = batch_size
+        self._locks = [threading.Lock() for _ in range(self._LOCK_STRIPES)]
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _lock_for(self, user_id: int, platform: str) -> threading.Lock:
+        return self._locks[hash((user_id, platform)) % self._LOCK_STRIPES]
+
+    def is_due(self, user: User, platform: str) -> bool:
+        """Whether the user's token can and should be refreshed now"""
+        expires_at = getattr(user, f'{platform}_token_expires_at')
+        if expires_at is None or not getattr(user, f'{platform}_refresh_token'):
+            return False
+        return expires_at - datetime.utcnow() <= timedelta(seconds=self.margin_seconds)
+
+    def _claim(self, user_id: int, platform: str, now: datetime) -> bool:
+        """Take the refresh lease on a user's token unless another worker holds it"""
+        lease = getattr(User, f'{platform}_token_lease_until')
+        claimed = db.session.execute(
+            update(User)
+            .where(User.id == user_id, or_(lease.is_(None), lease < now))
+            .values({lease: now + timedelta(seconds=self.lease_seconds)})
+        ).rowcount
+        db.session.commit()
+        return claimed == 1
+
+    def _refresh(self, user: User, platform: str, trigger: str) -> bool:
+        """
+        Refresh one token under its lease.
+
+        Returns:
+            False if another worker holds the lease, True once a refresh was attempted
+        """
+        now = datetime.utcnow()
+        if not self._claim(user.id, platform, now):
+            return False
+
+        # Re-read after the claim: another worker may have just rotated the tokens
+        db.session.refresh(user)
+        if not self.is_due(user, platform):
+            setattr(user, f'{platform}_token_lease_until', None)
+            db.session.commit()
+            return True
+
+        try:
+            tokens = oauth_service(platform).refresh_access_token(getattr(user, f'{platform}_refresh_token'))
+        except Exception as e:
+            logging.warning(f"{platform.title()} token refresh failed for user {user.id}: {str(e)}")
+            TOKEN_REFRESHES.labels(platform, trigger, 'error').inc()
+            # Keep the lease as a backoff so a revoked grant isn't retried on every sweep
+            setattr(user, f'{platform}_token_lease_until', now + timedelta(seconds=self.backoff_seconds))
+            db.session.commit()
+            return True
+
+        store_tokens(user, platform, tokens, issued_at=now)
+        db.session.commit()
+        TOKEN_REFRESHES.labels(platform, trigger, 'refreshed').inc()
+        logging.info(f"Refreshed {platform} token for user {user.id} ({trigger})")
+        return True
+
+    def _wait_for_lease(self, user: User, platform: str):
+        """Wait (at most one lease period) for another worker's refresh of this token"""
+        lease_attr = f'{platform}_token_lease_until'
+        lease_until = getattr(user, lease_attr)
+        # A lease beyond one lease period is a failure backoff, not a refresh in flight
+        if lease_until is None or lease_until - datetime.utcnow() > timedelta(seconds=self.lease_seconds):
+            return
+        give_up_at = time.monotonic() + self.lease_seconds
+        while time.monotonic() < give_up_at:
+            time.sleep(_LEASE_POLL_SECONDS)
+            db.session.refresh(user)
+            lease_until = getattr(user, lease_attr)
+            if not self.is_due(user, platform) or lease_until is None or lease_until <= datetime.utcnow():
+                return
+
+    def ensure_fresh(self, user: User, platform: str) -> Optional[str]:
+        """
+        Return the user's access token, refreshing it first if it is about to
+        expire. Concurrent callers share a single refresh.
+
+        Args:
+            user: User with a connected account on the platform
+            platform: 'twitter' or 'reddit'
+
+        Returns:
+            The current access token (possibly still the old one if refreshing failed)
+        """
+        if self.is_due(user, platform):
+            with self._lock_for(user.id, platform):
+                # The refresh we waited for may have already stored a new token
+                db.session.refresh(user)
+                if self.is_due(user, platform) and not self._refresh(user, platform, 'request'):
+                    self._wait_for_lease(user, platform)
+        return getattr(user, f'{platform}_access_token')
+
+    def refresh_due(self, trigger: str = 'background') -> int:
+        """
+        Refresh every token that expires within the margin, soonest first.
+
+        Returns:
+            Number of refreshes attempted
+        """
+        attempted = 0
+        for platform in PLATFORMS:
+            expires_at = getattr(User, f'{platform}_token_expires_at')
+            lease = getattr(User, f'{platform}_token_lease_until')
+            # Guards against re-selecting tokens whose new lifetime is shorter than the margin
+            seen = set()
+            while not self._stop.is_set():
+                now = datetime.utcnow()
+                due = User.query.filter(
+                    expires_at <= now + timedelta(seconds=self.margin_seconds),
+                    getattr(User, f'{platform}_refresh_token').isnot(None),
+                    or_(lease.is_(None), lease < now)
+                ).order_by(expires_at).limit(self.batch_size).all()
+                fresh = [user for user in due if user.id not in seen]
+                for user in fresh:
+                    seen.add(user.id)
+                    with self._lock_for(user.id, platform):
+                        if self._refresh(user, platform, trigger):
+                            attempted += 1
+                if len(due) < self.batch_size or not fresh:
+                    break
+        return attempted
+
+    def start(self, app):
+        """Start the background refresh thread (no-op if already running)"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+
+        def run():
+            while not self._stop.is_set():
+                with app.app_context():
+                    try:
+                        self.refresh_due()
+                    except Exception as e:
+                        logging.error(f"Token refresh sweep failed: {str(e)}")
+                    finally:
+                        db.session.remove()
+                self._stop.wait(self.interval_seconds)
+
+        self._thread = threading.Thread(target=run, name='token-refresher', daemon=True)
+        self._thread.start()
+        logging.info(f"Token refresher started (every {self.interval_seconds:.0f}s, margin {self.margin_seconds:.0f}s)")
+
+    def stop(self, timeout: float = 5.0):
+        """Stop the background thread, letting an in-flight refresh finish"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+
+token_refresher = TokenRefresher(
+    margin_seconds=Config.TOKEN_REFRESH_MARGIN_SECONDS,
+    interval_seconds=Config.TOKEN_REFRESH_INTERVAL_SECONDS,
+    lease_seconds=Config.TOKEN_REFRESH_LEASE_SECONDS,
+    backoff_seconds=Config.TOKEN_REFRESH_BACKOFF_SECONDS,
+    batch_size=Config.TOKEN_REFRESH_BATCH_SIZE
+)
@@ -1,9 +1,16 @@
 """
 Twitter API service for fetching tweets and user data.
 """
-import requests
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional
+import requests
+from backend.config import Config
+from backend.services.circuit_breaker import CircuitOpenError
+from backend.services.content_cache import SHARED_SCOPE, user_scope
+from backend.services.upstream import UpstreamNotFoundError, upstream_request
+from backend.utils.deadline import UNBOUNDED
+from backend.utils.post_record import PostRecord
+from backend.utils.timing import NULL_RECORDER
 from src.logger import logging
 from src.exception import CustomException
 import sys
@@ -13,14 +20,40 @@ class TwitterAPIService:
     
     def __init__(self, bearer_token: Optional[str] = None):
         self.bearer_token = bearer_token
-        self.base_url = 'https://api.twitter.com/2'
+        self.base_url = Config.TWITTER_API_BASE_URL
         self.headers = {}
+        self.pages_fetched = 0
+        self.recorder = NULL_RECORDER
+        # Budget for this service's calls; paging stops (truncated) when it runs out
+        self.deadline = UNBOUNDED
+        self.truncated = False
+        self.items_fetched = 0
+        self.items_expected = 0
+        # Set when paging stopped because an endpoint's circuit breaker was open
+        self.circuit_error = None
+        # App bearer token (or none): pages are public and shared through the content cache
+        self.cache_scope = SHARED_SCOPE
         if bearer_token:
             self.headers['Authorization'] = f'Bearer {bearer_token}'
     
     def set_access_token(self, access_token: str):
         """Set OAuth access token for authenticated requests"""
         self.headers['Authorization'] = f'Bearer {access_token}'
+        # A user's token may see protected tweets: cache its pages for that token only
+        self.cache_scope = user_scope(access_token)
+    
+    def _record_coverage(self, fetched: int, limit: int, truncated: bool):
+        """Track how much of the requested content was fetched before the deadline"""
+        self.items_fetched += fetched
+        self.items_expected += max(limit, fetched) if truncated else fetched
+        self.truncated = self.truncated or truncated
+    
+    @property
+    def coverage(self) -> float:
+        """Fraction of the requested content fetched (1.0 unless paging was cut short)"""
+        if not self.items_expected:
+            return 0.0 if self.truncated else 1.0
+        return round(self.items_fetched / self.items_expected, 3)
     
     def get_user_by_username(self, username: str) -> Dict:
         """
@@ -41,10 +74,11 @@ class TwitterAPIService:
                 'user.fields': 'id,username,name,profile_image_url,description,public_metrics,created_at'
             }
             
-            response = requests.get(url, headers=self.headers, params=params)
+            response = upstream_request('twitter', 'user_lookup', 'GET', url, headers=self.headers, params=params,
+                                        timeout=self.deadline.timeout(), cache_scope=self.cache_scope)
             
             if response.status_code == 404:
-                raise CustomException(f"User @{username} not found", sys)
+                raise UpstreamNotFoundError(f"User @{username} not found", sys)
             elif response.status_code != 200:
                 logging.error(f"Failed to get user: {response.text}")
                 raise CustomException(f"Failed to get user: {response.text}", sys)
@@ -52,14 +86,15 @@ class TwitterAPIService:
             data = response.json()
             return data.get('data', {})
             
-        except CustomException:
+        except (CustomException, CircuitOpenError, requests.Timeout):
+            # Timeouts stay distinguishable from "not found" (the analysis budget may have run out)
             raise
         except Exception as e:
             logging.error(f"Error getting user by username: {str(e)}")
             raise CustomException(f"Failed to get user: {str(e)}", sys)
     
     def get_user_tweets(self, user_id: str, max_results: int = 100, 
-                       start_time: Optional[datetime] = None) -> List[Dict]:
+                       start_time: Optional[datetime] = None, since_id: Optional[str] = None) -> List[PostRecord]:
         """
         Get recent tweets from a user.
         
@@ -67,13 +102,16 @@ class TwitterAPIService:
             user_id: Twitter user ID
             max_results: Maximum number of tweets to fetch (max 100)
             start_time: Start time for tweet search (default: 30 days ago)
+            since_id: Only return tweets newer than this tweet ID (incremental fetch)
             
         Returns:
-            List of tweet dictionaries
+            List of PostRecord
         """
         try:
             if start_time is None:
                 start_time = datetime.utcnow() - timedelta(days=30)
+            # Whole hours keep the query (and its content cache key) stable between calls
+            start_time = start_time.replace(minute=0, second=0, microsecond=0)
             
             url = f"{self.base_url}/users/{user_id}/tweets"
             params = {
@@ -82,15 +120,34 @@ class TwitterAPIService:
                 'tweet.fields': 'id,text,created_at,public_metrics,lang',
                 'exclude': 'retweets,replies'  # Focus on original tweets
             }
+            if since_id:
+                params['since_id'] = since_id
             
             all_tweets = []
             next_token = None
+            truncated = False
             
             while len(all_tweets) < max_results:
+                if self.deadline.expired:
+                    truncated = True
+                    break
                 if next_token:
                     params['pagination_token'] = next_token
                 
-                response = requests.get(url, headers=self.headers, params=params)
+                try:
+                    with self.recorder.span('fetch_page.tweets'):
+                        response = upstream_request('twitter', 'tweets', 'GET', url, headers=self.headers, params=params,
+                                                    timeout=self.deadline.timeout(), cache_scope=self.cache_scope)
+                except requests.Timeout:
+                    logging.warning(f"Tweets page timed out after {len(all_tweets)} tweets")
+                    truncated = True
+                    break
+                except CircuitOpenError as e:
+                    logging.warning(str(e))
+                    self.circuit_error = e
+                    truncated = True
+                    break
+                self.pages_fetched += 1
                 
                 if response.status_code != 200:
                     logging.error(f"Failed to get tweets: {response.text}")
@@ -98,7 +155,7 @@ class TwitterAPIService:
                 
                 data = response.json()
                 tweets = data.get('data', [])
-                all_tweets.extend(tweets)
+                all_tweets.extend(PostRecord.from_tweet(tweet) for tweet in tweets)
                 
                 # Check for pagination
                 meta = data.get('meta', {})
@@ -107,6 +164,7 @@ class TwitterAPIService:
                 if not next_token or len(all_tweets) >= max_results:
                     break
             
+            self._record_coverage(min(len(all_tweets), max_results), max_results, truncated)
             logging.info(f"Retrieved {len(all_tweets)} tweets for user {user_id}")
             return all_tweets[:max_results]
             
@@ -115,7 +173,7 @@ class TwitterAPIService:
             raise CustomException(f"Failed to get tweets: {str(e)}", sys)
     
     def get_tweets_by_username(self, username: str, max_results: int = 100,
-                               lookback_days: int = 30) -> List[Dict]:
+                               lookback_days: int = 30) -> List[PostRecord]:
         """
         Get tweets by username (convenience method).
         
@@ -125,7 +183,7 @@ class TwitterAPIService:
             lookback_days: Number of days to look back
             
         Returns:
-            List of tweet dictionaries
+            List of PostRecord
         """
         try:
             # Get user info first
@@ -143,7 +201,7 @@ class TwitterAPIService:
             
             return tweets
             
-        except CustomException:
+        except (CustomException, CircuitOpenError):
             raise
         except Exception as e:
             logging.error(f"Error getting tweets by username: {str(e)}")
@@ -5,9 +5,10 @@ import os
 import base64
 import hashlib
 import secrets
-import requests
 from urllib.parse import urlencode, parse_qs
 from flask import session, url_for
+from backend.config import Config
+from backend.services.upstream import upstream_request
 from src.logger import logging
 from src.exception import CustomException
 import sys
@@ -20,8 +21,8 @@ class TwitterOAuthService:
         self.client_secret = client_secret
         self.redirect_uri = redirect_uri
         self.auth_base_url = 'https://twitter.com/i/oauth2/authorize'
-        self.token_url = 'https://api.twitter.com/2/oauth2/token'
-        self.user_info_url = 'https://api.twitter.com/2/users/me'
+        self.token_url = f'{Config.TWITTER_API_BASE_URL}/oauth2/token'
+        self.user_info_url = f'{Config.TWITTER_API_BASE_URL}/users/me'
         
     def generate_code_verifier(self):
         """Generate PKCE code verifier"""
@@ -100,7 +101,7 @@ class TwitterOAuthService:
                 'code_verifier': code_verifier
             }
             
-            response = requests.post(self.token_url, headers=headers, data=data)
+            response = upstream_request('twitter', 'token', 'POST', self.token_url, headers=headers, data=data)
             
             if response.status_code != 200:
                 logging.error(f"Token exchange failed: {response.text}")
@@ -143,7 +144,7 @@ class TwitterOAuthService:
                 'user.fields': 'id,username,name,profile_image_url,description'
             }
             
-            response = requests.get(self.user_info_url, headers=headers, params=params)
+            response = upstream_request('twitter', 'me', 'GET', self.user_info_url, headers=headers, params=params)
             
             if response.status_code != 200:
                 logging.error(f"Failed to get user info: {response.text}")
@@ -190,7 +191,7 @@ class TwitterOAuthService:
                 'client_id': self.client_id
             }
             
-            response = requests.post(self.token_url, headers=headers, data=data)
+            response = upstream_request('twitter', 'token_refresh', 'POST', self.token_url, headers=headers, data=data)
             
             if response.status_code != 200:
                 logging.error(f"Token refresh failed: {response.text}")
@@ -0,0 +1,115 @@
+"""
+Shared HTTP entry point for Twitter/Reddit API calls.
+"""
+import os
+import threading
+import time
+from typing import Optional
+import requests
+from backend.config import Config
+from backend.metrics import observe_upstream
+from backend.services.circuit_breaker import CircuitOpenError, get_breaker
+from backend.services.content_cache import content_cache
+from src.exception import CustomException
+
+# Applied to any call that doesn't pass its own timeout, so no upstream call can hang a worker
+DEFAULT_TIMEOUT = (Config.UPSTREAM_CONNECT_TIMEOUT_SECONDS, Config.UPSTREAM_TIMEOUT_SECONDS)
+
+_session = None
+_session_pid = None
+_session_lock = threading.Lock()
+
+
+class UpstreamNotFoundError(CustomException):
+    """The upstream API answered 404: the requested account does not exist"""
+
+
+def get_session() -> requests.Session:
+    """
+    Process-wide requests.Session so upstream calls reuse pooled keep-alive
+    connections. A forked worker never inherits its parent's sockets: the
+    session is recreated on first use in a new process.
+    """
+    global _session, _session_pid
+    if _session is None or _session_pid != os.getpid():
+        with _session_lock:
+            if _session is None or _session_pid != os.getpid():
+                _session = requests.Session()
+                _session_pid = os.getpid()
+    return _session
+
+
+def reset_session():
+    """Drop the pooled connections (called after fork and on shutdown)"""
+    global _session, _session_pid
+    with _session_lock:
+        if _session is not None and _session_pid == os.getpid():
+            _session.close()
+        _session = None
+        _session_pid = None
+
+
+def cached_response(url: str, body: bytes) -> requests.Response:
+    """A 200 response carrying a page body served from the content cache"""
+    response = requests.Response()
+    response.status_code = 200
+    response.url = url
+    response.encoding = 'utf-8'
+    response.headers['Content-Type'] = 'application/json'
+    response._content = body
+    return response
+
+
+def upstream_request(platform: str, endpoint: str, method: str, url: str,
+                     cache_scope: Optional[str] = None, **kwargs) -> requests.Response:
+    """
+    Issue an upstream API request through the endpoint's circuit breaker and
+    record its latency by platform/endpoint/status.
+
+    Args:
+        platform: 'twitter' or 'reddit'
+        endpoint: Short endpoint name used as a metrics label (e.g. 'posts')
+        method: HTTP method
+        url: Full request URL
+        cache_scope: Serve GETs from (and store 200s in) the shared content
+            cache under this credential scope; None bypasses the cache
+        **kwargs: Passed through to requests.Session.request; `timeout`
+            defaults to DEFAULT_TIMEOUT
+
+    Returns:
+        requests.Response
+
+    Raises:
+        CircuitOpenError: The endpoint's breaker is open and the page isn't cached; no request was sent
+    """
+    cache_key = None
+    if cache_scope is not None and method == 'GET' and content_cache.enabled:
+        cache_key = content_cache.key(platform, endpoint, url, kwargs.get('params'), cache_scope)
+        body = content_cache.get(cache_key, f'upstream_{platform}_{endpoint}')
+        if body is not None:
+            return cached_response(url, body)
+
+    breaker = get_breaker(platform, endpoint)
+    if breaker is not None and not breaker.allow():
+        observe_upstream(platform, endpoint, 'circuit_open', 0.0)
+        raise CircuitOpenError(platform, endpoint, breaker.retry_after())
+
+    if kwargs.get('timeout') is None:
+        kwargs['timeout'] = DEFAULT_TIMEOUT
+    started = time.perf_counter()
+    status = 'error'
+    try:
+        response = get_session().request(method, url, **kwargs)
+        status = response.status_code
+        if cache_key is not None and status == 200 and response.content:
+            content_cache.put(cache_key, response.content)
+        return response
+    except requests.Timeout:
+        status = 'timeout'
+        raise
+    finally:
+        observe_upstream(platform, endpoint, status, time.perf_counter() - started)
+        if breaker is not None:
+            # Server errors, throttling and transport failures count against the
+            # upstream; other 4xx (e.g. unknown user) are the caller's problem
+            breaker.record(isinstance(status, int) and status < 500 and status != 429)
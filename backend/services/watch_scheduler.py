@@ -0,0 +1,434 @@
+"""
+Scheduled re-analysis of watched accounts (the watchlist).
+
+Each watch runs once per interval at a fixed offset within it, derived from the
+account, so a thousand hourly watches spread across the hour instead of all
+falling due on the hour. One scheduler thread per process keeps the watches due
+within the next few minutes in a heap (most overdue first) and hands them to a
+small worker pool, spaced to a maximum start rate. A run claims its watch with a
+lease on the row, so several processes can schedule the same table without
+running a watch twice.
+
+Runs are incremental: only content newer than the last run saw is fetched
+(Twitter since_id, Reddit created_utc) and merged with the posts stored for the
+previous analysis; when nothing new was posted, no new analysis is written.
+Only the latest post set of each watch is kept. Without ANALYSIS_STORE_POSTS no
+posts are stored, so every run fetches the full timeline instead.
+"""
+import hashlib
+import heapq
+import signal
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import delete, insert, or_, select, update
+from backend.config import Config
+from backend.metrics import ANALYSIS_PAGES, WATCHLIST_LAG, WATCHLIST_RUNS
+from backend.models import db, Analysis, AnalysisPost, Watch
+from backend.services.circuit_breaker import CircuitOpenError
+from backend.services.reddit_api import RedditAPIService
+from backend.services.reddit_oauth import RedditOAuthService
+from backend.services.stress_analyzer import StressAnalyzer
+from backend.services.token_refresher import token_refresher
+from backend.services.twitter_api import TwitterAPIService
+from backend.utils.deadline import Deadline
+from src.logger import logging
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def phase_seconds(platform: str, username: str, interval_seconds: int) -> int:
+    """Fixed offset of an account's runs within its interval (stable across processes and restarts)"""
+    digest = hashlib.md5(f'{platform}:{username.lower()}'.encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big') % max(1, interval_seconds)
+
+
+def next_slot(watch: Watch, now: Optional[datetime] = None) -> datetime:
+    """
+    The watch's first run slot strictly after `now`.
+
+    Slots are `phase + k * interval` seconds after the epoch, so the next run
+    keeps its place in the interval however late the previous one started.
+    """
+    now = now or datetime.utcnow()
+    interval = max(60, int(watch.interval_minutes or Config.WATCHLIST_DEFAULT_INTERVAL_MINUTES) * 60)
+    phase = phase_seconds(watch.platform, watch.username, interval)
+    elapsed = (now - _EPOCH).total_seconds()
+    slot = (int((elapsed - phase) // interval) + 1) * interval + phase
+    return _EPOCH + timedelta(seconds=slot)
+
+
+def merge_posts(fresh: List[Dict], previous: List[Dict], platform: str) -> List[Dict]:
+    """
+    Newly fetched posts followed by the previous run's, without duplicates,
+    limited to the lookback window and per-type caps a full fetch would apply.
+
+    Args:
+        fresh: Posts fetched since the last run, newest first
+        previous: Posts stored for the last analysis, newest first
+        platform: 'twitter' or 'reddit'
+    """
+    cutoff = None
+    if platform == 'twitter':
+        cutoff = (datetime.utcnow() - timedelta(days=Config.TWEET_LOOKBACK_DAYS) - _EPOCH).total_seconds()
+        caps = {'tweet': Config.MAX_TWEETS_TO_ANALYZE}
+    else:
+        caps = {'post': Config.MAX_REDDIT_POSTS_TO_ANALYZE, 'comment': Config.MAX_REDDIT_COMMENTS_TO_ANALYZE}
+
+    seen = set()
+    counts = dict.fromkeys(caps, 0)
+    merged = []
+    for post in fresh + previous:
+        post_id = post.get('id')
+        if post_id is not None:
+            if post_id in seen:
+                continue
+            seen.add(post_id)
+        if cutoff is not None:
+            timestamp = StressAnalyzer._post_timestamp(post)
+            if timestamp is not None and timestamp < cutoff:
+                continue
+        content_type = post.get('content_type') or ('tweet' if platform == 'twitter' else 'post')
+        if content_type in caps:
+            if counts[content_type] >= caps[content_type]:
+                continue
+            counts[content_type] += 1
+        merged.append(post)
+
+    if platform == 'reddit':
+        merged.sort(key=lambda post: post.get('created_utc') or 0, reverse=True)
+    return merged
+
+
+class WatchScheduler:
+    """
+    Runs due watches from a heap of (next_run_at, watch id) with a bounded worker pool.
+
+    The heap only holds watches due within `horizon_seconds`; it is refilled from
+    the database every `poll_seconds`, so changes to the table (new, edited or
+    deleted watches, runs by other processes) are picked up within one poll. A
+    watch moved to an earlier time gets a new entry that supersedes its queued
+    one; other stale entries are harmless, as the claim re-checks the row.
+    """
+
+    def __init__(self, workers: int = 2, max_runs_per_minute: float = 60, poll_seconds: float = 30,
+                 horizon_seconds: float = 300, batch_size: int = 500, lease_seconds: float = 120,
+                 retry_seconds: float = 300):
+        self.workers = max(1, workers)
+        self.min_spacing = 60.0 / max_runs_per_minute if max_runs_per_minute > 0 else 0.0
+        self.poll_seconds = poll_seconds
+        self.horizon_seconds = horizon_seconds
+        self.batch_size = batch_size
+        self.lease_seconds = lease_seconds
+        self.retry_seconds = retry_seconds
+        self._heap: List[Tuple[datetime, int]] = []
+        self._queued: Dict[int, datetime] = {}  # Watch id -> due time of its live heap entry
+        self._running = set()
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._executor = None
+
+    # Scheduling loop
+
+    def start(self, app):
+        """Start the scheduler thread and worker pool (no-op if already running)"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._heap, self._queued, self._running, self._in_flight = [], {}, set(), 0
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='watchlist')
+        self._thread = threading.Thread(target=self._loop, args=(app,), name='watch-scheduler', daemon=True)
+        self._thread.start()
+        logging.info(f"Watchlist scheduler started ({self.workers} workers, polling every {self.poll_seconds:.0f}s)")
+
+    def stop(self, timeout: float = 5.0):
+        """Stop scheduling, drop queued runs and wait for in-flight runs to finish"""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        if self._executor is not None:
+            # Queued runs never claimed their watch, so nothing is left leased
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def _loop(self, app):
+        next_poll = 0.0
+        last_start = float('-inf')
+        while not self._stop.is_set():
+            if time.monotonic() >= next_poll:
+                with app.app_context():
+                    try:
+                        self._refill()
+                    except Exception as e:
+                        logging.error(f"Watchlist poll failed: {str(e)}")
+                    finally:
+                        db.session.remove()
+                next_poll = time.monotonic() + self.poll_seconds
+
+            wait = next_poll - time.monotonic()
+            with self._lock:
+                while self._heap and self._in_flight < self.workers and not self._stop.is_set():
+                    due_in = (self._heap[0][0] - datetime.utcnow()).total_seconds()
+                    spacing = last_start + self.min_spacing - time.monotonic()
+                    if due_in > 0 or spacing > 0:
+                        wait = min(wait, max(due_in, spacing))
+                        break
+                    due_at, watch_id = heapq.heappop(self._heap)
+                    if self._queued.get(watch_id) != due_at:
+                        continue  # Superseded by an earlier entry for the same watch
+                    del self._queued[watch_id]
+                    self._running.add(watch_id)
+                    self._in_flight += 1
+                    last_start = time.monotonic()
+                    self._executor.submit(self._run, app, watch_id, due_at)
+            self._wake.wait(max(wait, 0.01))
+            self._wake.clear()
+
+    def _refill(self):
+        """Queue active, unleased watches due within the horizon"""
+        now = datetime.utcnow()
+        rows = db.session.execute(
+            select(Watch.next_run_at, Watch.id)
+            .where(
+                Watch.is_active.is_(True),
+                Watch.next_run_at <= now + timedelta(seconds=self.horizon_seconds),
+                or_(Watch.lease_until.is_(None), Watch.lease_until < now)
+            )
+            .order_by(Watch.next_run_at)
+            .limit(self.batch_size)
+        ).all()
+        with self._lock:
+            for due_at, watch_id in rows:
+                if watch_id in self._running:
+                    continue
+                queued_at = self._queued.get(watch_id)
+                # Re-queue a watch whose next run moved earlier (e.g. shorter interval, resumed)
+                if queued_at is None or due_at < queued_at:
+                    self._queued[watch_id] = due_at
+                    heapq.heappush(self._heap, (due_at, watch_id))
+
+    def _run(self, app, watch_id: int, due_at: datetime):
+        try:
+            if self._stop.is_set():
+                return
+            with app.app_context():
+                try:
+                    self.run_watch(watch_id, due_at)
+                except Exception as e:
+                    logging.error(f"Watch {watch_id} run failed: {str(e)}")
+                finally:
+                    db.session.remove()
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+                self._running.discard(watch_id)
+            self._wake.set()
+
+    # A single run
+
+    def _claim(self, watch_id: int, now: datetime) -> bool:
+        """Lease a due watch unless it was changed, disabled or claimed by another process"""
+        claimed = db.session.execute(
+            update(Watch)
+            .where(
+                Watch.id == watch_id,
+                Watch.is_active.is_(True),
+                Watch.next_run_at <= now,
+                or_(Watch.lease_until.is_(None), Watch.lease_until < now)
+            )
+            .values(lease_until=now + timedelta(seconds=self.lease_seconds))
+        ).rowcount == 1
+        db.session.commit()
+        return claimed
+
+    def run_watch(self, watch_id: int, due_at: Optional[datetime] = None) -> str:
+        """
+        Re-analyze one due watch and schedule its next run.
+
+        Args:
+            watch_id: Watch to run
+            due_at: When it fell due (for the lag metric)
+
+        Returns:
+            Outcome: 'analyzed', 'unchanged', 'empty', 'circuit_open', 'error' or 'skipped'
+        """
+        now = datetime.utcnow()
+        if not self._claim(watch_id, now):
+            return 'skipped'
+        watch = db.session.get(Watch, watch_id)
+        if due_at is not None:
+            WATCHLIST_LAG.observe(max(0.0, (now - due_at).total_seconds()))
+
+        try:
+            result = self._analyze(watch)
+            watch.failures = 0
+            watch.last_error = None if result != 'empty' else 'No content found'
+            watch.last_success_at = now
+            watch.next_run_at = next_slot(watch, now)
+        except CircuitOpenError as e:
+            db.session.rollback()
+            result = 'circuit_open'
+            watch.next_run_at = datetime.utcnow() + timedelta(seconds=e.retry_after + 1)
+            watch.last_error = str(e)[:500]
+        except Exception as e:
+            db.session.rollback()
+            result = 'error'
+            watch.failures = (watch.failures or 0) + 1
+            watch.last_error = str(e)[:500]
+            # Exponential backoff, never later than the regular next slot
+            backoff = self.retry_seconds * 2 ** min(watch.failures - 1, 16)
+            watch.next_run_at = min(datetime.utcnow() + timedelta(seconds=backoff), next_slot(watch, now))
+            logging.warning(f"Watch {watch.id} ({watch.platform}:{watch.username}) failed: {str(e)}")
+
+        watch.last_run_at = now
+        watch.lease_until = None
+        db.session.commit()
+        WATCHLIST_RUNS.labels(watch.platform, result).inc()
+        return result
+
+    def _analyze(self, watch: Watch) -> str:
+        """Fetch what's new for a watch and store an analysis if anything changed"""
+        user = watch.user
+        store_posts = Config.ANALYSIS_STORE_POSTS
+        cursor = (watch.last_seen_id, watch.last_seen_utc)
+        previous = []
+        if store_posts and watch.last_analysis_id:
+            previous = [post.to_post() for post in db.session.execute(
+                select(AnalysisPost).where(AnalysisPost.analysis_id == watch.last_analysis_id).order_by(AnalysisPost.id)
+            ).scalars()]
+        deadline = Deadline(
+            Config.ANALYSIS_BUDGET_SECONDS,
+            max_call_seconds=Config.UPSTREAM_TIMEOUT_SECONDS,
+            max_connect_seconds=Config.UPSTREAM_CONNECT_TIMEOUT_SECONDS
+        )
+
+        if watch.platform == 'twitter':
+            service = TwitterAPIService()
+            if user.is_twitter_connected and user.twitter_access_token:
+                service.set_access_token(token_refresher.ensure_fresh(user, 'twitter'))
+            elif Config.TWITTER_API_BEARER_TOKEN:
+                service = TwitterAPIService(Config.TWITTER_API_BEARER_TOKEN)
+            service.deadline = deadline
+            if not watch.platform_user_id:
+                watch.platform_user_id = service.get_user_by_username(watch.username).get('id')
+            try:
+                fresh = service.get_user_tweets(
+                    watch.platform_user_id,
+                    max_results=Config.MAX_TWEETS_TO_ANALYZE,
+                    start_time=datetime.utcnow() - timedelta(days=Config.TWEET_LOOKBACK_DAYS),
+                    since_id=watch.last_seen_id if previous else None
+                )
+            finally:
+                ANALYSIS_PAGES.labels('twitter').observe(service.pages_fetched)
+            # A fetch cut short by the budget may have skipped older new tweets: keep the cursor
+            if fresh and not service.truncated:
+                watch.last_seen_id = max((tweet['id'] for tweet in fresh if tweet.get('id')),
+                                         key=lambda tweet_id: (len(tweet_id), tweet_id), default=watch.last_seen_id)
+        else:
+            service = RedditAPIService(user_agent=Config.REDDIT_USER_AGENT)
+            if user.is_reddit_connected and user.reddit_access_token:
+                service.set_access_token(token_refresher.ensure_fresh(user, 'reddit'))
+            elif Config.REDDIT_APP_ONLY_AUTH:
+                reddit_oauth = RedditOAuthService(
+                    Config.REDDIT_CLIENT_ID,
+                    Config.REDDIT_CLIENT_SECRET,
+                    Config.REDDIT_REDIRECT_URI
+                )
+                app_token = reddit_oauth.get_app_access_token()
+                if app_token:
+                    service.set_access_token(app_token, app_only=True, renew=reddit_oauth.renew_app_access_token)
+            service.deadline = deadline
+            try:
+                items = service.get_user_content(
+                    watch.username,
+                    include_comments=True,
+                    max_posts=Config.MAX_REDDIT_POSTS_TO_ANALYZE,
+                    max_comments=Config.MAX_REDDIT_COMMENTS_TO_ANALYZE,
+                    since_utc=watch.last_seen_utc if previous else None
+                )
+            finally:
+                ANALYSIS_PAGES.labels('reddit').observe(service.pages_fetched)
+            fresh = [item for item in items if item.text]
+            if items and not service.truncated:
+                newest = max(item.created_utc or 0 for item in items)
+                watch.last_seen_utc = max(newest, watch.last_seen_utc or 0)
+
+        if not fresh and service.circuit_error:
+            raise service.circuit_error
+
+        posts = merge_posts(fresh, previous, watch.platform)
+        if watch.last_analysis_id:
+            if store_posts:
+                unchanged = not fresh and len(posts) == len(previous)
+            else:
+                # Full fetch: nothing new if the newest item is still the one seen last run
+                unchanged = not service.truncated and (watch.last_seen_id, watch.last_seen_utc) == cursor
+            if unchanged:
+                return 'unchanged'
+        if not posts:
+            return 'empty'
+
+        analyzer = StressAnalyzer(
+            timeline_resolution=timedelta(hours=Config.STRESS_TIMELINE_RESOLUTION_HOURS),
+            timeline_window=timedelta(days=Config.STRESS_TIMELINE_WINDOW_DAYS)
+        )
+        result = analyzer.analyze_tweets(posts)
+        result['detailed_metrics']['partial'] = service.truncated
+        result['detailed_metrics']['coverage'] = service.coverage
+        result['detailed_metrics']['incremental'] = {'fetched': len(fresh), 'reused': len(posts) - len(fresh)}
+
+        analysis = Analysis.from_result(user.id, watch.platform, 'scheduled', watch.username, result,
+                                        scorer_version=StressAnalyzer.scorer_version())
+        db.session.add(analysis)
+        db.session.flush()
+        if store_posts:
+            post_rows = AnalysisPost.rows_for(analysis.id, posts,
+                                              default_type='tweet' if watch.platform == 'twitter' else 'post')
+            if post_rows:
+                db.session.execute(insert(AnalysisPost), post_rows)
+        if watch.last_analysis_id:
+            # The new post set supersedes the previous run's; keep one copy per watch
+            db.session.execute(delete(AnalysisPost).where(AnalysisPost.analysis_id == watch.last_analysis_id))
+        watch.last_analysis_id = analysis.id
+        user.last_analysis_at = analysis.analysis_date
+        logging.info(f"Scheduled analysis of {watch.platform}:{watch.username}: {result['stress_category']} "
+                     f"({len(fresh)} new, {len(posts) - len(fresh)} reused posts)")
+        return 'analyzed'
+
+
+watch_scheduler = WatchScheduler(
+    workers=Config.WATCHLIST_WORKERS,
+    max_runs_per_minute=Config.WATCHLIST_MAX_RUNS_PER_MINUTE,
+    poll_seconds=Config.WATCHLIST_POLL_SECONDS,
+    horizon_seconds=Config.WATCHLIST_HORIZON_SECONDS,
+    batch_size=Config.WATCHLIST_BATCH_SIZE,
+    lease_seconds=Config.WATCHLIST_LEASE_SECONDS,
+    retry_seconds=Config.WATCHLIST_RETRY_SECONDS
+)
+
+
+@click.command('run-scheduler')
+@with_appcontext
+def run_scheduler_command():
+    """Run the watchlist scheduler in the foreground until SIGINT/SIGTERM"""
+    app = current_app._get_current_object()
+    stopping = threading.Event()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: stopping.set())
+
+    watch_scheduler.start(app)
+    while not stopping.wait(1.0):
+        pass
+    click.echo('Stopping watchlist scheduler...', err=True)
+    watch_scheduler.stop()
@@ -0,0 +1,52 @@
+"""
+Per-request time budget shared by every upstream call made for one analysis.
+"""
+import math
+import time
+from typing import Optional, Tuple
+
+
+class Deadline:
+    """
+    A time budget that starts when created. Each upstream call takes its
+    timeout from whatever is left, capped per call, so the calls made for one
+    request can never together run much past the budget.
+    """
+
+    __slots__ = ('budget', 'max_call', 'max_connect', 'started')
+
+    # Never hand requests a timeout so small it fails on a healthy connection
+    MIN_CALL_SECONDS = 0.05
+
+    def __init__(self, budget_seconds: Optional[float] = None, max_call_seconds: Optional[float] = None,
+                 max_connect_seconds: Optional[float] = None):
+        self.budget = budget_seconds
+        self.max_call = max_call_seconds
+        self.max_connect = max_connect_seconds
+        self.started = time.monotonic()
+
+    def remaining(self) -> float:
+        """Seconds left in the budget (infinite when unbounded)"""
+        if self.budget is None:
+            return math.inf
+        return max(0.0, self.budget - (time.monotonic() - self.started))
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0.0
+
+    def timeout(self) -> Optional[Tuple[float, float]]:
+        """
+        (connect, read) timeout for the next call, or None when neither a
+        budget nor a per-call cap applies.
+        """
+        read = min(self.remaining(), self.max_call if self.max_call is not None else math.inf)
+        if math.isinf(read):
+            return None
+        read = max(read, self.MIN_CALL_SECONDS)
+        connect = min(read, self.max_connect) if self.max_connect is not None else read
+        return (connect, read)
+
+
+# Services default to this; upstream_request then applies its default timeout
+UNBOUNDED = Deadline()
@@ -0,0 +1,71 @@
+"""
+Compact record for a fetched tweet, Reddit post or Reddit comment.
+"""
+from datetime import datetime
+from typing import Dict, Optional
+
+FIELDS = ('id', 'text', 'created_at', 'created_utc', 'content_type')
+_FIELD_SET = frozenset(FIELDS)
+
+
+class PostRecord:
+    """
+    The fields scoring and storage need, for content from either platform.
+
+    Reads like the post dicts used elsewhere (`post['text']`,
+    `post.get('created_utc')`), so the analyzer, AnalysisPost.rows_for and the
+    archive scorer accept either. `created_at` is formatted from `created_utc`
+    only when read, unless the source supplied one (tweets). As with dict.get,
+    `get` returns the default for unknown keys; it also does for fields that
+    are None.
+    """
+
+    __slots__ = ('id', 'text', 'created_utc', 'content_type', '_created_at')
+
+    def __init__(self, id, text: str, created_utc: Optional[float] = None, content_type: str = 'post',
+                 created_at: Optional[str] = None):
+        self.id = id
+        self.text = text
+        self.created_utc = created_utc
+        self.content_type = content_type
+        self._created_at = created_at
+
+    @property
+    def created_at(self) -> Optional[str]:
+        """ISO creation time as supplied, or derived from created_utc"""
+        if self._created_at is None and self.created_utc:
+            return datetime.fromtimestamp(self.created_utc).isoformat()
+        return self._created_at
+
+    def get(self, key: str, default=None):
+        if key in _FIELD_SET:
+            value = getattr(self, key)
+            return default if value is None else value
+        return default
+
+    def __getitem__(self, key: str):
+        if key in _FIELD_SET:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def to_dict(self) -> Dict:
+        """Plain dict of all fields (derived ones included)"""
+        return {field: getattr(self, field) for field in FIELDS}
+
+    def __repr__(self):
+        return f"PostRecord(id={self.id!r}, content_type={self.content_type!r}, created_utc={self.created_utc!r})"
+
+    @classmethod
+    def from_tweet(cls, tweet: Dict) -> 'PostRecord':
+        """Record for a Twitter API v2 tweet object"""
+        return cls(tweet.get('id'), tweet.get('text', ''), content_type='tweet', created_at=tweet.get('created_at'))
+
+    @classmethod
+    def from_reddit_post(cls, data: Dict) -> 'PostRecord':
+        """Record for a Reddit submission (`data` of a t3 listing child); link posts are scored by title"""
+        return cls(data.get('id'), data.get('selftext') or data.get('title', ''), data.get('created_utc'), 'post')
+
+    @classmethod
+    def from_reddit_comment(cls, data: Dict) -> 'PostRecord':
+        """Record for a Reddit comment (`data` of a t1 listing child)"""
+        return cls(data.get('id'), data.get('body', ''), data.get('created_utc'), 'comment')
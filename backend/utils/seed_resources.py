@@ -188,7 +188,6 @@ def seed_resources():
     print("Resources seeded successfully!")
 
 if __name__ == '__main__':
-    from backend import create_app
+    from backend import create_app, init_database
     app = create_app()
-    with app.app_context():
-        seed_resources()
+    init_database(app, seed=True)
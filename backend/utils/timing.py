@@ -0,0 +1,67 @@
+"""
+Lightweight per-stage span recorder for analysis requests.
+"""
+from contextlib import contextmanager
+from time import perf_counter_ns
+from typing import Dict
+
+
+class SpanRecorder:
+    """Collects (name, start, end) spans in nanoseconds relative to creation"""
+
+    __slots__ = ('origin', 'spans')
+
+    def __init__(self):
+        self.origin = perf_counter_ns()
+        self.spans = []
+
+    @contextmanager
+    def span(self, name: str):
+        """Time the enclosed block as one span"""
+        start = perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.spans.append((name, start, perf_counter_ns()))
+
+    def record(self, name: str, start_ns: int, end_ns: int):
+        """Add a span measured by the caller with perf_counter_ns"""
+        self.spans.append((name, start_ns, end_ns))
+
+    def to_dict(self) -> Dict:
+        """
+        Summarize spans in milliseconds.
+
+        Returns:
+            Dictionary with total elapsed time, per-stage totals (spans sharing
+            a name are summed, nested spans are counted in their parent too)
+            and the ordered span list as [name, offset_ms, duration_ms]
+        """
+        stages = {}
+        spans = []
+        for name, start, end in self.spans:
+            duration = (end - start) / 1e6
+            stages[name] = round(stages.get(name, 0.0) + duration, 3)
+            spans.append([name, round((start - self.origin) / 1e6, 3), round(duration, 3)])
+        spans.sort(key=lambda item: item[1])
+        return {
+            'total_ms': round((perf_counter_ns() - self.origin) / 1e6, 3),
+            'stages': stages,
+            'spans': spans,
+        }
+
+
+class _NullRecorder:
+    """Recorder used when timing is not requested; spans cost one no-op call"""
+
+    __slots__ = ()
+
+    @contextmanager
+    def span(self, name: str):
+        yield
+
+    def record(self, name: str, start_ns: int, end_ns: int):
+        pass
+
+
+NULL_RECORDER = _NullRecorder()
@@ -0,0 +1,55 @@
+"""
+Gunicorn settings for production: pre-fork workers sharing a preloaded app.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Every setting can be overridden from the environment (see backend/README.md).
+"""
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+workers = int(os.getenv('WEB_CONCURRENCY', str(multiprocessing.cpu_count() * 2 + 1)))
+# Threads per worker; DB_POOL_SIZE defaults to the same value
+worker_class = 'gthread'
+threads = int(os.getenv('WEB_THREADS', '4'))
+timeout = int(os.getenv('WEB_TIMEOUT', '60'))
+graceful_timeout = int(os.getenv('WEB_GRACEFUL_TIMEOUT', '30'))
+keepalive = int(os.getenv('WEB_KEEPALIVE', '5'))
+# Recycle workers after this many requests (0 = never), with jitter so they don't restart together
+max_requests = int(os.getenv('WEB_MAX_REQUESTS', '0'))
+max_requests_jitter = max(1, max_requests // 10) if max_requests else 0
+
+# Import the app (and preload models/indexes) in the master, then fork
+preload_app = os.getenv('WEB_PRELOAD', 'True').lower() == 'true'
+
+accesslog = os.getenv('WEB_ACCESS_LOG') or None
+errorlog = '-'
+
+
+def post_fork(server, worker):
+    """Drop connections inherited from the master (only present with preload_app)"""
+    if preload_app:
+        from backend.server import after_fork
+        from wsgi import app
+
+        after_fork(app)
+
+
+def post_worker_init(worker):
+    """Start background threads once the worker has the app loaded"""
+    from backend.server import start_background_tasks
+
+    start_background_tasks(worker.wsgi)
+
+
+def worker_exit(server, worker):
+    from backend.server import stop_background_tasks
+
+    stop_background_tasks()
+
+
+def child_exit(server, worker):
+    from backend.metrics import mark_worker_dead
+
+    mark_worker_dead(worker.pid)
@@ -0,0 +1,315 @@
+"""
+Micro-benchmarks for the scoring engine (StressAnalyzer.analyze_tweet and
+analyze_tweets) with a stored baseline and regression threshold.
+
+Usage:
+    python scripts/benchmark_analyzer.py                       # compare with the baseline
+    python scripts/benchmark_analyzer.py --sizes 1k,100k,1m    # include the 1M-post runs
+    python scripts/benchmark_analyzer.py --update-baseline     # record the current numbers
+
+Corpora are synthetic and generated from fixed seeds:
+    short          tweet-length texts with a realistic mix of stress/calm words
+    long           Reddit-selftext-length texts (150-400 words)
+    dense          short texts packed with stress keywords and negations
+    free           short texts containing no keyword or pattern at all
+
+Ingest cases (ingest/reddit, ingest/twitter; --ingest) time building PostRecords
+from decoded API items, as the fetch services do, for --ingest-posts items.
+
+Each case reports posts/sec (best of at least --repeat runs and --min-time
+seconds), and from a separate
+tracemalloc pass over up to --alloc-posts posts: allocated blocks, peak
+traced memory and gen-0 GC collections, per 1k posts. Corpora reuse a pool of
+--unique distinct texts, so 1M-post lists stay small in memory.
+
+Throughput is compared to the baseline as measured. A CPU calibration loop is
+also recorded (sampled around every case, median of all samples); with
+--scale-by-calibration the baseline throughput is scaled by the calibration
+ratio, which helps when the baseline came from a different machine but adds
+noise on the same one. The exit status is 1 if the
+geometric mean over all cases is slower than the baseline by more than
+--tolerance, or any single case by more than --case-tolerance.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import re
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+# Scoring logs one line per analyze_tweets call; keep it out of the timings
+os.environ.setdefault('LOG_HANDLER', 'none')
+
+BASELINE_PATH = ROOT / 'scripts' / 'analyzer_baseline.json'
+CORPORA = ('short', 'long', 'dense', 'free')
+MODES = ('analyze_tweet', 'analyze_tweets')
+INGEST_PLATFORMS = ('reddit', 'twitter')
+SIZE_SUFFIXES = {'k': 1000, 'm': 1000000}
+
+NEUTRAL_WORDS = (
+    "the a this that my our team project meeting coffee weekend city train book music game code release "
+    "review lunch plan trip photo garden dinner morning evening update news idea question answer friend "
+    "family office design test build data report market movie series walk run bike street park"
+).split()
+FREE_WORDS = [w for w in NEUTRAL_WORDS if w not in ('no', 'not')]
+
+
+def parse_size(text):
+    text = text.strip().lower()
+    if text[-1] in SIZE_SUFFIXES:
+        return int(float(text[:-1]) * SIZE_SUFFIXES[text[-1]])
+    return int(text)
+
+
+def size_label(size):
+    if size % 1000000 == 0:
+        return f'{size // 1000000}m'
+    if size % 1000 == 0:
+        return f'{size // 1000}k'
+    return str(size)
+
+
+def make_text(kind, rng, keywords):
+    """One synthetic text of the given corpus kind"""
+    if kind == 'free':
+        return ' '.join(rng.choice(FREE_WORDS) for _ in range(rng.randint(8, 30)))
+    if kind == 'dense':
+        words = [rng.choice(keywords) for _ in range(rng.randint(6, 12))]
+        words += ["can't", 'never', 'feeling awful', 'why is it wrong', 'hate']
+        rng.shuffle(words)
+        return ' '.join(words)
+    length = rng.randint(8, 30) if kind == 'short' else rng.randint(150, 400)
+    words = []
+    for _ in range(length):
+        roll = rng.random()
+        words.append(rng.choice(keywords) if roll < 0.06 else "don't" if roll < 0.08 else rng.choice(NEUTRAL_WORDS))
+    return ' '.join(words)
+
+
+def build_corpus(kind, size, unique, seed):
+    """List of post dicts (id, text, created_utc); texts cycle through a fixed pool"""
+    from backend.services.stress_analyzer import StressAnalyzer
+
+    keywords = sorted({kw for group in StressAnalyzer.STRESS_KEYWORDS.values() for kw in group})
+    rng = random.Random(f'{seed}:{kind}')
+    pool = [make_text(kind, rng, keywords) for _ in range(min(unique, size))]
+    start = 1.7e9
+    return [{'id': str(i), 'text': pool[i % len(pool)], 'created_utc': start + i * 60} for i in range(size)]
+
+
+def build_items(platform, size, seed):
+    """Decoded API items: Twitter v2 tweets, or Reddit listing children (half posts, half comments)"""
+    from backend.services.stress_analyzer import StressAnalyzer
+
+    keywords = sorted({kw for group in StressAnalyzer.STRESS_KEYWORDS.values() for kw in group})
+    rng = random.Random(f'{seed}:ingest:{platform}')
+    items = []
+    for i in range(size):
+        if platform == 'twitter':
+            tweet_id = str(10 ** 18 - i)
+            items.append({'id': tweet_id, 'text': make_text('short', rng, keywords),
+                          'created_at': '2024-01-01T12:00:00.000Z', 'lang': 'en', 'edit_history_tweet_ids': [tweet_id],
+                          'public_metrics': {'retweet_count': 1, 'reply_count': 2, 'like_count': 3, 'quote_count': 0}})
+            continue
+        data = {'id': f'x{i}', 'name': f't3_x{i}', 'author': 'someone', 'subreddit': 'test', 'score': i % 50,
+                'ups': i % 50, 'num_comments': i % 7, 'created_utc': 1.7e9 - i * 600, 'permalink': f'/r/test/{i}/',
+                'url': f'https://reddit.com/r/test/{i}', 'is_self': True, 'link_flair_text': None, 'over_18': False,
+                'edited': False, 'stickied': False}
+        if i % 2:
+            data.update(body=make_text('short', rng, keywords), link_id=f't3_{i}')
+            items.append({'kind': 't1', 'data': data})
+        else:
+            data.update(title=make_text('short', rng, keywords), selftext=make_text('long', rng, keywords))
+            items.append({'kind': 't3', 'data': data})
+    return items
+
+
+def ingest(platform, items):
+    """PostRecords for decoded API items, built as the fetch services build them"""
+    from backend.utils.post_record import PostRecord
+
+    if platform == 'twitter':
+        return [PostRecord.from_tweet(tweet) for tweet in items]
+    return [PostRecord.from_reddit_post(child['data']) if child['kind'] == 't3'
+            else PostRecord.from_reddit_comment(child['data']) for child in items]
+
+
+def calibrate(rounds=5):
+    """Ops/sec of a fixed pure-Python string/regex workload, one sample per round"""
+    pattern = re.compile(r'\b(no|not|never)\b')
+    texts = [f'item {i} is not quite what we expected, never mind' for i in range(5000)]
+    rates = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        hits = 0
+        for text in texts:
+            lower = text.lower()
+            hits += ('expected' in lower) + bool(pattern.search(lower))
+        rates.append(len(texts) / (time.perf_counter() - started))
+    return rates
+
+
+def run_mode(analyzer, mode, posts):
+    if mode.startswith('ingest/'):
+        ingest(mode.split('/', 1)[1], posts)
+    elif mode == 'analyze_tweet':
+        for post in posts:
+            analyzer.analyze_tweet(post['text'])
+    else:
+        analyzer.analyze_tweets(posts)
+
+
+def measure(analyzer, mode, posts, repeat, min_time, alloc_posts, calibration):
+    """Throughput and allocation figures for one case; appends calibration samples"""
+    calibration.extend(calibrate())
+    best = 0.0
+    runs = 0
+    spent = 0.0
+    # At least `repeat` runs, and keep going until `min_time` is spent (small cases finish in ms)
+    while runs < repeat or spent < min_time:
+        gc.collect()
+        started = time.perf_counter()
+        run_mode(analyzer, mode, posts)
+        elapsed = time.perf_counter() - started
+        best = max(best, len(posts) / elapsed)
+        runs += 1
+        spent += elapsed
+
+    calibration.extend(calibrate())
+
+    sample = posts[:alloc_posts]
+    gc.collect()
+    gen0_before = gc.get_stats()[0]['collections']
+    tracemalloc.start()
+    blocks_before = sys.getallocatedblocks()
+    run_mode(analyzer, mode, sample)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    gen0 = gc.get_stats()[0]['collections'] - gen0_before
+    per_1k = 1000 / len(sample)
+    return {
+        'posts': len(posts),
+        'runs': runs,
+        'posts_per_second': round(best, 1),
+        'alloc_sample_posts': len(sample),
+        'peak_kb_per_1k_posts': round(peak / 1024 * per_1k, 1),
+        'retained_blocks_per_1k_posts': round((sys.getallocatedblocks() - blocks_before) * per_1k, 1),
+        'gc_gen0_per_1k_posts': round(gen0 * per_1k, 2),
+    }
+
+
+def print_case(case, stats):
+    print(f"{case:>32}: {stats['posts_per_second']:>12} posts/s  "
+          f"peak {stats['peak_kb_per_1k_posts']:>9} KB/1k  "
+          f"gen0 GCs {stats['gc_gen0_per_1k_posts']:>6}/1k", file=sys.stderr)
+
+
+def compare(results, baseline, tolerance, case_tolerance, scale_by_calibration=False):
+    """Throughput check against the baseline; returns (lines, regressed)"""
+    ratio = results['calibration_ops_per_second'] / baseline['calibration_ops_per_second']
+    scale = ratio if scale_by_calibration else 1.0
+    lines = [f"calibration: baseline {baseline['calibration_ops_per_second']} ops/s, now "
+             f"{results['calibration_ops_per_second']} ops/s (x{ratio:.2f}, "
+             f"{'applied' if scale_by_calibration else 'not applied'})"]
+    ratios = []
+    regressed = False
+    for case, current in results['cases'].items():
+        before = baseline['cases'].get(case)
+        if before is None:
+            lines.append(f"{case:>32}: no baseline")
+            continue
+        expected = before['posts_per_second'] * scale
+        ratio = current['posts_per_second'] / expected
+        ratios.append(ratio)
+        bad = ratio - 1 < -case_tolerance
+        regressed = regressed or bad
+        lines.append(f"{case:>32}: {current['posts_per_second']:>12} posts/s vs {expected:>12.1f} expected "
+                     f"({ratio - 1:+.1%}){'  REGRESSION' if bad else ''}")
+    if ratios:
+        overall = statistics.geometric_mean(ratios) - 1
+        bad = overall < -tolerance
+        regressed = regressed or bad
+        lines.append(f"{'geometric mean':>32}: {overall:+.1%}{'  REGRESSION' if bad else ''}")
+    return lines, regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='1k,100k', help='comma-separated post counts (k/m suffixes)')
+    parser.add_argument('--corpora', default=','.join(CORPORA))
+    parser.add_argument('--modes', default=','.join(MODES))
+    parser.add_argument('--repeat', type=int, default=3, help='minimum timed runs per case (best is kept)')
+    parser.add_argument('--min-time', type=float, default=2.0, help='minimum seconds of timed runs per case')
+    parser.add_argument('--unique', type=int, default=20000, help='distinct texts per corpus')
+    parser.add_argument('--alloc-posts', type=int, default=10000, help='posts in the tracemalloc pass')
+    parser.add_argument('--ingest', default=','.join(INGEST_PLATFORMS),
+                        help="platforms for the ingest cases ('' to skip)")
+    parser.add_argument('--ingest-posts', type=int, default=1000, help='items per ingest case')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--tolerance', type=float, default=0.15,
+                        help='allowed relative drop of the geometric-mean throughput')
+    parser.add_argument('--case-tolerance', type=float, default=0.35,
+                        help='allowed relative throughput drop of any single case')
+    parser.add_argument('--scale-by-calibration', action='store_true',
+                        help='scale baseline throughput by the calibration ratio (baseline from another machine)')
+    parser.add_argument('--baseline', default=str(BASELINE_PATH))
+    parser.add_argument('--update-baseline', action='store_true', help='write results as the new baseline')
+    args = parser.parse_args()
+
+    from backend.services.stress_analyzer import StressAnalyzer
+
+    analyzer = StressAnalyzer()
+    results = {
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'seed': args.seed,
+        'unique': args.unique,
+        'cases': {},
+    }
+    calibration = []
+    for size in (parse_size(s) for s in args.sizes.split(',')):
+        for kind in args.corpora.split(','):
+            posts = build_corpus(kind, size, args.unique, args.seed)
+            for mode in args.modes.split(','):
+                case = f'{mode}/{kind}/{size_label(size)}'
+                # Large runs are slow enough to time once
+                repeat = args.repeat if size < 100000 else 1
+                results['cases'][case] = measure(analyzer, mode, posts, repeat, args.min_time,
+                                                   args.alloc_posts, calibration)
+                print_case(case, results['cases'][case])
+            del posts
+    for source in filter(None, args.ingest.split(',')):
+        case = f'ingest/{source}/{size_label(args.ingest_posts)}'
+        results['cases'][case] = measure(analyzer, f'ingest/{source}', build_items(source, args.ingest_posts, args.seed),
+                                         args.repeat, args.min_time, args.alloc_posts, calibration)
+        print_case(case, results['cases'][case])
+
+    results['calibration_ops_per_second'] = round(statistics.median(calibration), 1)
+    print(json.dumps(results, indent=2))
+
+    baseline_path = Path(args.baseline)
+    if args.update_baseline:
+        baseline_path.write_text(json.dumps(results, indent=2) + '\n')
+        print(f"Baseline written to {baseline_path}", file=sys.stderr)
+        return
+    if not baseline_path.exists():
+        print(f"No baseline at {baseline_path}; run with --update-baseline", file=sys.stderr)
+        return
+    lines, regressed = compare(results, json.loads(baseline_path.read_text()), args.tolerance,
+                                args.case_tolerance, args.scale_by_calibration)
+    for line in lines:
+        print(line, file=sys.stderr)
+    if regressed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
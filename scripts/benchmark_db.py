@@ -0,0 +1,187 @@
+"""
+Benchmark mixed analysis-history reads and Analysis writes against SQLite,
+comparing the untuned engine (baseline) with the DB tuning profile (tuned).
+
+Usage:
+    python scripts/benchmark_db.py --workers 8 --ops 200 --write-ratio 0.3
+
+Each profile runs on a fresh database file, once with threads sharing one app
+and once with separate processes each building their own app.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+PROFILES = {
+    'baseline': {'DB_TUNING_ENABLED': 'false'},
+    'tuned': {'DB_TUNING_ENABLED': 'true'},
+}
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def run_ops(app, user_id, ops, write_ratio, seed):
+    """Run a read/write mix for one worker; returns (latencies_ms, errors, elapsed_s)"""
+    from backend.models import db, Analysis
+
+    rng = random.Random(seed)
+    latencies = []
+    errors = 0
+
+    with app.app_context():
+        started = time.perf_counter()
+        for _ in range(ops):
+            start = time.perf_counter()
+            try:
+                if rng.random() < write_ratio:
+                    db.session.add(Analysis(
+                        user_id=user_id,
+                        platform='reddit',
+                        analysis_type='manual',
+                        username_analyzed='benchmark',
+                        stress_level=rng.random(),
+                        stress_category='moderate',
+                        confidence_score=0.8,
+                        total_posts_analyzed=100,
+                        posts_with_stress_indicators=rng.randint(0, 100),
+                        average_sentiment=0.5,
+                        detailed_metrics={'total_stress_score': rng.random() * 100},
+                        content_samples=[],
+                        processing_time_seconds=0.01,
+                    ))
+                    db.session.commit()
+                else:
+                    rows = Analysis.query.filter_by(user_id=user_id)\
+                        .order_by(Analysis.analysis_date.desc())\
+                        .limit(10)\
+                        .all()
+                    [row.to_dict() for row in rows]
+                    db.session.commit()
+            except Exception:
+                errors += 1
+                db.session.rollback()
+            latencies.append((time.perf_counter() - start) * 1000)
+        elapsed = time.perf_counter() - started
+        db.session.remove()
+
+    return latencies, errors, elapsed
+
+
+def create_user(app, name):
+    from backend.models import db, User
+
+    with app.app_context():
+        user = User(username=name, is_oauth_connected=False)
+        db.session.add(user)
+        db.session.commit()
+        return user.id
+
+
+def process_worker(args):
+    """Entry point for process mode: each process builds its own app"""
+    index, ops, write_ratio = args
+    from backend import create_app
+
+    app = create_app('production')
+    user_id = create_user(app, f'bench_p{index}')
+    return run_ops(app, user_id, ops, write_ratio, seed=index)
+
+
+def run_profile(mode, workers, ops, write_ratio):
+    """Run one mode in this process (environment already selects the profile)"""
+    from backend import create_app, init_database
+
+    results = []
+
+    if mode == 'threads':
+        app = create_app('production')
+        init_database(app)
+        user_ids = [create_user(app, f'bench_t{i}') for i in range(workers)]
+
+        def target(i):
+            results.append(run_ops(app, user_ids[i], ops, write_ratio, seed=i))
+
+        threads = [threading.Thread(target=target, args=(i,)) for i in range(workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    else:
+        # Build the schema once up front so workers don't race on CREATE TABLE
+        init_database(create_app('production'))
+        ctx = multiprocessing.get_context('spawn')
+        with ctx.Pool(workers) as pool:
+            results = pool.map(process_worker, [(i, ops, write_ratio) for i in range(workers)])
+
+    # Workers overlap; the slowest one bounds the wall time (process startup excluded)
+    elapsed = max(worker_elapsed for _, _, worker_elapsed in results)
+    latencies = sorted(lat for worker_lat, _, _ in results for lat in worker_lat)
+    errors = sum(err for _, err, _ in results)
+
+    return {
+        'mode': mode,
+        'workers': workers,
+        'operations': len(latencies),
+        'errors': errors,
+        'ops_per_second': round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        'p50_ms': round(percentile(latencies, 50), 3),
+        'p99_ms': round(percentile(latencies, 99), 3),
+        'max_ms': round(latencies[-1], 3) if latencies else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--ops', type=int, default=200, help='operations per worker')
+    parser.add_argument('--write-ratio', type=float, default=0.3)
+    parser.add_argument('--modes', default='threads,processes')
+    parser.add_argument('--profiles', default='baseline,tuned')
+    parser.add_argument('--child', metavar='MODE', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_profile(args.child, args.workers, args.ops, args.write_ratio)))
+        return
+
+    report = []
+    for profile in args.profiles.split(','):
+        for mode in args.modes.split(','):
+            with tempfile.TemporaryDirectory() as tmp:
+                env = dict(os.environ, **PROFILES[profile])
+                env['DATABASE_URL'] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+                output = subprocess.run(
+                    [sys.executable, __file__, '--child', mode,
+                     '--workers', str(args.workers), '--ops', str(args.ops),
+                     '--write-ratio', str(args.write_ratio)],
+                    env=env, cwd=tmp, capture_output=True, text=True, check=True
+                ).stdout
+                result = json.loads(output.strip().splitlines()[-1])
+                result['profile'] = profile
+                report.append(result)
+                print(f"{profile:>8} {mode:>9}: {result['ops_per_second']:>8} ops/s  "
+                      f"p50 {result['p50_ms']:>7} ms  p99 {result['p99_ms']:>8} ms  "
+                      f"errors {result['errors']}", file=sys.stderr)
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
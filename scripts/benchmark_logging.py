@@ -0,0 +1,161 @@
+"""
+Benchmark request latency of /api/analysis/analyze with logging off, with the
+old synchronous file handler, and with the queue-based handler.
+
+Usage:
+    python scripts/benchmark_logging.py --workers 4 --requests 50 --posts 200
+
+Upstream Reddit calls are answered in-process with canned listings so the
+numbers reflect our own request path (scoring, persistence and logging), not
+the network. Each profile runs in a fresh subprocess with its own database and
+log directory, since src.logger configures handlers at import time.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+PROFILES = {
+    'off': {'LOG_HANDLER': 'none'},
+    'sync': {'LOG_HANDLER': 'sync'},
+    'queue': {'LOG_HANDLER': 'queue'},
+    'queue_json': {'LOG_HANDLER': 'queue', 'LOG_STYLE': 'json'},
+    'queue_throttled': {'LOG_HANDLER': 'queue', 'LOG_RATE_LIMIT': '20', 'LOG_RATE_WINDOW': '1'},
+}
+
+TEXTS = [
+    'so anxious and tired, the deadline is tomorrow',
+    'feeling calm after a long walk',
+    'overwhelmed and stressed, I hate this week',
+    'great coffee with friends today',
+]
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class CannedResponse:
+    def __init__(self, data):
+        self.status_code = 200
+        self.headers = {}
+        self._data = data
+        self.text = json.dumps(data)
+
+    def json(self):
+        return self._data
+
+
+def install_fake_reddit(posts):
+    """Answer Reddit API calls from memory with `posts` submissions per user"""
+    import requests
+
+    submissions = {'data': {'after': None, 'children': [
+        {'data': {'id': f'p{i}', 'title': 'update', 'selftext': TEXTS[i % len(TEXTS)],
+                  'created_utc': 1.7e9 + i * 3600}}
+        for i in range(posts)
+    ]}}
+    empty = {'data': {'after': None, 'children': []}}
+    about = {'data': {'id': 'bench', 'name': 'bench', 'total_karma': 1}}
+
+    def fake_request(session, method, url, **kwargs):
+        if 'about' in url:
+            return CannedResponse(about)
+        if 'submitted' in url:
+            return CannedResponse(submissions)
+        return CannedResponse(empty)
+
+    requests.Session.request = fake_request
+
+
+def run_profile(workers, count, posts):
+    """Run the request mix in this process (environment already selects the profile)"""
+    install_fake_reddit(posts)
+    from backend import create_app, init_database
+
+    app = create_app('production')
+    init_database(app)
+    results = []
+
+    def target(index):
+        client = app.test_client()
+        client.post('/api/auth/reddit/manual', json={'username': f'bench_{index}'})
+        latencies = []
+        errors = 0
+        for _ in range(count):
+            start = time.perf_counter()
+            response = client.post('/api/analysis/analyze', json={'username': 'bench', 'platform': 'reddit'})
+            latencies.append((time.perf_counter() - start) * 1000)
+            errors += response.status_code != 200
+        results.append((latencies, errors))
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=target, args=(i,)) for i in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(lat for worker_lat, _ in results for lat in worker_lat)
+    return {
+        'requests': len(latencies),
+        'errors': sum(err for _, err in results),
+        'requests_per_second': round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        'p50_ms': round(percentile(latencies, 50), 3),
+        'p99_ms': round(percentile(latencies, 99), 3),
+        'max_ms': round(latencies[-1], 3) if latencies else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--requests', type=int, default=50, help='requests per worker')
+    parser.add_argument('--posts', type=int, default=200, help='posts returned per analysis')
+    parser.add_argument('--profiles', default=','.join(PROFILES))
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_profile(args.workers, args.requests, args.posts)))
+        return
+
+    report = []
+    for profile in args.profiles.split(','):
+        with tempfile.TemporaryDirectory() as tmp:
+            env = dict(os.environ, **PROFILES[profile])
+            env['DATABASE_URL'] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+            env['LOG_DIR'] = os.path.join(tmp, 'logs')
+            output = subprocess.run(
+                [sys.executable, __file__, '--child', '--workers', str(args.workers),
+                 '--requests', str(args.requests), '--posts', str(args.posts)],
+                env=env, cwd=tmp, capture_output=True, text=True, check=True
+            ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            result['profile'] = profile
+            log_bytes = sum(f.stat().st_size for f in Path(env['LOG_DIR']).rglob('*') if f.is_file()) \
+                if os.path.isdir(env['LOG_DIR']) else 0
+            result['log_bytes'] = log_bytes
+            report.append(result)
+            print(f"{profile:>16}: {result['requests_per_second']:>7} req/s  "
+                  f"p50 {result['p50_ms']:>8} ms  p99 {result['p99_ms']:>8} ms  "
+                  f"log {log_bytes:>9} B  errors {result['errors']}", file=sys.stderr)
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
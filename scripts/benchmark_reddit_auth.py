@@ -0,0 +1,199 @@
+"""
+Compare manual Reddit analyses over the unauthenticated www.reddit.com JSON
+endpoints with the application-only token on oauth.reddit.com.
+
+Usage:
+    python scripts/benchmark_reddit_auth.py --rate 2 --clients 4 --duration 15
+
+Reddit is replaced in-process by a stand-in that enforces a token-bucket rate
+limit per host (answering 429 when empty) and adds per-host latency. Defaults
+keep Reddit's ~10x quota gap between anonymous and OAuth clients, scaled from
+per-minute to per-second so a run takes seconds, not hours. Analyses are
+offered at a fixed --rate (spread over --clients), like real user traffic.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+PROFILES = {
+    'anonymous': {'REDDIT_APP_ONLY_AUTH': 'false'},
+    'app_only': {'REDDIT_APP_ONLY_AUTH': 'true'},
+}
+
+
+class TokenBucket:
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def take(self):
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+
+class StandInResponse:
+    def __init__(self, status_code, data, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self._data = data
+        self.text = json.dumps(data)
+
+    def json(self):
+        return self._data
+
+
+def install_stand_in(args, counters):
+    """Route requests.Session.request to an in-memory, rate-limited Reddit"""
+    import requests
+
+    hosts = {
+        'www.reddit.com': (TokenBucket(args.anon_rps, args.anon_rps * 2), args.anon_latency),
+        'oauth.reddit.com': (TokenBucket(args.oauth_rps, args.oauth_rps * 2), args.oauth_latency),
+    }
+    listing = {'data': {'after': None, 'children': [
+        {'data': {'id': f'p{i}', 'title': 'update', 'selftext': 'so tired of this deadline pressure',
+                  'body': 'feeling calm today', 'created_utc': 1.7e9 + i * 3600}}
+        for i in range(25)
+    ]}}
+    lock = threading.Lock()
+
+    def count(key):
+        with lock:
+            counters[key] = counters.get(key, 0) + 1
+
+    def stand_in(session, method, url, **kwargs):
+        if url.endswith('/api/v1/access_token'):
+            count('token_requests')
+            return StandInResponse(200, {'access_token': 'app-token', 'expires_in': 86400, 'token_type': 'bearer'})
+
+        host = url.split('/')[2]
+        bucket, latency = hosts[host]
+        count('upstream_calls')
+        time.sleep(latency)
+        if not bucket.take():
+            count('rate_limited')
+            return StandInResponse(429, {'message': 'Too Many Requests'}, {'x-ratelimit-remaining': '0'})
+        if url.endswith('/about.json'):
+            return StandInResponse(200, {'data': {'id': 'bench', 'name': 'bench'}})
+        return StandInResponse(200, listing)
+
+    requests.Session.request = stand_in
+
+
+def run_profile(args):
+    """Drive manual Reddit analyses in this process (environment selects the profile)"""
+    counters = {}
+    install_stand_in(args, counters)
+    from backend import create_app, init_database
+
+    app = create_app('production')
+    init_database(app)
+    outcomes = {}
+    lock = threading.Lock()
+    stop_at = time.monotonic() + args.duration
+
+    interval = args.clients / args.rate
+
+    def client(index):
+        http = app.test_client()
+        http.post('/api/auth/reddit/manual', json={'username': f'bench_{index}'})
+        next_at = time.monotonic() + index * interval / args.clients
+        while True:
+            time.sleep(max(0.0, next_at - time.monotonic()))
+            if time.monotonic() >= stop_at:
+                break
+            next_at += interval
+            response = http.post('/api/analysis/analyze', json={'username': 'bench', 'platform': 'reddit'})
+            body = response.get_json() or {}
+            if response.status_code == 200 and not body.get('stale'):
+                posts = body['analysis']['total_posts_analyzed']
+                outcome = 'complete' if posts >= args.expected_posts else 'incomplete'
+            else:
+                outcome = 'stale' if body.get('stale') else f'http_{response.status_code}'
+            with lock:
+                outcomes[outcome] = outcomes.get(outcome, 0) + 1
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(args.clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    calls = counters.get('upstream_calls', 0)
+    return {
+        'analyses': sum(outcomes.values()),
+        'outcomes': outcomes,
+        'complete_per_second': round(outcomes.get('complete', 0) / elapsed, 2),
+        'upstream_calls': calls,
+        'rate_limited_share': round(counters.get('rate_limited', 0) / calls, 3) if calls else 0.0,
+        'token_requests': counters.get('token_requests', 0),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rate', type=float, default=2.0, help='analyses offered per second')
+    parser.add_argument('--clients', type=int, default=4)
+    parser.add_argument('--duration', type=float, default=15.0)
+    parser.add_argument('--anon-rps', type=float, default=1.0, help='www.reddit.com requests/sec')
+    parser.add_argument('--oauth-rps', type=float, default=10.0, help='oauth.reddit.com requests/sec')
+    parser.add_argument('--anon-latency', type=float, default=0.12)
+    parser.add_argument('--oauth-latency', type=float, default=0.05)
+    parser.add_argument('--expected-posts', type=int, default=50, help='posts + comments in a complete analysis')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_profile(args)))
+        return
+
+    report = []
+    for profile, overrides in PROFILES.items():
+        with tempfile.TemporaryDirectory() as tmp:
+            env = dict(os.environ, **overrides)
+            env.update({
+                'DATABASE_URL': f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+                'LOG_DIR': os.path.join(tmp, 'logs'),
+                'REDDIT_CLIENT_ID': 'bench-client',
+                'REDDIT_CLIENT_SECRET': 'bench-secret',
+                'MAX_REDDIT_POSTS_TO_ANALYZE': '25',
+                'MAX_REDDIT_COMMENTS_TO_ANALYZE': '25',
+                # Measure the quotas themselves, not the breaker's fast-fail
+                'CIRCUIT_BREAKER_ENABLED': 'false',
+            })
+            output = subprocess.run(
+                [sys.executable, __file__, '--child'] + sys.argv[1:],
+                env=env, cwd=tmp, capture_output=True, text=True, check=True
+            ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            result['profile'] = profile
+            report.append(result)
+            print(f"{profile:>10}: {result['complete_per_second']:>6} complete analyses/s  "
+                  f"429 share {result['rate_limited_share']:>6}  outcomes {result['outcomes']}  "
+                  f"token requests {result['token_requests']}", file=sys.stderr)
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,192 @@
+"""
+Start the production server (gunicorn.conf.py + wsgi.py) with and without
+preloading, drive a read-heavy endpoint mix, and report requests/sec and
+memory per worker.
+
+Usage:
+    python scripts/benchmark_server.py --workers 4 --clients 8 --duration 10
+
+Memory comes from /proc/<pid>/smaps_rollup (Linux): RSS counts shared pages
+in full, PSS splits them between the processes sharing them and USS is memory
+private to the worker, i.e. what each extra worker really costs.
+"""
+import argparse
+import http.client
+import json
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+PATHS = [
+    '/api/health',
+    '/api/resources/',
+    '/api/resources/facets?type=blog',
+    '/api/resources/search?q=stress',
+    '/api/resources/categories',
+]
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def smaps_rollup(pid):
+    """Return {'rss_kb', 'pss_kb', 'uss_kb'} for a process"""
+    fields = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[1].isdigit():
+                fields[parts[0].rstrip(':')] = int(parts[1])
+    return {
+        'rss_kb': fields.get('Rss', 0),
+        'pss_kb': fields.get('Pss', 0),
+        'uss_kb': fields.get('Private_Clean', 0) + fields.get('Private_Dirty', 0),
+    }
+
+
+def worker_pids(master_pid):
+    with open(f'/proc/{master_pid}/task/{master_pid}/children') as f:
+        return [int(pid) for pid in f.read().split()]
+
+
+def wait_ready(port, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=2)
+            conn.request('GET', '/api/health')
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError('server did not become ready')
+
+
+def drive(port, clients, duration):
+    """Closed-loop load: each client thread sends the next request as soon as the last returns"""
+    latencies = []
+    errors = []
+    stop_at = time.monotonic() + duration
+
+    def client(index):
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        mine, failed, i = [], 0, index
+        while time.monotonic() < stop_at:
+            path = PATHS[i % len(PATHS)]
+            i += 1
+            start = time.perf_counter()
+            try:
+                conn.request('GET', path)
+                response = conn.getresponse()
+                response.read()
+                failed += response.status >= 400
+            except (OSError, http.client.HTTPException):
+                failed += 1
+                conn.close()
+                conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+            mine.append((time.perf_counter() - start) * 1000)
+        latencies.extend(mine)
+        errors.append(failed)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'errors': sum(errors),
+        'requests_per_second': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(percentile(latencies, 50), 3),
+        'p99_ms': round(percentile(latencies, 99), 3),
+    }
+
+
+def run_server(preload, args, tmp):
+    env = dict(os.environ)
+    env.update({
+        'DATABASE_URL': f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+        'LOG_DIR': os.path.join(tmp, 'logs'),
+        'FLASK_ENV': 'production',
+        'PORT': str(args.port),
+        'WEB_CONCURRENCY': str(args.workers),
+        'WEB_THREADS': str(args.threads),
+        'WEB_PRELOAD': 'true' if preload else 'false',
+        'SECRET_KEY': 'benchmark',
+    })
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app'],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        wait_ready(args.port)
+        # Touch every worker's code paths once before measuring
+        drive(args.port, args.clients, 1)
+        result = drive(args.port, args.clients, args.duration)
+
+        workers = [smaps_rollup(pid) for pid in worker_pids(server.pid)]
+        master = smaps_rollup(server.pid)
+        result.update({
+            'preload': preload,
+            'workers': len(workers),
+            'master_rss_mb': round(master['rss_kb'] / 1024, 1),
+            'worker_rss_mb': round(sum(w['rss_kb'] for w in workers) / len(workers) / 1024, 1),
+            'worker_pss_mb': round(sum(w['pss_kb'] for w in workers) / len(workers) / 1024, 1),
+            'worker_uss_mb': round(sum(w['uss_kb'] for w in workers) / len(workers) / 1024, 1),
+            'total_pss_mb': round((master['pss_kb'] + sum(w['pss_kb'] for w in workers)) / 1024, 1),
+        })
+        return result
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--port', type=int, default=5099)
+    args = parser.parse_args()
+
+    report = []
+    for preload in (False, True):
+        with tempfile.TemporaryDirectory() as tmp:
+            os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+            subprocess.run(
+                [sys.executable, '-c', 'from backend import create_app, init_database; '
+                 'init_database(create_app("production"), seed=True)'],
+                cwd=ROOT, env=dict(os.environ, LOG_DIR=os.path.join(tmp, 'logs')),
+                check=True, capture_output=True
+            )
+            result = run_server(preload, args, tmp)
+            report.append(result)
+            print(f"preload={str(preload):>5}: {result['requests_per_second']:>7} req/s  "
+                  f"p50 {result['p50_ms']:>7} ms  p99 {result['p99_ms']:>8} ms  "
+                  f"worker RSS {result['worker_rss_mb']} MB  PSS {result['worker_pss_mb']} MB  "
+                  f"USS {result['worker_uss_mb']} MB  total PSS {result['total_pss_mb']} MB",
+                  file=sys.stderr)
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+"""
+Measure worker cold start (import `backend` + create_app) and enforce a budget.
+
+Usage:
+    python scripts/benchmark_startup.py --runs 5 --budget-ms 800
+
+Each run is a fresh interpreter started with `python -X importtime`. The script
+reports the median wall time of import + create_app('production'), the
+cumulative import time of `backend`, and the slowest top-level imports, and
+exits non-zero if the median exceeds the budget or a module listed in
+--forbid (heavy dependencies that must stay lazy) was imported at start-up.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+CHILD = """
+import time
+started = time.perf_counter()
+import backend
+app = backend.create_app('production')
+print(round((time.perf_counter() - started) * 1000, 3))
+"""
+
+
+def parse_importtime(stderr):
+    """Return {module: (self_us, cumulative_us, depth)} from -X importtime output"""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        # One space follows the '|'; each nesting level adds two more
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        modules[name.strip()] = (int(self_us), int(cumulative_us), depth)
+    return modules
+
+
+def run_once(env):
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', CHILD],
+        env=env, cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    return float(result.stdout.strip().splitlines()[-1]), parse_importtime(result.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--budget-ms', type=float, default=800.0)
+    parser.add_argument('--forbid', default='pandas,joblib,numpy',
+                        help='comma-separated modules that must not load at start-up')
+    parser.add_argument('--top', type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ)
+        env['DATABASE_URL'] = f"sqlite:///{os.path.join(tmp, 'startup.db')}"
+        env['LOG_DIR'] = os.path.join(tmp, 'logs')
+        env.pop('DB_AUTO_CREATE', None)
+        env['PYTHONPATH'] = os.pathsep.join(filter(None, [str(ROOT), env.get('PYTHONPATH')]))
+
+        # One warm-up run so the first measurement doesn't include .pyc compilation
+        run_once(env)
+        runs = [run_once(env) for _ in range(args.runs)]
+
+    wall_ms = statistics.median(wall for wall, _ in runs)
+    modules = runs[-1][1]
+    backend_ms = statistics.median(run[1].get('backend', (0, 0, 0))[1] for run in runs) / 1000
+
+    top_level = sorted(
+        ((name, cumulative / 1000) for name, (_, cumulative, depth) in modules.items() if depth == 1),
+        key=lambda item: -item[1]
+    )[:args.top]
+    forbidden = sorted(
+        name for name in modules
+        if name.split('.')[0] in {module.strip() for module in args.forbid.split(',') if module.strip()}
+    )
+    forbidden_roots = sorted({name.split('.')[0] for name in forbidden})
+
+    report = {
+        'runs': args.runs,
+        'startup_ms_median': round(wall_ms, 1),
+        'backend_import_ms_median': round(backend_ms, 1),
+        'budget_ms': args.budget_ms,
+        'top_imports_ms': [[name, round(ms, 1)] for name, ms in top_level],
+        'forbidden_imported': forbidden_roots,
+    }
+    print(json.dumps(report, indent=2))
+
+    failures = []
+    if wall_ms > args.budget_ms:
+        failures.append(f"start-up {wall_ms:.1f} ms exceeds budget {args.budget_ms:.1f} ms")
+    if forbidden_roots:
+        failures.append(f"imported at start-up: {', '.join(forbidden_roots)}")
+    for failure in failures:
+        print(f"FAIL: {failure}", file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,364 @@
+"""
+Golden-output equivalence check for the scoring engine: every engine mode must
+reproduce the outputs frozen from StressAnalyzer, per post and in aggregate.
+
+Usage:
+    python scripts/check_analyzer_golden.py                         # check all modes
+    python scripts/check_analyzer_golden.py --modes serial,cached
+    python scripts/check_analyzer_golden.py --update-golden         # re-freeze after an intended change
+    python scripts/check_analyzer_golden.py --update-golden --regenerate-corpus
+
+scripts/analyzer_golden.json holds a fixed corpus in groups: hand-written edge
+cases plus seeded short, long, keyword-dense and keyword-free posts, with
+repeated texts and a mix of created_utc/created_at/missing timestamps. For
+every post it stores the analyze_tweet output (stress_score,
+has_stress_indicators, indicators_found, sentiment, tweet_text), and for every
+group and for the whole corpus it stores the analyze_tweets aggregate.
+
+Engine modes (register new ones in MODES):
+    serial     analyze_tweet once per post
+    batch      analyze_tweets over the group; per-post results are captured as
+               it scores (posts it skips for empty text are not compared)
+    parallel   analyze_tweet over chunks in a process pool (--workers)
+    cached     analyze_tweet memoized on the post text
+
+Modes that only score posts are aggregated with StressAnalyzer.aggregate_analyses
+(the aggregation step of analyze_tweets), so each aggregate reflects that mode's scores.
+
+Numbers may differ by at most --tolerance. processing_time_seconds is ignored,
+indicator lists are compared as sorted lists, and top_indicators accepts
+different picks among keys tied at the top-10 cut-off, because the order of
+equal counts follows set iteration order and changes between processes.
+
+Each mode is also timed over the corpus repeated --speed-copies times (best of
+--repeat) and reported as posts/sec relative to serial. The cached figure
+depends on the corpus' share of repeated texts. Mismatches are listed on
+stderr and the exit status is 1.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+# Scoring logs one line per analyze_tweets call; keep it out of the report and timings
+os.environ.setdefault('LOG_HANDLER', 'none')
+
+GOLDEN_PATH = ROOT / 'scripts' / 'analyzer_golden.json'
+PER_POST_FIELDS = ('stress_score', 'has_stress_indicators', 'indicators_found', 'sentiment', 'tweet_text', 'error')
+
+EDGE_TEXTS = [
+    '',
+    None,
+    '   ',
+    'I am SO STRESSED and Overwhelmed!!!',
+    "can't cope anymore, this is the breaking point",
+    'cant cope without the apostrophe',
+    'I can’t cope with a curly apostrophe',
+    'not easy but happy and grateful',
+    'calm calm calm relaxed grateful blessed',
+    'why is it wrong that I feel terrible',
+    'Feeling awful, hate mondays, annoyed at everything',
+    'unstressed tiredness counts as substrings',
+    'busy and tired: tired is in both high and moderate lists',
+    'overwhelmed exhausted anxious stressed panic worried frustrated angry',
+    'deadline pressure difficult challenging struggling tough rough day long day',
+    'happy excited motivated energized positive content peaceful',
+    '\U0001F62D\U0001F62D exhausted \U0001F62D',
+    'estoy muy estresado y cansado',
+    'https://example.com/stressed?q=panic #burnout @helpless',
+    '12345 67890',
+    'never ' * 50,
+    'a' * 199 + ' stressed at the cut-off of the stored text',
+    ' '.join(['quiet'] * 60) + ' and then a sudden panic at the very end',
+]
+
+# Timestamp shapes analyze_tweets has to handle, cycled over the edge posts
+TIMESTAMPS = [
+    {'created_utc': 1700000000},
+    {'created_at': '2023-11-14T22:13:20Z'},
+    {'created_at': '2023-11-15T08:00:00'},
+    {'created_at': 'not a date'},
+    {},
+    {'created_utc': 0, 'created_at': '2023-11-16T12:00:00+02:00'},
+    {'created_utc': 1700100000.5},
+]
+
+GROUP_SIZES = {'short': 80, 'long': 20, 'dense': 60, 'free': 40}
+
+
+def build_corpus(seed):
+    """Dict of group name -> list of posts, generated from a fixed seed"""
+    from backend.services.stress_analyzer import StressAnalyzer
+    from benchmark_analyzer import make_text
+
+    keywords = sorted({kw for group in StressAnalyzer.STRESS_KEYWORDS.values() for kw in group})
+    groups = {'edge': []}
+    for i, text in enumerate(EDGE_TEXTS):
+        groups['edge'].append({'id': f'edge-{i}', 'text': text, **TIMESTAMPS[i % len(TIMESTAMPS)]})
+
+    for kind, size in GROUP_SIZES.items():
+        rng = random.Random(f'{seed}:{kind}')
+        # A pool smaller than the group, so texts repeat as they do in real timelines
+        pool = [make_text(kind, rng, keywords) for _ in range(max(1, size * 2 // 3))]
+        start = 1.69e9 + rng.randint(0, 10 ** 6)
+        posts = []
+        for i in range(size):
+            post = {'id': f'{kind}-{i}', 'text': rng.choice(pool)}
+            if i % 5 == 4:
+                post['created_at'] = time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(start + i * 3600))
+            elif i % 11 != 10:
+                post['created_utc'] = start + i * rng.randint(60, 86400)
+            posts.append(post)
+        groups[kind] = posts
+    return groups
+
+
+def normalize_post(analysis):
+    """Comparable per-post output"""
+    if analysis is None:
+        return None
+    result = {key: analysis[key] for key in PER_POST_FIELDS if key in analysis}
+    result['indicators_found'] = sorted(result.get('indicators_found', []))
+    return result
+
+
+def normalize_aggregate(aggregate):
+    """Comparable analyze_tweets output (timing dropped, indicator lists sorted)"""
+    result = {key: value for key, value in aggregate.items() if key != 'processing_time_seconds'}
+    result['tweet_samples'] = [
+        {**sample, 'indicators': sorted(sample['indicators'])} for sample in result.get('tweet_samples', [])
+    ]
+    return result
+
+
+def aggregate_from(analyzer, posts, analyses):
+    """Aggregate precomputed per-post results the way analyze_tweets does (it skips posts without text)"""
+    return analyzer.aggregate_analyses([(post, analysis) for post, analysis in zip(posts, analyses)
+                                        if post.get('text', '')])
+
+
+def mode_serial(analyzer, posts, args):
+    analyses = [analyzer.analyze_tweet(post.get('text')) for post in posts]
+    return analyses, aggregate_from(analyzer, posts, analyses)
+
+
+def mode_batch(analyzer, posts, args):
+    captured = {}
+    scorer = analyzer.analyze_tweet
+    texts = iter(range(len(posts)))
+
+    def capture(text):
+        index = next(texts)
+        while not posts[index].get('text', ''):
+            index = next(texts)
+        captured[index] = scorer(text)
+        return captured[index]
+
+    analyzer.analyze_tweet = capture
+    try:
+        aggregate = analyzer.analyze_tweets(posts)
+    finally:
+        del analyzer.analyze_tweet
+    return [captured.get(i) for i in range(len(posts))], aggregate
+
+
+_worker_analyzer = None
+
+
+def _init_worker():
+    global _worker_analyzer
+    from backend.services.stress_analyzer import StressAnalyzer
+
+    _worker_analyzer = StressAnalyzer()
+
+
+def _score_chunk(texts):
+    return [_worker_analyzer.analyze_tweet(text) for text in texts]
+
+
+def mode_parallel(analyzer, posts, args):
+    texts = [post.get('text') for post in posts]
+    chunk = max(1, -(-len(texts) // (args.workers * 4)))
+    chunks = [texts[i:i + chunk] for i in range(0, len(texts), chunk)]
+    analyses = [analysis for part in args.pool.map(_score_chunk, chunks) for analysis in part]
+    return analyses, aggregate_from(analyzer, posts, analyses)
+
+
+def mode_cached(analyzer, posts, args):
+    score = lru_cache(maxsize=None)(analyzer.analyze_tweet)
+    analyses = [score(post.get('text')) for post in posts]
+    return analyses, aggregate_from(analyzer, posts, analyses)
+
+
+MODES = {
+    'serial': mode_serial,
+    'batch': mode_batch,
+    'parallel': mode_parallel,
+    'cached': mode_cached,
+}
+
+
+def run_mode(mode, analyzer, groups, args):
+    """Normalized per-post and aggregate outputs of one mode for every group and the whole corpus"""
+    outputs = {}
+    for name, posts in groups.items():
+        analyses, aggregate = MODES[mode](analyzer, posts, args)
+        outputs[name] = {
+            'expected': [normalize_post(analysis) for analysis in analyses],
+            'aggregate': normalize_aggregate(aggregate),
+        }
+    everything = [post for posts in groups.values() for post in posts]
+    _, aggregate = MODES[mode](analyzer, everything, args)
+    return outputs, normalize_aggregate(aggregate)
+
+
+def diff(expected, actual, path, tolerance, out):
+    """Append (path, expected, actual) for every difference beyond the tolerance"""
+    if path.endswith('.top_indicators') and isinstance(expected, dict) and isinstance(actual, dict):
+        diff_top_indicators(expected, actual, path, out)
+    elif isinstance(expected, dict) and isinstance(actual, dict):
+        for key in sorted(set(expected) | set(actual)):
+            if key not in expected or key not in actual:
+                out.append((f'{path}.{key}', expected.get(key, '<missing>'), actual.get(key, '<missing>')))
+            else:
+                diff(expected[key], actual[key], f'{path}.{key}', tolerance, out)
+    elif isinstance(expected, list) and isinstance(actual, list):
+        if len(expected) != len(actual):
+            out.append((f'{path}.length', len(expected), len(actual)))
+        for i, (left, right) in enumerate(zip(expected, actual)):
+            diff(left, right, f'{path}[{i}]', tolerance, out)
+    elif (isinstance(expected, (int, float)) and isinstance(actual, (int, float))
+          and not isinstance(expected, bool) and not isinstance(actual, bool)):
+        if abs(expected - actual) > tolerance:
+            out.append((path, expected, actual))
+    elif expected != actual:
+        out.append((path, expected, actual))
+
+
+def diff_top_indicators(expected, actual, path, out):
+    """Counts must agree; keys may differ only among those tied at the cut-off count"""
+    cutoff = min(expected.values(), default=0)
+    for key in sorted(set(expected) | set(actual)):
+        if key in expected and key in actual:
+            if expected[key] != actual[key]:
+                out.append((f'{path}.{key}', expected[key], actual[key]))
+        elif len(expected) != len(actual) or expected.get(key, actual.get(key)) != cutoff:
+            out.append((f'{path}.{key}', expected.get(key, '<missing>'), actual.get(key, '<missing>')))
+
+
+def check_mode(mode, analyzer, golden, groups, args):
+    """List of differences between a mode's outputs and the golden file"""
+    outputs, aggregate_all = run_mode(mode, analyzer, groups, args)
+    differences = []
+    for name, group in golden['groups'].items():
+        actual = outputs[name]
+        for i, (expected, got) in enumerate(zip(group['expected'], actual['expected'])):
+            if got is not None:
+                diff(expected, got, f'{name}[{i}]', args.tolerance, differences)
+        diff(group['aggregate'], actual['aggregate'], f'{name}.aggregate', args.tolerance, differences)
+    diff(golden['aggregate'], aggregate_all, 'all.aggregate', args.tolerance, differences)
+    return differences
+
+
+def time_mode(mode, analyzer, posts, args):
+    """Best posts/sec over --repeat runs of the mode on the given posts"""
+    best = 0.0
+    for _ in range(args.repeat):
+        started = time.perf_counter()
+        MODES[mode](analyzer, posts, args)
+        best = max(best, len(posts) / (time.perf_counter() - started))
+    return best
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--modes', default=','.join(MODES))
+    parser.add_argument('--golden', default=str(GOLDEN_PATH))
+    parser.add_argument('--tolerance', type=float, default=1e-9, help='allowed absolute difference of numbers')
+    parser.add_argument('--workers', type=int, default=2, help='processes for the parallel mode')
+    parser.add_argument('--speed-copies', type=int, default=20, help='corpus copies in the timing pass')
+    parser.add_argument('--repeat', type=int, default=3, help='timed runs per mode (best is kept)')
+    parser.add_argument('--max-diffs', type=int, default=20, help='differences listed per mode')
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--update-golden', action='store_true', help='freeze the serial outputs as expected')
+    parser.add_argument('--regenerate-corpus', action='store_true', help='with --update-golden, rebuild the corpus')
+    args = parser.parse_args()
+
+    from backend.services.stress_analyzer import StressAnalyzer
+
+    modes = args.modes.split(',')
+    unknown = [mode for mode in modes if mode not in MODES]
+    if unknown:
+        parser.error(f"unknown modes: {', '.join(unknown)} (available: {', '.join(MODES)})")
+
+    analyzer = StressAnalyzer()
+    golden_path = Path(args.golden)
+    golden = json.loads(golden_path.read_text()) if golden_path.exists() else None
+
+    if args.update_golden:
+        if golden is None or args.regenerate_corpus:
+            groups = build_corpus(args.seed)
+        else:
+            groups = {name: group['posts'] for name, group in golden['groups'].items()}
+        outputs, aggregate_all = run_mode('serial', analyzer, groups, args)
+        golden = {
+            'frozen_from': git_commit(),
+            'python': platform.python_version(),
+            'seed': args.seed,
+            'groups': {name: {'posts': posts, **outputs[name]} for name, posts in groups.items()},
+            'aggregate': aggregate_all,
+        }
+        golden_path.write_text(json.dumps(golden, indent=1) + '\n')
+        print(f"Golden outputs for {sum(len(p) for p in groups.values())} posts written to {golden_path}",
+              file=sys.stderr)
+        return
+    if golden is None:
+        print(f"No golden file at {golden_path}; run with --update-golden", file=sys.stderr)
+        sys.exit(1)
+
+    groups = {name: group['posts'] for name, group in golden['groups'].items()}
+    corpus = [post for posts in groups.values() for post in posts]
+    report = {'golden': str(golden_path), 'frozen_from': golden.get('frozen_from'), 'posts': len(corpus),
+              'timed_posts': len(corpus) * args.speed_copies, 'modes': {}}
+    failed = False
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker) as pool:
+        args.pool = pool
+        for mode in modes:
+            differences = check_mode(mode, analyzer, golden, groups, args)
+            speed = time_mode(mode, analyzer, corpus * args.speed_copies, args)
+            report['modes'][mode] = {'differences': len(differences), 'posts_per_second': round(speed, 1)}
+            failed = failed or bool(differences)
+            for path, expected, actual in differences[:args.max_diffs]:
+                print(f"{mode}: {path}: expected {expected!r}, got {actual!r}", file=sys.stderr)
+            if len(differences) > args.max_diffs:
+                print(f"{mode}: ... {len(differences) - args.max_diffs} more", file=sys.stderr)
+
+    serial_speed = report['modes'].get('serial', {}).get('posts_per_second')
+    for mode, stats in report['modes'].items():
+        relative = f"  x{stats['posts_per_second'] / serial_speed:.2f} serial" if serial_speed else ''
+        status = 'OK' if not stats['differences'] else f"{stats['differences']} differences"
+        print(f"{mode:>10}: {status:<16} {stats['posts_per_second']:>12} posts/s{relative}", file=sys.stderr)
+    print(json.dumps(report, indent=2))
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,322 @@
+"""
+End-to-end load test for the Flask API: production server (gunicorn.conf.py +
+wsgi.py) backed by the offline upstream stub, driven by concurrent clients
+running a weighted endpoint mix.
+
+Usage:
+    python scripts/load_test.py --clients 16 --duration 30 --mix analyze=1,history=4,resources=4
+    python scripts/load_test.py --output run.json --baseline main.json --max-regression 0.15
+    python scripts/load_test.py --target http://127.0.0.1:5000      # an already running server
+
+Each client signs in through /api/auth/manual or /api/auth/reddit/manual
+(alternating), then loops: pick an endpoint from the mix, send it, record
+latency and status. The JSON report has throughput, error rate, latency
+percentiles and a latency histogram per endpoint and overall, plus the commit
+and settings it was produced with. With --baseline, runs are compared per
+endpoint and the exit status is 1 if requests/sec dropped or p99 latency grew
+by more than --max-regression. Keep every other option identical between the
+runs you compare.
+"""
+import argparse
+import json
+import os
+import random
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import requests
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is open-ended
+HISTOGRAM_BOUNDS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000)
+# p99 growth below this many ms is noise, never a regression
+P99_NOISE_FLOOR_MS = 2.0
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def wait_ready(url, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(url, timeout=2).status_code == 200:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f'{url} did not become ready')
+
+
+def parse_mix(spec):
+    mix = {}
+    for part in spec.split(','):
+        name, _, weight = part.partition('=')
+        if name not in ENDPOINTS:
+            raise argparse.ArgumentTypeError(f"unknown endpoint {name!r} (choose from {', '.join(ENDPOINTS)})")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def analyze(http, base, client):
+    return http.post(f'{base}/api/analysis/analyze', timeout=60,
+                     json={'username': client['handle'], 'platform': client['platform']})
+
+
+ENDPOINTS = {
+    'analyze': analyze,
+    'history': lambda http, base, client: http.get(f'{base}/api/analysis/history', timeout=60),
+    'resources': lambda http, base, client: http.get(f'{base}/api/resources/', timeout=60),
+    'facets': lambda http, base, client: http.get(f'{base}/api/resources/facets', timeout=60),
+    'search': lambda http, base, client: http.get(f'{base}/api/resources/search?q=stress', timeout=60),
+}
+
+
+def sign_in(http, base, index, handles):
+    """Create/select a user for this client; returns the analysis target"""
+    platform = 'twitter' if index % 2 == 0 else 'reddit'
+    path = '/api/auth/manual' if platform == 'twitter' else '/api/auth/reddit/manual'
+    response = http.post(f'{base}{path}', json={'username': f'load_{index:04d}'}, timeout=30)
+    response.raise_for_status()
+    return {'platform': platform, 'handle': f'handle_{index % handles:03d}'}
+
+
+def drive(base, args, duration):
+    """Closed-loop load from args.clients threads; returns [(endpoint, status, ms)]"""
+    samples = []
+    lock = threading.Lock()
+    names = list(args.mix)
+    weights = [args.mix[name] for name in names]
+    stop_at = time.monotonic() + duration
+
+    def client(index):
+        rng = random.Random(args.seed * 1000 + index)
+        http = requests.Session()
+        target = sign_in(http, base, index, args.handles)
+        mine = []
+        while time.monotonic() < stop_at:
+            name = rng.choices(names, weights)[0]
+            started = time.perf_counter()
+            try:
+                status = ENDPOINTS[name](http, base, target).status_code
+            except requests.RequestException:
+                status = 0
+            mine.append((name, status, (time.perf_counter() - started) * 1000))
+        with lock:
+            samples.extend(mine)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(args.clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return samples
+
+
+def summarize(samples, elapsed):
+    latencies = sorted(ms for _, _, ms in samples)
+    errors = sum(1 for _, status, _ in samples if status == 0 or status >= 400)
+    histogram = {f'le_{bound}ms': 0 for bound in HISTOGRAM_BOUNDS_MS}
+    histogram['le_inf'] = 0
+    for ms in latencies:
+        for bound in HISTOGRAM_BOUNDS_MS:
+            if ms <= bound:
+                histogram[f'le_{bound}ms'] += 1
+                break
+        else:
+            histogram['le_inf'] += 1
+    statuses = {}
+    for _, status, _ in samples:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    return {
+        'requests': len(samples),
+        'requests_per_second': round(len(samples) / elapsed, 2) if elapsed else 0.0,
+        'errors': errors,
+        'error_rate': round(errors / len(samples), 4) if samples else 0.0,
+        'statuses': statuses,
+        'mean_ms': round(sum(latencies) / len(latencies), 3) if latencies else 0.0,
+        'p50_ms': round(percentile(latencies, 50), 3),
+        'p90_ms': round(percentile(latencies, 90), 3),
+        'p99_ms': round(percentile(latencies, 99), 3),
+        'max_ms': round(latencies[-1], 3) if latencies else 0.0,
+        'histogram': histogram,
+    }
+
+
+def git_revision():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=ROOT,
+                                    capture_output=True, text=True).stdout.strip())
+        return f'{commit}-dirty' if dirty else commit
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(report, baseline, max_regression):
+    """Per-endpoint deltas against a baseline report; returns (lines, regressed)"""
+    lines, regressed = [], False
+    for name, current in report['endpoints'].items():
+        before = baseline.get('endpoints', {}).get(name)
+        if not before or not before['requests']:
+            continue
+        rps_change = current['requests_per_second'] / before['requests_per_second'] - 1 \
+            if before['requests_per_second'] else 0.0
+        p99_change = current['p99_ms'] / before['p99_ms'] - 1 if before['p99_ms'] else 0.0
+        bad = rps_change < -max_regression or \
+            (p99_change > max_regression and current['p99_ms'] - before['p99_ms'] > P99_NOISE_FLOOR_MS)
+        regressed = regressed or bad
+        lines.append(f"{name:>10}: req/s {before['requests_per_second']:>8} -> {current['requests_per_second']:>8} "
+                     f"({rps_change:+.1%})  p99 {before['p99_ms']:>9} -> {current['p99_ms']:>9} ms "
+                     f"({p99_change:+.1%}){'  REGRESSION' if bad else ''}")
+    return lines, regressed
+
+
+def start_stack(args, tmp):
+    """Start the upstream stub and gunicorn; returns (base_url, processes)"""
+    stub_port, app_port = free_port(), free_port()
+    stub = subprocess.Popen(
+        [sys.executable, str(ROOT / 'scripts' / 'upstream_stub.py'), '--port', str(stub_port),
+         '--seed', str(args.seed), '--latency', args.stub_latency, '--page-size', str(args.stub_page_size)],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    stub_url = f'http://127.0.0.1:{stub_port}'
+    env = dict(os.environ)
+    env.update({
+        'DATABASE_URL': f"sqlite:///{os.path.join(tmp, 'load.db')}",
+        'LOG_DIR': os.path.join(tmp, 'logs'),
+        'CONTENT_CACHE_PATH': os.path.join(tmp, 'upstream_cache.db'),
+        'FLASK_ENV': 'production',
+        'SECRET_KEY': 'load-test',
+        'SESSION_COOKIE_SECURE': 'false',
+        'PORT': str(app_port),
+        'WEB_CONCURRENCY': str(args.workers),
+        'WEB_THREADS': str(args.threads),
+        'TWITTER_API_BASE_URL': f'{stub_url}/twitter/2',
+        'REDDIT_API_BASE_URL': f'{stub_url}/reddit',
+        'REDDIT_OAUTH_API_BASE_URL': f'{stub_url}/reddit-oauth',
+        'TWITTER_API_BEARER_TOKEN': 'load-test',
+        'REDDIT_CLIENT_ID': 'load-test',
+        'REDDIT_CLIENT_SECRET': 'load-test',
+    })
+    subprocess.run(
+        [sys.executable, '-c', 'from backend import create_app, init_database; '
+         'init_database(create_app("production"), seed=True)'],
+        cwd=ROOT, env=env, check=True, capture_output=True
+    )
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app'],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    processes = [server, stub]
+    try:
+        wait_ready(f'{stub_url}/_stub/stats')
+        wait_ready(f'http://127.0.0.1:{app_port}/api/health')
+    except RuntimeError:
+        stop_stack(processes)
+        raise
+    return f'http://127.0.0.1:{app_port}', processes
+
+
+def stop_stack(processes):
+    for process in processes:
+        process.send_signal(signal.SIGTERM)
+    for process in processes:
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--target', help='base URL of a running server (skips starting the stub and gunicorn)')
+    parser.add_argument('--clients', type=int, default=16, help='concurrent clients')
+    parser.add_argument('--duration', type=float, default=30.0, help='measured seconds')
+    parser.add_argument('--warmup', type=float, default=3.0, help='unmeasured seconds before the run')
+    parser.add_argument('--mix', type=parse_mix, default=parse_mix('analyze=1,history=4,resources=4'),
+                        help=f"endpoint=weight,... from {', '.join(ENDPOINTS)}")
+    parser.add_argument('--handles', type=int, default=20, help='distinct handles analyzed')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--workers', type=int, default=4, help='gunicorn workers')
+    parser.add_argument('--threads', type=int, default=4, help='threads per gunicorn worker')
+    parser.add_argument('--stub-latency', default='lognormal:0.05:0.5', help='upstream latency distribution')
+    parser.add_argument('--stub-page-size', type=int, default=100)
+    parser.add_argument('--output', help='write the JSON report here as well as to stdout')
+    parser.add_argument('--baseline', help='JSON report of an earlier run to compare against')
+    parser.add_argument('--max-regression', type=float, default=0.15,
+                        help='tolerated relative drop in req/s or growth in p99 (default 0.15)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        processes = []
+        base = args.target.rstrip('/') if args.target else None
+        if base is None:
+            base, processes = start_stack(args, tmp)
+        try:
+            if args.warmup:
+                drive(base, args, args.warmup)
+            started = time.perf_counter()
+            samples = drive(base, args, args.duration)
+            elapsed = time.perf_counter() - started
+        finally:
+            stop_stack(processes)
+
+    report = {
+        'meta': {
+            'commit': git_revision(),
+            'started_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'target': args.target or 'gunicorn+stub',
+            'clients': args.clients,
+            'duration_s': args.duration,
+            'mix': args.mix,
+            'handles': args.handles,
+            'seed': args.seed,
+            'workers': args.workers,
+            'threads': args.threads,
+            'stub_latency': args.stub_latency,
+            'stub_page_size': args.stub_page_size,
+        },
+        'overall': summarize(samples, elapsed),
+        'endpoints': {name: summarize([s for s in samples if s[0] == name], elapsed) for name in args.mix},
+    }
+    for name, stats in [('overall', report['overall']), *report['endpoints'].items()]:
+        print(f"{name:>10}: {stats['requests_per_second']:>8} req/s  p50 {stats['p50_ms']:>9} ms  "
+              f"p99 {stats['p99_ms']:>9} ms  errors {stats['error_rate']:.2%}", file=sys.stderr)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(output + '\n')
+    print(output)
+
+    if args.baseline:
+        lines, regressed = compare(report, json.loads(Path(args.baseline).read_text()), args.max_regression)
+        for line in lines:
+            print(line, file=sys.stderr)
+        if regressed:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
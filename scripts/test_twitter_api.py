@@ -25,7 +25,8 @@ def test_bearer_token():
     
     # Test endpoint: Get user by username
     test_username = 'twitter'  # Twitter's official account
-    url = f'https://api.twitter.com/2/users/by/username/{test_username}'
+    base_url = os.getenv('TWITTER_API_BASE_URL', 'https://api.twitter.com/2').rstrip('/')
+    url = f'{base_url}/users/by/username/{test_username}'
     
     try:
         response = requests.get(url, headers=headers)
@@ -0,0 +1,362 @@
+"""
+Local stand-in for the Twitter v2 and Reddit APIs, for offline load and
+latency testing.
+
+Usage:
+    python scripts/upstream_stub.py --port 8089 --latency lognormal:0.12:0.5 --page-size 25
+    python scripts/upstream_stub.py --record cassettes/        # proxy to the real APIs and save
+    python scripts/upstream_stub.py --replay cassettes/ --strict
+
+then start the backend with
+    TWITTER_API_BASE_URL=http://127.0.0.1:8089/twitter/2
+    REDDIT_API_BASE_URL=http://127.0.0.1:8089/reddit
+    REDDIT_OAUTH_API_BASE_URL=http://127.0.0.1:8089/reddit-oauth
+
+Each surface (twitter, reddit, reddit-oauth) is served under its own path
+prefix with its own rate-limit window. Responses are synthetic by default:
+every username gets a deterministic history (seeded by --seed and the name)
+of --items-per-user posts, paged like the real APIs. --replay serves saved
+responses first; --record forwards to the real APIs and saves what they
+return. Latency is drawn per request from a distribution:
+
+    fixed:SECONDS  uniform:LOW:HIGH  normal:MEAN:STDDEV  lognormal:MEDIAN:SIGMA
+
+(--latency SPEC for every surface, --latency SURFACE=SPEC to override one).
+GET /_stub/stats returns request counts by surface and outcome.
+"""
+import argparse
+import hashlib
+import json
+import logging
+import math
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from urllib.parse import urlencode
+
+import requests
+from flask import Flask, Response, jsonify, request
+
+SURFACES = ('twitter', 'reddit', 'reddit-oauth')
+UPSTREAMS = {
+    'twitter': 'https://api.twitter.com/2',
+    'reddit': 'https://www.reddit.com',
+    'reddit-oauth': 'https://oauth.reddit.com',
+}
+# Params that change on every run (e.g. start_time = now - 30 days) and don't identify a response
+VOLATILE_PARAMS = {'start_time', 'end_time', 'raw_json'}
+# Request headers forwarded when recording
+FORWARD_HEADERS = ('Authorization', 'User-Agent', 'Content-Type')
+
+STRESSED = [
+    "so stressed about this deadline, can't sleep", "feeling anxious and overwhelmed again",
+    "exhausted, everything is falling apart", "panic attack before the exam, can't cope",
+    "burnt out and worried about rent", "nobody gets how hopeless this feels",
+]
+CALM = [
+    "great walk in the park this morning", "finished a good book today", "coffee with friends, feeling calm",
+    "new recipe turned out well", "grateful for a quiet weekend", "watched the sunset, relaxed",
+]
+FILLER = ["honestly", "today", "at work", "lol", "again", "this week", "with the team", "", "", ""]
+
+
+def parse_latency(spec):
+    """Parse a latency spec into a sampler taking a random.Random and returning seconds"""
+    kind, _, args = spec.partition(':')
+    values = [float(v) for v in args.split(':')] if args else []
+    if kind == 'fixed':
+        return lambda rng: values[0] if values else 0.0
+    if kind == 'uniform':
+        return lambda rng: rng.uniform(values[0], values[1])
+    if kind == 'normal':
+        return lambda rng: max(0.0, rng.gauss(values[0], values[1]))
+    if kind == 'lognormal':
+        return lambda rng: rng.lognormvariate(math.log(values[0]), values[1])
+    raise argparse.ArgumentTypeError(f"unknown latency distribution: {spec}")
+
+
+class RateWindow:
+    """Fixed-window quota, reported the way each API reports it"""
+
+    def __init__(self, limit, window):
+        self.limit = limit
+        self.window = window
+        self.started = time.time()
+        self.used = 0
+        self.lock = threading.Lock()
+
+    def take(self):
+        """Count one request; returns (allowed, headers)"""
+        with self.lock:
+            now = time.time()
+            if now - self.started >= self.window:
+                self.started = now
+                self.used = 0
+            allowed = not self.limit or self.used < self.limit
+            if allowed:
+                self.used += 1
+            reset_in = max(0, int(self.started + self.window - now))
+            remaining = max(0, self.limit - self.used) if self.limit else 1000000
+            return allowed, {
+                'x-rate-limit-limit': str(self.limit), 'x-rate-limit-remaining': str(remaining),
+                'x-rate-limit-reset': str(int(self.started + self.window)),
+                'x-ratelimit-used': str(self.used), 'x-ratelimit-remaining': str(remaining),
+                'x-ratelimit-reset': str(reset_in),
+            }
+
+
+class Cassettes:
+    """Saved responses, one JSON file per (surface, method, path, params) key"""
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+
+    @staticmethod
+    def key(surface, method, path, params):
+        stable = sorted((k, v) for k, v in params.items(multi=True) if k not in VOLATILE_PARAMS)
+        return f"{surface} {method} {path}?{urlencode(stable)}"
+
+    def _path(self, key):
+        surface = key.split(' ', 1)[0]
+        return self.directory / surface / f"{hashlib.sha1(key.encode()).hexdigest()}.json"
+
+    def load(self, key):
+        path = self._path(key)
+        if not path.exists():
+            return None
+        return json.loads(path.read_text())
+
+    def save(self, key, status, headers, body):
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps({'key': key, 'status': status, 'headers': headers, 'body': body}, indent=1))
+
+
+class Synthetic:
+    """Deterministic fake users and post histories"""
+
+    def __init__(self, seed, items_per_user, stress_share):
+        self.seed = seed
+        self.items_per_user = items_per_user
+        self.stress_share = stress_share
+        self.now = int(time.time())
+
+    def _rng(self, *parts):
+        digest = hashlib.sha1(':'.join(str(p) for p in (self.seed,) + parts).encode()).digest()
+        return random.Random(int.from_bytes(digest[:8], 'big'))
+
+    def user_id(self, username):
+        return str(self._rng('id', username.lower()).randrange(10 ** 9, 10 ** 10))
+
+    def texts(self, username, kind, offset, count):
+        """count (id, text, created_utc) items of a user's history, newest first"""
+        items = []
+        for index in range(offset, min(offset + count, self.items_per_user)):
+            rng = self._rng(kind, username.lower(), index)
+            pool = STRESSED if rng.random() < self.stress_share else CALM
+            text = f"{rng.choice(pool)} {rng.choice(FILLER)}".strip()
+            if kind == 'submitted' and rng.random() < 0.5:
+                text = ' '.join([text] * rng.randint(3, 12))  # long selftexts
+            items.append((f"{kind[0]}{self.user_id(username)}{index}", text, self.now - index * 5400 - rng.randint(0, 3600)))
+        return items
+
+
+def page_window(cursor, limit, page_size):
+    offset = int(cursor) if cursor and cursor.isdigit() else 0
+    return offset, max(1, min(limit, page_size))
+
+
+def create_stub_app(args):
+    """Build the stub Flask app from parsed command-line options"""
+    app = Flask('upstream_stub')
+    rng = random.Random(args.seed)
+    rng_lock = threading.Lock()
+    latency = {surface: parse_latency(args.latency_default) for surface in SURFACES}
+    latency.update({surface: parse_latency(spec) for surface, spec in args.latency_overrides.items()})
+    windows = {surface: RateWindow(args.rate_limit, args.rate_window) for surface in SURFACES}
+    cassettes = Cassettes(args.replay or args.record) if (args.replay or args.record) else None
+    synthetic = Synthetic(args.seed, args.items_per_user, args.stress_share)
+    stats = Counter()
+    stats_lock = threading.Lock()
+
+    def count(surface, outcome):
+        with stats_lock:
+            stats[f"{surface}.{outcome}"] += 1
+
+    def draw(surface):
+        with rng_lock:
+            return latency[surface](rng), rng.random(), rng.random()
+
+    def synthesize(surface, path):
+        """(status, body) for a request, generated from the synthetic histories"""
+        parts = [p for p in path.split('/') if p]
+        if surface == 'twitter':
+            if parts[:2] == ['oauth2', 'token']:
+                return 200, {'access_token': f"stub-{int(time.time())}", 'refresh_token': 'stub-refresh',
+                             'expires_in': args.token_ttl, 'token_type': 'bearer'}
+            if parts[:2] == ['users', 'me']:
+                return 200, {'data': {'id': synthetic.user_id('stub_user'), 'username': 'stub_user', 'name': 'Stub User'}}
+            if parts[:3] == ['users', 'by', 'username'] and len(parts) == 4:
+                name = parts[3]
+                return 200, {'data': {'id': synthetic.user_id(name), 'username': name, 'name': name.title(),
+                                      'public_metrics': {'tweet_count': synthetic.items_per_user}}}
+            if len(parts) == 3 and parts[0] == 'users' and parts[2] == 'tweets':
+                offset, size = page_window(request.args.get('pagination_token'),
+                                           int(request.args.get('max_results', 10)), args.page_size)
+                tweets = synthetic.texts(parts[1], 'tweets', offset, size)
+                meta = {'result_count': len(tweets)}
+                if offset + size < synthetic.items_per_user:
+                    meta['next_token'] = str(offset + size)
+                return 200, {'data': [
+                    {'id': tid, 'text': text, 'lang': 'en',
+                     'created_at': time.strftime('%Y-%m-%dT%H:%M:%S.000Z', time.gmtime(created))}
+                    for tid, text, created in tweets
+                ], 'meta': meta}
+            return 404, {'title': 'Not Found Error', 'detail': f"stub has no route for {path}"}
+
+        if parts[:3] == ['api', 'v1', 'access_token']:
+            return 200, {'access_token': f"stub-{int(time.time())}", 'refresh_token': 'stub-refresh',
+                         'expires_in': args.token_ttl, 'token_type': 'bearer', 'scope': 'read identity'}
+        if parts[:3] == ['api', 'v1', 'me']:
+            return 200, {'id': 'stub', 'name': 'stub_user', 'total_karma': 1, 'created_utc': synthetic.now - 10 ** 7}
+        if len(parts) == 3 and parts[0] == 'user' and parts[2] == 'about.json':
+            name = parts[1]
+            return 200, {'kind': 't2', 'data': {'id': synthetic.user_id(name), 'name': name, 'total_karma': 42,
+                                                 'created_utc': synthetic.now - 10 ** 8}}
+        if len(parts) == 3 and parts[0] == 'user' and parts[2] in ('submitted.json', 'comments.json'):
+            name, kind = parts[1], parts[2].split('.')[0]
+            offset, size = page_window(request.args.get('after'), int(request.args.get('limit', 25)), args.page_size)
+            items = synthetic.texts(name, kind, offset, size)
+            children = []
+            for item_id, text, created in items:
+                if kind == 'submitted':
+                    data = {'id': item_id, 'title': text[:60], 'selftext': text, 'created_utc': created,
+                            'subreddit': 'stub', 'score': 1, 'num_comments': 0, 'is_self': True,
+                            'permalink': f"/r/stub/comments/{item_id}/"}
+                    children.append({'kind': 't3', 'data': data})
+                else:
+                    data = {'id': item_id, 'body': text, 'created_utc': created, 'subreddit': 'stub', 'score': 1,
+                            'link_id': f"t3_{item_id}", 'permalink': f"/r/stub/comments/x/{item_id}/"}
+                    children.append({'kind': 't1', 'data': data})
+            after = str(offset + size) if offset + size < synthetic.items_per_user else None
+            return 200, {'kind': 'Listing', 'data': {'after': after, 'dist': len(children), 'children': children}}
+        return 404, {'message': 'Not Found', 'error': 404}
+
+    def record(surface, path, key):
+        """Forward to the real upstream and save the response"""
+        upstream = requests.request(
+            request.method, f"{UPSTREAMS[surface]}/{path}", params=request.args, data=request.form or None,
+            headers={h: request.headers[h] for h in FORWARD_HEADERS if h in request.headers}, timeout=30
+        )
+        try:
+            body = upstream.json()
+        except ValueError:
+            body = {'raw': upstream.text}
+        headers = {k: v for k, v in upstream.headers.items() if k.lower().startswith('x-rate')}
+        cassettes.save(key, upstream.status_code, headers, body)
+        return upstream.status_code, body, headers
+
+    @app.route('/_stub/stats')
+    def stub_stats():
+        with stats_lock:
+            return jsonify(dict(stats))
+
+    @app.route('/<any(twitter, reddit, "reddit-oauth"):surface>/<path:path>', methods=['GET', 'POST'])
+    def serve(surface, path):
+        if surface == 'twitter':
+            # Mounted as .../twitter/2 to mirror https://api.twitter.com/2
+            path = path[2:] if path.startswith('2/') else path
+        delay, error_roll, hang_roll = draw(surface)
+        time.sleep(delay)
+
+        allowed, headers = windows[surface].take()
+        if not allowed:
+            count(surface, 'rate_limited')
+            body = {'title': 'Too Many Requests'} if surface == 'twitter' else {'message': 'Too Many Requests', 'error': 429}
+            return Response(json.dumps(body), 429, headers, mimetype='application/json')
+        if hang_roll < args.hang_rate:
+            count(surface, 'hang')
+            time.sleep(args.hang_seconds)
+        if error_roll < args.error_rate:
+            count(surface, f"error_{args.error_status}")
+            return Response(json.dumps({'message': 'injected error'}), args.error_status, headers,
+                            mimetype='application/json')
+
+        key = Cassettes.key(surface, request.method, path, request.args)
+        saved = cassettes.load(key) if cassettes is not None else None
+        if saved is not None:
+            status, body = saved['status'], saved['body']
+            headers = dict(headers, **saved.get('headers', {}))
+            outcome = 'replayed'
+        elif args.record:
+            status, body, recorded_headers = record(surface, path, key)
+            headers = dict(headers, **recorded_headers)
+            outcome = 'recorded'
+        elif args.strict:
+            status, body, outcome = 404, {'message': f"no cassette for {key}"}, 'missing'
+        else:
+            status, body = synthesize(surface, path)
+            outcome = 'synthetic'
+        count(surface, outcome if status < 400 else f"{outcome}_{status}")
+        return Response(json.dumps(body), status, headers, mimetype='application/json')
+
+    return app
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--latency', action='append', default=[], metavar='[SURFACE=]SPEC',
+                        help='latency distribution (default fixed:0)')
+    parser.add_argument('--page-size', type=int, default=100, help='max items per page (the APIs allow 100)')
+    parser.add_argument('--items-per-user', type=int, default=200, help='synthetic history length per username')
+    parser.add_argument('--stress-share', type=float, default=0.3, help='share of synthetic posts with stress language')
+    parser.add_argument('--rate-limit', type=int, default=0, help='requests per window per surface (0 = unlimited)')
+    parser.add_argument('--rate-window', type=float, default=60.0, help='rate-limit window in seconds')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='share of requests answered with --error-status')
+    parser.add_argument('--error-status', type=int, default=503)
+    parser.add_argument('--hang-rate', type=float, default=0.0, help='share of requests delayed by --hang-seconds')
+    parser.add_argument('--hang-seconds', type=float, default=30.0)
+    parser.add_argument('--token-ttl', type=int, default=7200, help='expires_in of issued tokens')
+    parser.add_argument('--replay', metavar='DIR', help='serve saved responses from DIR first')
+    parser.add_argument('--record', metavar='DIR', help='proxy to the real APIs and save responses to DIR')
+    parser.add_argument('--strict', action='store_true', help='with --replay: 404 instead of synthesizing misses')
+    args = parser.parse_args(argv)
+
+    args.latency_default = 'fixed:0'
+    args.latency_overrides = {}
+    for spec in args.latency:
+        surface, sep, dist = spec.partition('=')
+        if sep:
+            if surface not in SURFACES:
+                parser.error(f"unknown surface {surface!r} (choose from {', '.join(SURFACES)})")
+            args.latency_overrides[surface] = dist
+        else:
+            args.latency_default = spec
+    for spec in [args.latency_default, *args.latency_overrides.values()]:
+        try:
+            parse_latency(spec)
+        except (argparse.ArgumentTypeError, ValueError, IndexError):
+            parser.error(f"invalid latency spec {spec!r}")
+    return args
+
+
+def main():
+    args = parse_args()
+    app = create_stub_app(args)
+    print(f"Upstream stub on http://{args.host}:{args.port} "
+          f"(twitter/2, reddit, reddit-oauth; mode: {'record' if args.record else 'replay' if args.replay else 'synthetic'})",
+          file=sys.stderr)
+    from werkzeug.serving import run_simple
+    # One access-log line per request would dominate the stub's own CPU time
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    run_simple(args.host, args.port, app, threaded=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -20,12 +20,10 @@ def initialize_database():
     """Initialize database and seed resources"""
     print("\nInitializing database...")
     try:
-        from backend import create_app
-        from backend.utils.seed_resources import seed_resources
+        from backend import create_app, init_database
         
         app = create_app()
-        with app.app_context():
-            seed_resources()
+        init_database(app, seed=True)
         print("✓ Database initialized and resources seeded")
         return True
     except Exception as e:
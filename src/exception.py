@@ -3,9 +3,12 @@ from src.logger import logging
 
 def error_message_details(error,error_detail:sys):
     _,_,exc_tb=error_detail.exc_info()
+    if exc_tb is None:
+        # Raised directly rather than while handling another exception
+        return str(error)
     file_name=exc_tb.tb_frame.f_code.co_filename
-    error_message="Error occured in python script name{0} line number [{1}] error message[{2}]".format()
-    file_name,exc_tb.tb_lineno,str(error)
+    error_message="Error occured in python script name{0} line number [{1}] error message[{2}]".format(
+    file_name,exc_tb.tb_lineno,str(error))
     
     return error_message
     
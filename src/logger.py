@@ -1,17 +1,168 @@
+import atexit
+import json
 import logging
+import logging.handlers
 import os
-from datetime import datetime
+import queue
+import random
+import threading
+import time
+from datetime import datetime, timezone
 
 LOG_FILE=f"{datetime.now().strftime('%m_%d_%Y_%H_%M_%S')}.log"
-logs_path=os.path.join(os.getcwd(),"logs",LOG_FILE)
-os.makedirs(logs_path,exist_ok=True)
+logs_path=os.path.join(os.getenv('LOG_DIR', os.path.join(os.getcwd(),"logs")),LOG_FILE)
 
 LOG_FILE_PATH=os.path.join(logs_path,LOG_FILE)
 
-logging.basicConfig(
-    filename=LOG_FILE_PATH,
-    format="[ %(asctime)s ] %(lineno)d %(name)s - %(levelname)s - %(message)s",
-    level=logging.INFO,
+LOG_FORMAT="[ %(asctime)s ] %(lineno)d %(name)s - %(levelname)s - %(message)s"
 
+# 'queue': records are handed to a background thread that does the file I/O (default)
+# 'sync':  write from the calling thread (the previous behaviour)
+# 'none':  no file logging
+LOG_HANDLER=os.getenv('LOG_HANDLER', 'queue').lower()
+LOG_STYLE=os.getenv('LOG_STYLE', 'text').lower()  # 'text' or 'json'
+LOG_LEVEL=os.getenv('LOG_LEVEL', 'INFO').upper()
 
-)
+# Rotation: by size (LOG_MAX_BYTES) unless LOG_ROTATE_WHEN is set (e.g. 'midnight', 'H')
+LOG_MAX_BYTES=int(os.getenv('LOG_MAX_BYTES', str(50 * 1024 * 1024)))
+LOG_BACKUP_COUNT=int(os.getenv('LOG_BACKUP_COUNT', '10'))
+LOG_ROTATE_WHEN=os.getenv('LOG_ROTATE_WHEN', '')
+
+# Hot-path throttling for INFO/DEBUG records, per call site (file + line):
+# at most LOG_RATE_LIMIT records per LOG_RATE_WINDOW seconds (0 disables), and
+# LOG_SAMPLE_RATE keeps that fraction of what passes. Warnings and errors always pass.
+LOG_RATE_LIMIT=int(os.getenv('LOG_RATE_LIMIT', '0'))
+LOG_RATE_WINDOW=float(os.getenv('LOG_RATE_WINDOW', '60'))
+LOG_SAMPLE_RATE=float(os.getenv('LOG_SAMPLE_RATE', '1.0'))
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, for log shippers"""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'module': record.module,
+            'line': record.lineno,
+            'process': record.process,
+            'thread': record.threadName,
+            'message': record.getMessage(),
+        }
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class ThrottleFilter(logging.Filter):
+    """Rate-limit and sample high-frequency INFO/DEBUG records per call site"""
+
+    def __init__(self, limit=0, window=60.0, sample_rate=1.0):
+        super().__init__()
+        self.limit = limit
+        self.window = window
+        self.sample_rate = sample_rate
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return False
+        if self.limit <= 0:
+            return True
+
+        key = (record.pathname, record.lineno)
+        now = time.monotonic()
+        with self._lock:
+            window_start, count, dropped = self._counts.get(key, (now, 0, 0))
+            if now - window_start >= self.window:
+                if dropped:
+                    record.msg = f"{record.msg} [{dropped} similar messages suppressed]"
+                window_start, count, dropped = now, 0, 0
+            if count < self.limit:
+                self._counts[key] = (window_start, count + 1, dropped)
+                return True
+            self._counts[key] = (window_start, count, dropped + 1)
+            return False
+
+
+def _file_handler(path):
+    os.makedirs(os.path.dirname(path),exist_ok=True)
+    if LOG_ROTATE_WHEN:
+        handler = logging.handlers.TimedRotatingFileHandler(
+            path, when=LOG_ROTATE_WHEN, backupCount=LOG_BACKUP_COUNT, delay=True
+        )
+    else:
+        handler = logging.handlers.RotatingFileHandler(
+            path, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, delay=True
+        )
+    handler.setFormatter(JsonFormatter() if LOG_STYLE == 'json' else logging.Formatter(LOG_FORMAT))
+    return handler
+
+
+def _start_listener(queue_handler, file_handler):
+    listener = logging.handlers.QueueListener(queue_handler.queue, file_handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
+
+
+def _configure():
+    """Returns (handler attached to the root logger, file handler, listener)"""
+    root = logging.getLogger()
+    root.setLevel(LOG_LEVEL)
+
+    if LOG_HANDLER == 'none':
+        root.addHandler(logging.NullHandler())
+        return None, None, None
+
+    throttle = ThrottleFilter(LOG_RATE_LIMIT, LOG_RATE_WINDOW, LOG_SAMPLE_RATE)
+    file_handler = _file_handler(LOG_FILE_PATH)
+
+    if LOG_HANDLER == 'sync':
+        file_handler.addFilter(throttle)
+        root.addHandler(file_handler)
+        return file_handler, file_handler, None
+
+    # Filter before enqueueing so dropped records cost no queue traffic
+    queue_handler = logging.handlers.QueueHandler(queue.SimpleQueue())
+    queue_handler.addFilter(throttle)
+    root.addHandler(queue_handler)
+    return queue_handler, file_handler, _start_listener(queue_handler, file_handler)
+
+
+_ROOT_HANDLER, _FILE_HANDLER, LOG_LISTENER = _configure()
+
+
+def _reopen_after_fork():
+    """
+    In a forked worker (pre-fork servers), switch to a per-process log file so
+    size/time rotation never races between workers, and restart the listener
+    thread, which does not survive fork.
+    """
+    global LOG_FILE_PATH, _FILE_HANDLER, LOG_LISTENER
+    if _FILE_HANDLER is None:
+        return
+
+    root = logging.getLogger()
+    LOG_FILE_PATH = os.path.join(logs_path, f"{os.path.splitext(LOG_FILE)[0]}_{os.getpid()}.log")
+    file_handler = _file_handler(LOG_FILE_PATH)
+
+    if LOG_LISTENER is None:
+        for log_filter in _FILE_HANDLER.filters:
+            file_handler.addFilter(log_filter)
+        root.removeHandler(_FILE_HANDLER)
+        root.addHandler(file_handler)
+        _FILE_HANDLER = file_handler
+        return
+
+    # Records the parent queued but had not written yet stay with the parent
+    _ROOT_HANDLER.queue = queue.SimpleQueue()
+    _FILE_HANDLER = file_handler
+    LOG_LISTENER = _start_listener(_ROOT_HANDLER, file_handler)
+
+
+os.register_at_fork(after_in_child=_reopen_after_fork)
@@ -1,7 +1,5 @@
 import sys
 import os
-import pandas as pd
-import joblib
 from src.logger import logging
 from src.exception import CustomException
 
@@ -19,6 +17,7 @@ class PredictPipeline:
             
             # For now, these are placeholders
             # Uncomment and update when you have trained models
+            # (import joblib here rather than at module level; it is slow to import)
             # self.model = joblib.load(self.model_path)
             # self.preprocessor = joblib.load(self.preprocessor_path)
             
@@ -37,6 +36,9 @@ class PredictPipeline:
             Prediction result
         """
         try:
+            # Imported on first use so importing the backend doesn't pay for pandas
+            import pandas as pd
+
             logging.info("Starting prediction")
             
             # TODO: Replace this with actual prediction logic
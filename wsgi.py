@@ -0,0 +1,14 @@
+"""
+Production WSGI entry point for Detect The Stress backend.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+With preload_app (the default in gunicorn.conf.py) this module is imported once
+in the master, which preloads shared state before forking workers.
+"""
+from backend import create_app
+from backend.server import preload
+import os
+
+app = create_app(os.getenv('FLASK_ENV', 'production'))
+preload(app)